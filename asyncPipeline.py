@@ -0,0 +1,263 @@
+"""
+异步同步流水线：下载、JSON 校验/格式化、写盘分为三个阶段，
+阶段之间通过有界队列连接，队列满时上游自动等待（背压），从而限制内存峰值。
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from contentCache import ContentCache
+from recordDiff import ChangeLog
+from retryScheduler import RetryLater, RetryScheduler
+from syncMetrics import FileMetrics, get_metrics
+from downloadEngine import (
+    DEFAULT_PER_HOST,
+    HostLimiter,
+    _no_retry,
+    content_key,
+    host_of,
+    load_content_measured,
+    prepare_content,
+    resolve_target,
+    write_atomic,
+)
+
+# 流水线默认配置
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_FORMAT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+DEFAULT_QUEUE_SIZE = 16  # 每个阶段之间最多缓存的文件数
+
+
+def _create_format_executor(workers: int) -> Executor:
+    """创建格式化用的进程池，环境不支持多进程时退回线程池"""
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"无法创建进程池，改用线程池格式化: {e}")
+        return ThreadPoolExecutor(max_workers=workers)
+
+
+async def _run_pipeline(files_to_download: Iterable[tuple], base_domain: str, retry: Callable,
+                        fetch_workers: int, format_workers: int, queue_size: int,
+                        per_host: int, cache: Optional[ContentCache],
+                        on_success: Optional[Callable[[tuple], None]],
+                        scheduler: Optional[RetryScheduler],
+                        changelog: Optional[ChangeLog]) -> Tuple[List[tuple], List[tuple]]:
+    loop = asyncio.get_running_loop()
+    metrics = get_metrics()
+    succeeded = []
+    failed = []
+
+    def finish(record: FileMetrics, item: tuple, ok: bool):
+        if scheduler is not None:
+            scheduler.forget(item)
+        record.ok = ok
+        metrics.record_file(record)
+        (succeeded if ok else failed).append(item)
+
+    source = iter(files_to_download)  # 按需取出，流式清单不会被一次性读完
+    ready = deque()  # 退避结束、等待重新下载的文件
+    fetched: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    formatted: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    limiter = HostLimiter(per_host)
+    io_executor = ThreadPoolExecutor(max_workers=fetch_workers + 1)
+    # 流式清单的 next() 可能等待网络数据，放在单独的线程中逐个取出，不阻塞事件循环上的其他阶段
+    source_executor = ThreadPoolExecutor(max_workers=1)
+    format_executor = _create_format_executor(format_workers)
+
+    records = {}
+    active_fetches = 0
+
+    async def next_item() -> Optional[tuple]:
+        """取下一个待下载的文件（优先重试的文件）；有文件等待重试或仍在下载时等待，全部完成时返回 None"""
+        nonlocal source
+        while True:
+            if scheduler is not None:
+                ready.extend(scheduler.pop_ready())
+            item = ready.popleft() if ready else None
+            if item is None and source is not None:
+                item = await loop.run_in_executor(source_executor, next, source, None)
+                if item is None:
+                    source = None
+            if item is None:
+                if scheduler is None or (not len(scheduler) and not active_fetches):
+                    return None
+                delay = scheduler.next_delay()
+                if active_fetches:
+                    # 仍在下载的文件可能随时重新排队
+                    delay = 0.05 if delay is None else min(delay, 0.05)
+                await asyncio.sleep(delay)
+                continue
+            if scheduler is None:
+                return item
+            host = host_of(base_domain, item[0])
+            if scheduler.host_down(host):
+                print(f"主机不可用，跳过: {item[1]}")
+                finish(records.pop(item, None) or FileMetrics(item[1]), item, False)
+                continue
+            delay = scheduler.wait_time(host)
+            if delay > 0:
+                scheduler.park(item, delay)
+                continue
+            return item
+
+    async def fetch_stage():
+        nonlocal active_fetches
+        while True:
+            item = await next_item()
+            if item is None:
+                return
+            url_path, local_path = item
+            record = records.pop(item, None) or FileMetrics(local_path)
+            active_fetches += 1
+            try:
+                target = resolve_target(url_path, local_path, base_domain)
+                if target is None:
+                    finish(record, item, False)
+                    continue
+                url, save_path = target
+                content, from_cache = await loop.run_in_executor(
+                    io_executor, load_content_measured, url, url_path, record,
+                    scheduler.attempt if scheduler is not None else retry, limiter, cache
+                )
+            except RetryLater as e:
+                host = host_of(base_domain, url_path)
+                delay = scheduler.retry(item, host, e)
+                if delay is not None:
+                    print(f"下载失败，{delay:.1f}秒后重试 {local_path}: {e}")
+                    record.retries += 1
+                    metrics.record_retry()
+                    records[item] = record
+                else:
+                    print(f"下载重试次数已达上限 {local_path}: {e}")
+                    metrics.add("retries_exhausted")
+                    finish(record, item, False)
+                continue
+            except Exception as e:
+                print(f"下载或处理 {local_path} 出错: {e}")
+                finish(record, item, False)
+                continue
+            finally:
+                active_fetches -= 1
+            if scheduler is not None:
+                scheduler.record_success(host_of(base_domain, url_path))
+            await fetched.put((item, record, save_path, content, from_cache))
+
+    async def format_stage():
+        while True:
+            entry = await fetched.get()
+            if entry is None:
+                return
+            item, record, save_path, content, from_cache = entry
+            start = time.perf_counter()
+            try:
+                data = await loop.run_in_executor(format_executor, prepare_content, save_path, content)
+            except ValueError as e:
+                print(f"下载的JSON文件格式无效: {save_path}, 错误: {e}")
+                finish(record, item, False)
+                continue
+            except Exception as e:
+                print(f"格式化失败 {save_path}: {e}")
+                finish(record, item, False)
+                continue
+            finally:
+                record.add_phase("format", time.perf_counter() - start)
+            if cache is not None and not from_cache:
+                await loop.run_in_executor(io_executor, cache.put, content_key(item[0]), content)
+            # 原始内容只在需要按记录比较时保留
+            await formatted.put((item, record, save_path, content if changelog is not None else None, data))
+
+    async def write_stage():
+        while True:
+            entry = await formatted.get()
+            if entry is None:
+                return
+            item, record, save_path, content, data = entry
+            change = None
+            if changelog is not None:
+                start = time.perf_counter()
+                change = await loop.run_in_executor(io_executor, changelog.compare, save_path, content)
+                record.add_phase("diff", time.perf_counter() - start)
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(io_executor, write_atomic, save_path, data)
+            except Exception as e:
+                print(f"保存文件失败 {save_path}: {e}")
+                finish(record, item, False)
+                continue
+            finally:
+                record.add_phase("write", time.perf_counter() - start)
+            print(f"已保存: {save_path}")
+            if changelog is not None:
+                changelog.add(item[1], change)
+            record.bytes_written = len(data)
+            finish(record, item, True)
+            if on_success is not None:
+                on_success(item)
+
+    try:
+        fetchers = [asyncio.create_task(fetch_stage()) for _ in range(fetch_workers)]
+        formatters = [asyncio.create_task(format_stage()) for _ in range(format_workers)]
+        writer = asyncio.create_task(write_stage())
+
+        await asyncio.gather(*fetchers)
+        for _ in formatters:
+            await fetched.put(None)
+        await asyncio.gather(*formatters)
+        await formatted.put(None)
+        await writer
+    finally:
+        source_executor.shutdown(wait=True)
+        io_executor.shutdown(wait=True)
+        format_executor.shutdown(wait=True)
+        if cache is not None:
+            cache.flush()
+
+    if scheduler is not None and scheduler.circuit_trips:
+        metrics.add("circuit_trips", scheduler.circuit_trips)
+    return succeeded, failed
+
+
+def download_files_async(files_to_download: Iterable[tuple], base_domain: str,
+                         retry: Callable = _no_retry,
+                         fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                         format_workers: int = DEFAULT_FORMAT_WORKERS,
+                         queue_size: int = DEFAULT_QUEUE_SIZE,
+                         per_host: int = DEFAULT_PER_HOST,
+                         cache: Optional[ContentCache] = None,
+                         on_success: Optional[Callable[[tuple], None]] = None,
+                         scheduler: Optional[RetryScheduler] = None,
+                         changelog: Optional[ChangeLog] = None) -> Tuple[List[tuple], List[tuple]]:
+    """
+    以异步流水线下载文件列表，返回 (成功列表, 失败列表)
+    files_to_download 可以是生成器，下载阶段有空闲时才取下一个文件
+
+    参数:
+        fetch_workers: 同时进行的下载数
+        format_workers: 校验/格式化进程数
+        queue_size: 阶段间队列长度，决定内存中最多滞留的文件数
+        cache: 内容缓存，命中时不发起网络请求
+        on_success: 每个文件写盘后调用
+        scheduler: 重试调度器，提供时忽略 retry，下载失败的文件按退避时间重新排队
+        changelog: 写盘前按记录比较被替换的文件，结果收集到其中
+    """
+    if not files_to_download:
+        return [], []
+    return asyncio.run(_run_pipeline(
+        files_to_download,
+        base_domain,
+        retry,
+        max(1, fetch_workers),
+        max(1, format_workers),
+        max(1, queue_size),
+        per_host,
+        cache,
+        on_success,
+        scheduler,
+        changelog,
+    ))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 比较各 JSON 后端在最大的几个配置文件上的解析与格式化耗时
+
+用法:
+    python benchmarks/bench_json_codec.py [--top 5] [--repeat 5] [--directory files]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import jsonCodec
+from jsonFormatter import collect_json_files
+
+
+def best_of(repeat, func, *args):
+    """返回多次运行中的最短耗时（秒）与最后一次的结果"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 后端基准测试")
+    parser.add_argument("--directory", default=os.path.join(ROOT, "files"), help="配置文件目录")
+    parser.add_argument("--top", type=int, default=5, help="测试最大的前 N 个文件")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    files = collect_json_files(args.directory)[:args.top]
+    if not files:
+        print(f"目录中没有JSON文件: {args.directory}")
+        return
+
+    print(f"可用后端: {', '.join(jsonCodec.AVAILABLE_BACKENDS)}")
+    baseline = {}
+    try:
+        for backend in reversed(jsonCodec.AVAILABLE_BACKENDS):  # 标准库最先运行，作为基准
+            jsonCodec.set_backend(backend)
+            print(f"\n[{backend}]")
+            for file_path, size in files:
+                with open(file_path, "rb") as f:
+                    content = f.read()
+                load_time, data = best_of(args.repeat, jsonCodec.loads, content)
+                dump_time, output = best_of(args.repeat, jsonCodec.dumps_bytes, data)
+                identical = output == content
+                total = load_time + dump_time
+                baseline.setdefault(file_path, total)
+                print(
+                    f"{os.path.relpath(file_path, args.directory)} ({size / 1024 / 1024:.1f} MB): "
+                    f"解析 {load_time * 1000:.1f} ms，格式化 {dump_time * 1000:.1f} ms，"
+                    f"加速 {baseline[file_path] / total:.1f}x，输出{'一致' if identical else '不一致'}"
+                )
+    finally:
+        jsonCodec.set_backend()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+端到端基准测试 - 在本地模拟服务器上运行同步脚本与格式化工具
+
+每个场景在独立的子进程和空工作目录中运行，记录耗时、吞吐量、峰值内存（RSS）与每秒请求数。
+
+用法:
+    python benchmarks/bench_sync.py [--files 365] [--total-mb 49] [--latency 0.02]
+                                    [--bandwidth-kbps 0] [--error-rate 0]
+                                    [--targets sync full formatter] [--json 结果.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from mockSeerServer import REAL_FILE_COUNT, REAL_TOTAL_BYTES, MockSeerServer, generate_tree
+
+TARGETS = ("sync", "full", "formatter")
+
+
+def peak_rss_mb():
+    """当前进程的峰值 RSS（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+def run_child(target, base_url, source_root, cache):
+    """子进程：在当前目录运行一个场景，结果以 JSON 输出到标准输出的最后一行"""
+    import contextlib
+    import io
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        if target in ("sync", "full"):
+            module = __import__("syncSeerH5Data" if target == "sync" else "full")
+            module.BASE_DOMAIN = base_url
+            module.ENABLE_CONTENT_CACHE = cache
+            module.main()
+        else:
+            import jsonFormatter
+            shutil.copytree(os.path.join(source_root, "resource"), os.path.join("files", "resource"))
+            start = time.perf_counter()
+            jsonFormatter.batch_format_json("files", 2, [], os.cpu_count() or 1)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "elapsed": elapsed,
+        "bytes": directory_size("files") if os.path.isdir("files") else 0,
+        "peak_rss_mb": peak_rss_mb(),
+        "log_tail": output.getvalue().strip().splitlines()[-3:],
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def run_target(target, server, source_root, cache):
+    """在新的工作目录中以子进程运行场景，返回结果字典"""
+    requests_before, bytes_before = server.stats()
+    with tempfile.TemporaryDirectory() as work_dir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", target,
+             "--base-url", server.base_url, "--source-root", source_root]
+            + (["--cache"] if cache else []),
+            cwd=work_dir, capture_output=True, text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{target} 运行失败:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    requests_after, bytes_after = server.stats()
+    result["requests"] = requests_after - requests_before
+    result["bytes_served"] = bytes_after - bytes_before
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端同步基准测试")
+    parser.add_argument("--files", type=int, default=REAL_FILE_COUNT, help="合成的配置文件数")
+    parser.add_argument("--total-mb", type=float, default=REAL_TOTAL_BYTES / 1024 / 1024, help="合成文件的总大小（MB）")
+    parser.add_argument("--extra-entries", type=int, default=25000, help="清单中的非配置条目数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="每个连接的带宽（KB/s，0 表示不限）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 500 的比例")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--cache", action="store_true", help="启用内容缓存（默认关闭以测量网络下载）")
+    parser.add_argument("--json", dest="json_path", help="将结果写入 JSON 文件")
+    # 子进程参数
+    parser.add_argument("--child", choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--source-root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.base_url, args.source_root, args.cache)
+        return
+
+    with tempfile.TemporaryDirectory() as source_root:
+        start = time.perf_counter()
+        generate_tree(source_root, args.files, int(args.total_mb * 1024 * 1024),
+                      extra_entries=args.extra_entries, seed=args.seed)
+        print(f"已生成 {args.files} 个文件（{args.total_mb:.1f} MB），耗时 {time.perf_counter() - start:.1f}s")
+
+        server = MockSeerServer(source_root, latency=args.latency,
+                                bandwidth=int(args.bandwidth_kbps * 1024),
+                                error_rate=args.error_rate, seed=args.seed).start()
+        results = {}
+        try:
+            for target in args.targets:
+                result = run_target(target, server, source_root, args.cache)
+                results[target] = result
+                mb = result["bytes"] / 1024 / 1024
+                rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "未知"
+                print(
+                    f"[{target}] 耗时 {result['elapsed']:.2f}s，写入 {mb:.1f} MB "
+                    f"({mb / max(result['elapsed'], 1e-9):.1f} MB/s)，峰值 RSS {rss}，"
+                    f"请求 {result['requests']} 次 ({result['requests'] / max(result['elapsed'], 1e-9):.1f} 次/秒)"
+                )
+        finally:
+            server.stop()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if not k.startswith("child")},
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
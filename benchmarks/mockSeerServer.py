@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+本地模拟 Seer H5 资源服务器，用于端到端测试与基准测试
+
+- generate_tree() 生成合成的 version/version.json 与带 hash 的配置文件树，
+  文件大小按真实 files/resource/config 的分布（365 个文件、约 49 MB，对数正态）抽样
+- MockSeerServer 以 HTTP/1.1 keep-alive 提供这些文件，可配置每个请求的延迟、
+  每个连接的带宽以及随机返回 500 的比例，支持 ETag / If-None-Match
+
+用法:
+    python benchmarks/mockSeerServer.py --root /tmp/seer-mock --generate --port 8765 --latency 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+# 真实配置文件树的统计值（files/resource/config 下的 JSON 文件）
+REAL_FILE_COUNT = 365
+REAL_TOTAL_BYTES = 49 * 1024 * 1024
+REAL_LOG_MEAN = 9.48  # ln(文件字节数) 的均值
+REAL_LOG_STDDEV = 2.12
+REAL_MAX_BYTES = 4 * 1024 * 1024
+
+CONFIG_DIRS = ("json", "xml")
+CHUNK_SIZE = 16 * 1024
+
+
+def sample_sizes(count: int, total_bytes: int, rng: random.Random) -> list:
+    """按对数正态分布抽样文件大小，并缩放到指定总大小"""
+    sizes = [
+        min(REAL_MAX_BYTES, max(16, int(math.exp(rng.gauss(REAL_LOG_MEAN, REAL_LOG_STDDEV)))))
+        for _ in range(count)
+    ]
+    scale = total_bytes / max(1, sum(sizes))
+    return [max(16, min(REAL_MAX_BYTES, int(size * scale))) for size in sizes]
+
+
+def make_json_content(size: int, rng: random.Random) -> bytes:
+    """生成约 size 字节的紧凑 JSON 配置内容"""
+    records = []
+    written = 2
+    index = 0
+    while written < size:
+        record = {
+            "ID": index,
+            "Name": f"精灵{index}",
+            "Type": rng.randint(1, 30),
+            "Rate": round(rng.random(), 4),
+            "Desc": "".join(rng.choice("星际探险赛尔号ABCxyz0123") for _ in range(rng.randint(8, 40))),
+            "Items": [rng.randint(1, 99999) for _ in range(rng.randint(0, 4))],
+        }
+        text = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        records.append(text)
+        written += len(text.encode("utf-8")) + 1
+        index += 1
+    return ('{"root":{"item":[' + ",".join(records) + "]}}").encode("utf-8")
+
+
+def generate_tree(root: str, file_count: int = REAL_FILE_COUNT, total_bytes: int = REAL_TOTAL_BYTES,
+                  extra_entries: int = 25000, seed: int = 0, version: int = 1) -> Dict:
+    """
+    在 root 下生成 version/version.json 与 resource/config/{json,xml} 文件树，返回清单字典
+    extra_entries 为清单中不属于配置目录的条目数（图片等），只用于模拟清单大小，不生成文件
+    """
+    rng = random.Random(seed)
+    config: Dict[str, Dict[str, str]] = {name: {} for name in CONFIG_DIRS}
+    for index, size in enumerate(sample_sizes(file_count, total_bytes, rng)):
+        directory = CONFIG_DIRS[index % len(CONFIG_DIRS)]
+        content = make_json_content(size, rng)
+        digest = hashlib.md5(content).hexdigest()[:8]
+        name = f"config{index}"
+        hashed = f"{name}_{digest}.json"
+        path = os.path.join(root, "resource", "config", directory, hashed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        config[directory][f"{name}.json"] = hashed
+
+    assets: Dict[str, Dict[str, str]] = {}
+    for index in range(extra_entries):
+        group = assets.setdefault(f"group{index % 200}", {})
+        group[f"image{index}.png"] = f"image{index}_{rng.getrandbits(32):08x}.png"
+
+    manifest = {
+        "version": version,
+        "files": {"resource": {"config": config, "assets": assets}},
+    }
+    write_manifest(root, manifest)
+    return manifest
+
+
+def write_manifest(root: str, manifest: Dict):
+    """写入 version/version.json（紧凑格式）"""
+    path = os.path.join(root, "version", "version.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockSeerServer"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.roll() < server.error_rate:
+            self._send_status(500)
+            return
+
+        relative = unquote(urlsplit(self.path).path).lstrip("/")
+        path = os.path.normpath(os.path.join(server.root, relative))
+        if not path.startswith(server.root + os.sep) or not os.path.isfile(path):
+            self._send_status(404)
+            return
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(stat.st_size))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                server.count_bytes(len(chunk))
+                if server.bandwidth:
+                    time.sleep(len(chunk) / server.bandwidth)
+
+    def _send_status(self, code: int):
+        body = f"{code}".encode()
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockSeerServer(ThreadingHTTPServer):
+    """
+    模拟资源服务器
+    latency: 每个请求的额外延迟（秒）；bandwidth: 每个连接的带宽（字节/秒，0 表示不限）；
+    error_rate: 随机返回 500 的比例
+    """
+
+    daemon_threads = True
+
+    def __init__(self, root: str, port: int = 0, latency: float = 0.0, bandwidth: int = 0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.requests = 0
+        self.bytes_sent = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_bytes(self, size: int):
+        with self._lock:
+            self.bytes_sent += size
+
+    def stats(self) -> Tuple[int, int]:
+        """返回 (请求数, 发送字节数)"""
+        with self._lock:
+            return self.requests, self.bytes_sent
+
+    def start(self) -> "MockSeerServer":
+        """在后台线程中运行"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 Seer H5 资源服务器")
+    parser.add_argument("--root", required=True, help="资源根目录（包含 version/version.json）")
+    parser.add_argument("--generate", action="store_true", help="先生成合成的文件树")
+    parser.add_argument("--files", type=int, default=REAL_FILE_COUNT, help="生成的配置文件数")
+    parser.add_argument("--total-mb", type=float, default=REAL_TOTAL_BYTES / 1024 / 1024, help="生成的总大小（MB）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="每个连接的带宽（KB/s，0 表示不限）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 500 的比例")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_tree(args.root, args.files, int(args.total_mb * 1024 * 1024), seed=args.seed)
+        print(f"已生成文件树: {args.root}")
+
+    server = MockSeerServer(args.root, args.port, args.latency, int(args.bandwidth_kbps * 1024),
+                            args.error_rate, args.seed)
+    print(f"模拟服务器已启动: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+同步变更通知：每次同步保存版本信息后，把本次写入和删除的文件作为事件发布给长期运行的进程，
+它们只需重新加载受影响的文档，不必定时重读整个目录或轮询 git。
+
+- 事件队列是追加式的 JSON Lines 文件（EVENTS_FILE），每行一个事件：
+  {"seq": 序号, "time": 时间, "version": 版本, "type": "added" | "changed" | "removed",
+   "path": 逻辑路径, "old_name" / "new_name": 带 hash 的文件名, "old_hash" / "new_hash": 内容 hash}
+  清理掉的遗留文件（不在清单中）同样发布为 removed 事件，文件名与 hash 为 null
+- 序号单调递增；文件超过 max_events 行时原子地改写为只保留最近的事件，EventReader 会检测到并按序号续读
+- 可选地把同一批事件以 JSON POST 到 webhook 地址（如本机的 queryServer /events），推送失败不影响同步
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from contentCache import name_hash
+from httpSession import get_session
+from versionManifest import ManifestChange
+
+EVENTS_FILE = "sync.events.jsonl"
+MAX_EVENTS = 10000  # 队列文件保留的事件数
+WEBHOOK_TIMEOUT = 5  # 秒
+
+
+def change_events(updated: Iterable[ManifestChange], removed: Iterable[ManifestChange] = (),
+                  version=None, orphans: Iterable[str] = ()) -> List[Dict]:
+    """
+    把清单变化转换为事件（未分配序号）
+    orphans 为清理掉的不在清单中的遗留文件（逻辑路径），发布为没有 hash 的 removed 事件
+    """
+    events = []
+    now = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    for kind, changes in (("updated", updated), ("removed", removed)):
+        for change in changes:
+            if kind == "removed":
+                event_type = "removed"
+            else:
+                event_type = "added" if change.old_name is None else "changed"
+            events.append({
+                "time": now,
+                "version": version,
+                "type": event_type,
+                "path": change.local_path,
+                "old_name": change.old_name,
+                "new_name": change.new_name if event_type != "removed" else None,
+                "old_hash": name_hash(change.old_name) if change.old_name else None,
+                "new_hash": name_hash(change.new_name) if change.new_name and event_type != "removed" else None,
+            })
+    for path in orphans:
+        events.append({
+            "time": now,
+            "version": version,
+            "type": "removed",
+            "path": path,
+            "old_name": None,
+            "new_name": None,
+            "old_hash": None,
+            "new_hash": None,
+        })
+    return events
+
+
+def _read_events(path: str) -> List[Dict]:
+    events = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue  # 写入中途退出时最后一行可能不完整
+    except OSError:
+        pass
+    return events
+
+
+class EventPublisher:
+    """向事件队列文件追加事件，并可选地推送到 webhook"""
+
+    def __init__(self, path: Optional[str] = EVENTS_FILE, webhook_url: Optional[str] = None,
+                 max_events: int = MAX_EVENTS):
+        self.path = path
+        self.webhook_url = webhook_url
+        self.max_events = max_events
+
+    def _last_seq(self) -> int:
+        events = _read_events(self.path)
+        return events[-1].get("seq", 0) if events else 0
+
+    def publish(self, events: List[Dict]) -> List[Dict]:
+        """分配序号并发布，返回带序号的事件"""
+        if not events:
+            return []
+        if self.path:
+            seq = self._last_seq()
+            for event in events:
+                seq += 1
+                event["seq"] = seq
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+                with open(self.path, "a+b") as f:
+                    # 上次写入中途退出留下的半行单独成行，不与新事件粘连
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            lines = "\n" + lines
+                    f.write(lines.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._compact()
+            except OSError as e:
+                print(f"写入变更事件失败: {e}")
+        if self.webhook_url:
+            try:
+                response = get_session().post(self.webhook_url, json={"events": events}, timeout=WEBHOOK_TIMEOUT)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"推送变更事件失败 {self.webhook_url}: {e}")
+        return events
+
+    def _compact(self):
+        """队列超过 max_events 行时只保留最近的事件（临时文件 + 原子替换）"""
+        events = _read_events(self.path)
+        if len(events) <= self.max_events:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(event, ensure_ascii=False) + "\n"
+                                for event in events[-self.max_events:]))
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class EventReader:
+    """
+    跟随事件队列文件读取新事件（每个消费者一个实例，线程安全）
+    after_seq 为 None 时从当前末尾开始，只读取之后发布的事件
+    """
+
+    def __init__(self, path: str = EVENTS_FILE, after_seq: Optional[int] = None):
+        self.path = path
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+        if after_seq is None:
+            events = _read_events(path)
+            after_seq = events[-1].get("seq", 0) if events else 0
+        self.last_seq = after_seq
+
+    def poll(self) -> List[Dict]:
+        """返回自上次调用以来的新事件"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return []
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # 队列被改写，按序号从头续读
+                self._inode = stat.st_ino
+                self._offset = 0
+            if stat.st_size == self._offset:
+                return []
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except OSError as e:
+                print(f"读取变更事件失败: {e}")
+                return []
+            end = data.rfind(b"\n") + 1  # 只处理完整的行
+            self._offset += end
+            events = []
+            for line in data[:end].splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get("seq", 0) > self.last_seq:
+                    events.append(event)
+                    self.last_seq = event["seq"]
+            return events
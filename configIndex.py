@@ -0,0 +1,328 @@
+"""
+配置文件的本地倒排索引：把同步下来的配置中每个对象的标量字段展开为 (字段名, 值) 倒排项，
+以 SQLite 保存，按字段名与值查询引用了某个 ID 的文件和记录，不再逐个解析配置文件。
+
+- 值按类型保存（整数、浮点数、字符串），查询 "3539" 时同时匹配整数 3539 与字符串 "3539"
+- 数组中的标量按所在字段名记录（如 "itemIDs": [1, 2] 记为 itemIDs=1、itemIDs=2）
+- 记录的位置沿用 recordDiff 的记录模型：有唯一 ID / id / Id 字段的记录数组按键标注（root.Monster[ID=3539]），
+  其余按下标标注
+- 每个文件记录大小、修改时间与 SHA-256，更新时只重新索引内容变化的文件，已删除的文件同时移出索引
+
+用法:
+    python configIndex.py query monID 3539 [--records]   查询引用 monID=3539 的文件（及记录）
+    python configIndex.py update [文件 ...]               更新指定文件；不指定时扫描 INDEX_ROOTS
+    python configIndex.py rebuild                         清空后重建索引
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import jsonCodec
+from merkleIndex import record_key_field
+
+CONFIG_INDEX_FILE = "config_index.sqlite"
+INDEX_ROOTS = ["files/resource/config/json", "files/resource/config/xml"]
+INDEX_SUFFIXES = (".json",)
+MAX_STRING_LENGTH = 128  # 更长的字符串（对话、描述等正文）不建索引
+
+_INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    record_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_file ON records (file_id);
+CREATE TABLE IF NOT EXISTS postings (
+    key TEXT NOT NULL,
+    value NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (key, value, record_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_record ON postings (record_id);
+"""
+
+Posting = Tuple[str, Any]
+
+
+def _index_value(value: Any) -> Optional[Any]:
+    """返回可建索引的值，不建索引时返回 None"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        # SQLite 整数为 64 位，超出范围的按字符串保存
+        return value if _INT_MIN <= value <= _INT_MAX else str(value)
+    if isinstance(value, float):
+        return value
+    if isinstance(value, str) and 0 < len(value) <= MAX_STRING_LENGTH:
+        return value
+    return None
+
+
+def extract_records(data: Any) -> List[Tuple[str, List[Posting]]]:
+    """按对象展开文档，返回 [(对象路径, [(字段名, 值), ...])]，只包含有可索引字段的对象"""
+    records: List[Tuple[str, List[Posting]]] = []
+
+    def visit_object(path: str, obj: Dict):
+        postings: List[Posting] = []
+        for name, value in obj.items():
+            collect(f"{path}.{name}" if path else str(name), str(name), value, postings)
+        if postings:
+            records.append((path, postings))
+
+    def collect(path: str, name: str, value: Any, postings: List[Posting]):
+        if isinstance(value, dict):
+            visit_object(path, value)
+        elif isinstance(value, list):
+            key_field = None
+            if value and all(isinstance(item, dict) for item in value):
+                key_field = record_key_field(value)
+            for i, item in enumerate(value):
+                label = f"{key_field}={item[key_field]}" if key_field else str(i)
+                collect(f"{path}[{label}]", name, item, postings)
+        else:
+            indexed = _index_value(value)
+            if indexed is not None:
+                postings.append((name, indexed))
+
+    collect("", "", data, [])
+    return records
+
+
+def query_values(text: str) -> List[Any]:
+    """命令行输入的值对应的查询值：能解析为数字时同时匹配数字与原字符串"""
+    values: List[Any] = [text]
+    for convert in (int, float):
+        try:
+            values.insert(0, convert(text))
+            break
+        except ValueError:
+            continue
+    return values
+
+
+def _normalize(path: str) -> str:
+    return path.replace("\\", "/")
+
+
+def _collect_files(roots: Sequence[str], suffixes: Sequence[str]) -> Set[str]:
+    paths = set()
+    for root in roots:
+        for directory, _, files in os.walk(root):
+            paths.update(_normalize(os.path.join(directory, file)) for file in files
+                         if file.lower().endswith(tuple(suffixes)))
+    return paths
+
+
+class ConfigIndex:
+    """基于 SQLite 的配置倒排索引"""
+
+    def __init__(self, db_path: str = CONFIG_INDEX_FILE):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "ConfigIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        """已索引的文件数"""
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def indexed_files(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT path FROM files ORDER BY path")]
+
+    def lookup(self, key: str, *values: Any) -> List[Tuple[str, str]]:
+        """查询字段 key 取值为 values 之一的记录，返回 [(文件路径, 记录路径)]"""
+        if not values:
+            return []
+        placeholders = ", ".join("?" * len(values))
+        rows = self._conn.execute(
+            "SELECT DISTINCT f.path, r.path, r.record_id FROM postings p"
+            " JOIN records r ON r.record_id = p.record_id"
+            " JOIN files f ON f.file_id = r.file_id"
+            f" WHERE p.key = ? AND p.value IN ({placeholders})"
+            " ORDER BY f.path, r.record_id",
+            (key, *values),
+        )
+        return [(file_path, record_path) for file_path, record_path, _ in rows]
+
+    def files_for(self, key: str, *values: Any) -> Dict[str, int]:
+        """查询引用了 key=values 的文件，返回 {文件路径: 匹配的记录数}"""
+        counts: Dict[str, int] = {}
+        for file_path, _ in self.lookup(key, *values):
+            counts[file_path] = counts.get(file_path, 0) + 1
+        return counts
+
+    def _remove_file(self, file_id: int):
+        self._conn.execute(
+            "DELETE FROM postings WHERE record_id IN (SELECT record_id FROM records WHERE file_id = ?)",
+            (file_id,),
+        )
+        self._conn.execute("DELETE FROM records WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def _index_file(self, path: str, size: int, mtime_ns: int, sha256: str, data: Any):
+        cursor = self._conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (path, size, mtime_ns, sha256),
+        )
+        file_id = cursor.lastrowid
+        rows = []
+        for record_path, postings in extract_records(data):
+            record_id = self._conn.execute(
+                "INSERT INTO records (file_id, path) VALUES (?, ?)", (file_id, record_path)
+            ).lastrowid
+            rows.extend((key, value, record_id) for key, value in postings)
+        self._conn.executemany("INSERT OR IGNORE INTO postings (key, value, record_id) VALUES (?, ?, ?)", rows)
+
+    def update(self, paths: Iterable[str]) -> Tuple[int, int]:
+        """
+        在一个事务中更新指定文件：内容变化的重新索引，已不存在的移出索引，未变化的跳过
+        返回 (重新索引的文件数, 移出索引的文件数)
+        """
+        with self._conn:
+            return self._update(paths)
+
+    def _update(self, paths: Iterable[str]) -> Tuple[int, int]:
+        indexed = removed = 0
+        for path in sorted(set(_normalize(path) for path in paths)):
+            row = self._conn.execute(
+                "SELECT file_id, size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if not os.path.isfile(path):
+                if row is not None:
+                    self._remove_file(row[0])
+                    removed += 1
+                continue
+            try:
+                stat = os.stat(path)
+                if row is not None and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+                    continue
+                with open(path, "rb") as f:
+                    content = f.read()
+                sha256 = hashlib.sha256(content).hexdigest()
+                if row is not None and row[1] == stat.st_size and row[3] == sha256:
+                    self._conn.execute("UPDATE files SET mtime_ns = ? WHERE file_id = ?",
+                                       (stat.st_mtime_ns, row[0]))
+                    continue
+                data = jsonCodec.loads(content)
+            except (OSError, ValueError) as e:
+                # 无法读取或解析的文件不保留旧的倒排项，避免查询返回过期结果
+                print(f"索引配置文件失败 {path}: {e}")
+                if row is not None:
+                    self._remove_file(row[0])
+                    removed += 1
+                continue
+            if row is not None:
+                self._remove_file(row[0])
+            self._index_file(path, stat.st_size, stat.st_mtime_ns, sha256, data)
+            indexed += 1
+        return indexed, removed
+
+    def scan(self, roots: Sequence[str] = INDEX_ROOTS,
+             suffixes: Sequence[str] = INDEX_SUFFIXES) -> Tuple[int, int]:
+        """扫描 roots 下的全部配置文件并更新索引（包括已被删除的文件）"""
+        paths = _collect_files(roots, suffixes)
+        prefixes = tuple(_normalize(root).rstrip("/") + "/" for root in roots)
+        paths.update(path for path in self.indexed_files() if path.startswith(prefixes))
+        return self.update(paths)
+
+    def rebuild(self, roots: Sequence[str] = INDEX_ROOTS,
+                suffixes: Sequence[str] = INDEX_SUFFIXES) -> Tuple[int, int]:
+        """在一个事务中清空并重新索引 roots 下的全部配置文件，失败时保留原有索引"""
+        paths = _collect_files(roots, suffixes)
+        with self._conn:
+            self._clear()
+            return self._update(paths)
+
+    def clear(self):
+        with self._conn:
+            self._clear()
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM postings")
+        self._conn.execute("DELETE FROM records")
+        self._conn.execute("DELETE FROM files")
+
+
+def update_config_index(db_path: str, paths: Iterable[str],
+                        roots: Sequence[str] = INDEX_ROOTS) -> Optional[Tuple[int, int]]:
+    """
+    同步完成后调用：只更新本次同步写入或删除的文件；索引为空时扫描 roots 建立完整索引
+    返回 (重新索引的文件数, 移出索引的文件数)，失败时返回 None
+    """
+    prefixes = tuple(_normalize(root).rstrip("/") + "/" for root in roots)
+    try:
+        with ConfigIndex(db_path) as index:
+            if not len(index):
+                return index.scan(roots)
+            return index.update(path for path in paths if _normalize(path).startswith(prefixes))
+    except sqlite3.Error as e:
+        print(f"更新配置索引失败: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="配置文件倒排索引工具")
+    parser.add_argument("--db", default=CONFIG_INDEX_FILE, help="索引文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    query_parser = sub.add_parser("query", help="按字段名与值查询")
+    query_parser.add_argument("key", help="字段名，如 monID")
+    query_parser.add_argument("value", help="字段值，数字同时匹配数字与字符串")
+    query_parser.add_argument("--records", action="store_true", help="列出匹配的记录而非文件")
+    update_parser = sub.add_parser("update", help="更新指定文件，不指定时扫描配置目录")
+    update_parser.add_argument("paths", nargs="*")
+    sub.add_parser("rebuild", help="清空后重建索引")
+    args = parser.parse_args()
+
+    if args.command == "query":
+        if not os.path.exists(args.db):
+            print(f"索引不存在: {args.db}，请先运行 update")
+            return
+        start = time.perf_counter()
+        with ConfigIndex(args.db) as index:
+            values = query_values(args.value)
+            if args.records:
+                results = [f"{file_path}  {record_path}" for file_path, record_path in index.lookup(args.key, *values)]
+            else:
+                results = [f"{file_path}  ({count} 条记录)"
+                           for file_path, count in index.files_for(args.key, *values).items()]
+        for line in results:
+            print(line)
+        print(f"共 {len(results)} 条结果，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        return
+
+    start = time.perf_counter()
+    with ConfigIndex(args.db) as index:
+        if args.command == "rebuild":
+            indexed, removed = index.rebuild()
+        elif args.paths:
+            indexed, removed = index.update(args.paths)
+        else:
+            indexed, removed = index.scan()
+        total = len(index)
+    print(f"已索引 {indexed} 个文件，移除 {removed} 个，索引共 {total} 个文件，"
+          f"耗时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+按内容 hash 寻址的本地下载缓存。
+
+远程文件名中带有内容 hash（如 pveEnter_378343fe.json），缓存以 "hash + 扩展名" 为键保存原始下载内容：
+逻辑文件切换回旧 hash，或两个逻辑文件指向同一内容（petbook.json 与 petbook_temp.json）时，
+直接从缓存恢复而不发起网络请求。缓存总大小超过上限时按最近最少使用（LRU）淘汰。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+CACHE_DIR = ".seer_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILE = "index.json"
+
+_HASHED_NAME = re.compile(r"_([0-9a-fA-F]{6,})(\.[A-Za-z0-9]+)$")
+
+
+def name_hash(hashed_path: str) -> Optional[str]:
+    """带 hash 的文件名中的内容 hash（小写），文件名不含 hash 时返回 None"""
+    match = _HASHED_NAME.search(hashed_path.rsplit("/", 1)[-1])
+    return match.group(1).lower() if match else None
+
+
+def content_key(hashed_path: str) -> Optional[str]:
+    """从带 hash 的文件名中提取缓存键（hash + 扩展名），文件名不含 hash 时返回 None"""
+    name = hashed_path.rsplit("/", 1)[-1]
+    match = _HASHED_NAME.search(name)
+    if not match:
+        return None
+    return f"{match.group(1)}{match.group(2)}".lower()
+
+
+class ContentCache:
+    """线程安全的内容缓存，索引记录每个条目的大小、SHA-256 与最近访问时间"""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._total = 0
+        self._load_index()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self):
+        path = self._index_path()
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"缓存索引损坏，已忽略: {e}")
+            return
+        if not isinstance(entries, dict) or not all(
+            isinstance(entry, dict) and isinstance(entry.get("size", 0), int)
+            and isinstance(entry.get("atime", 0), (int, float))
+            for entry in entries.values()
+        ):
+            print("缓存索引损坏，已忽略: 格式不正确")
+            return
+        # 按最近访问时间排序，最久未使用的在前
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get("atime", 0)):
+            if os.path.exists(self._blob_path(key)):
+                self._entries[key] = entry
+                self._total += entry.get("size", 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def get(self, key: Optional[str]) -> Optional[bytes]:
+        """读取缓存内容，内容与记录的摘要不一致时视为未命中并删除"""
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                content = f.read()
+        except OSError:
+            content = None
+
+        with self._lock:
+            if content is None or hashlib.sha256(content).hexdigest() != entry.get("sha256"):
+                print(f"缓存内容校验失败，已丢弃: {key}")
+                self._remove(key)
+                self.misses += 1
+                return None
+            entry["atime"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return content
+
+    def put(self, key: Optional[str], content: bytes):
+        """写入缓存，必要时淘汰最久未使用的条目"""
+        if not key or not content or len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["atime"] = time.time()
+                self._entries.move_to_end(key)
+                self._dirty = True
+                return
+        blob_path = self._blob_path(key)
+        temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, blob_path)
+        except OSError as e:
+            print(f"写入缓存失败 {key}: {e}")
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except:
+                    pass
+            return
+
+        with self._lock:
+            if key not in self._entries:
+                self._total += len(content)
+            self._entries[key] = {
+                "size": len(content),
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "atime": time.time(),
+            }
+            self._entries.move_to_end(key)
+            self._dirty = True
+            while self._total > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= entry.get("size", 0)
+            self._dirty = True
+        try:
+            os.remove(self._blob_path(key))
+        except OSError:
+            pass
+
+    def flush(self):
+        """将索引写回磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        path = self._index_path()
+        temp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"保存缓存索引失败: {e}")
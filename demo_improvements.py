@@ -4,12 +4,13 @@
 Demonstration script showing fault tolerance improvements
 """
 
+import os
 import sys
 import tempfile
 import json
 
 # Add the project directory to the path
-sys.path.insert(0, '/home/runner/work/syncSeerJsonData/syncSeerJsonData')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import syncSeerH5Data
 
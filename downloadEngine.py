@@ -0,0 +1,373 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from contentCache import ContentCache, content_key
+from httpSession import http_get
+from jsonFormatter import format_json_bytes
+from recordDiff import ChangeLog
+from retryScheduler import RetryLater, RetryScheduler
+from syncMetrics import FileMetrics, get_metrics
+
+# 并发下载默认配置
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+def build_download_url(base_domain: str, url_path: str) -> str:
+    """根据 version.json 中的路径拼接下载地址（去掉开头的 'files/'）"""
+    if url_path.startswith("files/"):
+        url_path = url_path[len("files/"):]
+    return f"{base_domain}/{url_path}"
+
+
+class HostLimiter:
+    """按主机限制同时进行的请求数"""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = sem
+            return sem
+
+
+def _no_retry(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def resolve_target(url_path: str, local_path: str, base_domain: str) -> Optional[Tuple[str, str]]:
+    """校验路径并创建目录，返回 (下载地址, 本地保存路径)，无效时返回 None"""
+    # 输入验证
+    if not url_path or not local_path:
+        print(f"无效的文件路径: url_path={url_path}, local_path={local_path}")
+        return None
+
+    url = build_download_url(base_domain, url_path)
+
+    # 验证URL格式
+    if not url.startswith(('http://', 'https://')):
+        print(f"无效的URL格式: {url}")
+        return None
+
+    save_path = os.path.join(*local_path.split("/"))
+
+    # 安全创建目录
+    dir_path = os.path.dirname(save_path)
+    try:
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+    except Exception as e:
+        print(f"无法创建目录: {dir_path}: {e}")
+        return None
+
+    return url, save_path
+
+
+def fetch_content(url: str, retry: Callable = _no_retry,
+                  limiter: Optional[HostLimiter] = None) -> bytes:
+    """下载地址内容（带重试），内容为空时抛出 ValueError"""
+    print(f"正在下载: {url}")
+
+    def fetch():
+        response = http_get(url, timeout=10)
+        response.raise_for_status()
+        return response
+
+    if limiter is not None:
+        with limiter.for_url(url):
+            resp = retry(fetch)
+    else:
+        resp = retry(fetch)
+
+    # 验证内容
+    if not resp.content:
+        raise ValueError(f"下载内容为空: {url}")
+    return resp.content
+
+
+def load_content(url: str, url_path: str, retry: Callable = _no_retry,
+                 limiter: Optional[HostLimiter] = None,
+                 cache: Optional[ContentCache] = None) -> Tuple[bytes, bool]:
+    """优先从内容缓存读取，未命中时下载；返回 (内容, 是否来自缓存)"""
+    if cache is not None:
+        content = cache.get(content_key(url_path))
+        if content is not None:
+            print(f"从缓存恢复: {url}")
+            return content, True
+    return fetch_content(url, retry, limiter), False
+
+
+def load_content_measured(url: str, url_path: str, record: FileMetrics, retry: Callable = _no_retry,
+                          limiter: Optional[HostLimiter] = None,
+                          cache: Optional[ContentCache] = None) -> Tuple[bytes, bool]:
+    """load_content 并把耗时、字节数与重试次数记入 record（需在执行下载的线程中调用）"""
+    metrics = get_metrics()
+    metrics.take_thread_retries()
+    start = time.perf_counter()
+    try:
+        content, from_cache = load_content(url, url_path, retry, limiter, cache)
+    finally:
+        record.add_phase("network", time.perf_counter() - start)
+        record.retries += metrics.take_thread_retries()
+    if from_cache:
+        record.source = "cache"
+    else:
+        record.bytes_downloaded = len(content)
+    return content, from_cache
+
+
+def prepare_content(save_path: str, content: bytes) -> bytes:
+    """校验并格式化待写入的内容；JSON 无效时抛出 ValueError"""
+    if save_path.lower().endswith(".json"):
+        return format_json_bytes(content)
+    return content
+
+
+def write_atomic(save_path: str, content: bytes) -> None:
+    """写入临时文件后原子替换目标文件，失败时清理临时文件"""
+    temp_path = f"{save_path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, save_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except:
+                pass
+        raise
+
+
+def download_file(url_path: str, local_path: str, base_domain: str,
+                  retry: Callable = _no_retry,
+                  limiter: Optional[HostLimiter] = None,
+                  cache: Optional[ContentCache] = None,
+                  record: Optional[FileMetrics] = None,
+                  changelog: Optional[ChangeLog] = None) -> bool:
+    """
+    下载单个文件并格式化，返回是否成功
+    响应内容只解析一次并在内存中格式化，再以临时文件 + os.replace 原子写入
+    retry 抛出 RetryLater 时原样抛出，由重试调度器稍后重试（record 保留到最终结果时再提交）
+    提供 changelog 时，写盘前按记录比较旧文件与新内容，写盘成功后记入变更记录
+    """
+    if record is None:
+        record = FileMetrics(local_path)
+    retry_later = False
+    try:
+        target = resolve_target(url_path, local_path, base_domain)
+        if target is None:
+            return False
+        url, save_path = target
+
+        try:
+            content, from_cache = load_content_measured(url, url_path, record, retry, limiter, cache)
+        except ValueError as e:
+            print(e)
+            return False
+
+        # 单次解析校验并在内存中格式化，JSON 文件只序列化一次
+        start = time.perf_counter()
+        try:
+            data = prepare_content(save_path, content)
+        except ValueError as e:
+            print(f"下载的JSON文件格式无效: {save_path}, 错误: {e}")
+            return False
+        finally:
+            record.add_phase("format", time.perf_counter() - start)
+
+        # 校验通过的原始内容写入缓存
+        if cache is not None and not from_cache:
+            cache.put(content_key(url_path), content)
+
+        change = None
+        if changelog is not None:
+            start = time.perf_counter()
+            change = changelog.compare(save_path, content)
+            record.add_phase("diff", time.perf_counter() - start)
+
+        # 一次原子替换落盘
+        start = time.perf_counter()
+        try:
+            write_atomic(save_path, data)
+        except Exception as e:
+            print(f"保存文件失败 {save_path}: {e}")
+            return False
+        finally:
+            record.add_phase("write", time.perf_counter() - start)
+        print(f"已保存: {save_path}")
+        if changelog is not None:
+            changelog.add(local_path, change)
+
+        record.ok = True
+        record.bytes_written = len(data)
+        return True
+
+    except RetryLater:
+        retry_later = True
+        raise
+    except Exception as e:
+        print(f"下载或处理 {local_path} 出错: {e}")
+        return False
+    finally:
+        if not retry_later:
+            get_metrics().record_file(record)
+
+
+def host_of(base_domain: str, url_path: str) -> str:
+    """文件下载地址的主机名，用于按主机熔断"""
+    return urlsplit(build_download_url(base_domain, url_path)).netloc
+
+
+def _download_scheduled(files_to_download, base_domain: str, scheduler: RetryScheduler,
+                        workers: int, per_host: int, cache: Optional[ContentCache],
+                        on_success: Optional[Callable[[tuple], None]],
+                        changelog: Optional[ChangeLog]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    由重试调度器驱动的下载循环：每个文件单次请求，网络失败的文件按退避时间重新排队，
+    等待期间继续派发其他文件；熔断中的主机的文件暂缓派发
+    """
+    succeeded = []
+    failed = []
+    metrics = get_metrics()
+    limiter = HostLimiter(per_host)
+    records: Dict[tuple, FileMetrics] = {}
+    inflight = {}
+    source = iter(files_to_download)
+    exhausted = False
+    window = max(1, workers) * 2  # 同时在途的文件数，避免一次性消耗流式清单
+
+    def finish(item: tuple, ok: bool):
+        scheduler.forget(item)
+        records.pop(item, None)
+        (succeeded if ok else failed).append(item)
+        if ok and on_success is not None:
+            on_success(item)
+
+    def dispatch(item: tuple):
+        host = host_of(base_domain, item[0])
+        if scheduler.host_down(host):
+            print(f"主机不可用，跳过: {item[1]}")
+            metrics.record_file(records.get(item) or FileMetrics(item[1]))
+            finish(item, False)
+            return
+        delay = scheduler.wait_time(host)
+        if delay > 0:
+            scheduler.park(item, delay)
+            return
+        record = records.setdefault(item, FileMetrics(item[1]))
+        future = executor.submit(download_file, item[0], item[1], base_domain,
+                                 scheduler.attempt, limiter, cache, record, changelog)
+        inflight[future] = (item, host)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            for item in scheduler.pop_ready():
+                dispatch(item)
+            while not exhausted and len(inflight) < window:
+                item = next(source, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    dispatch(item)
+
+            if not inflight:
+                if exhausted and not len(scheduler):
+                    break
+                time.sleep(scheduler.next_delay() or 0)
+                continue
+
+            done, _ = wait(list(inflight), timeout=scheduler.next_delay(), return_when=FIRST_COMPLETED)
+            for future in done:
+                item, host = inflight.pop(future)
+                try:
+                    ok = future.result()
+                except RetryLater as e:
+                    delay = scheduler.retry(item, host, e)
+                    if delay is not None:
+                        print(f"下载失败，{delay:.1f}秒后重试 {item[1]}: {e}")
+                        records[item].retries += 1
+                        metrics.record_retry()
+                        continue
+                    print(f"下载重试次数已达上限 {item[1]}: {e}")
+                    metrics.add("retries_exhausted")
+                    metrics.record_file(records[item])
+                    finish(item, False)
+                    continue
+                except Exception as e:
+                    print(f"下载或处理 {item[1]} 出错: {e}")
+                    ok = False
+                scheduler.record_success(host)
+                finish(item, ok)
+
+    if scheduler.circuit_trips:
+        metrics.add("circuit_trips", scheduler.circuit_trips)
+    return succeeded, failed
+
+
+def download_files(files_to_download: List[tuple], base_domain: str,
+                   retry: Callable = _no_retry,
+                   workers: int = DEFAULT_WORKERS,
+                   per_host: int = DEFAULT_PER_HOST,
+                   cache: Optional[ContentCache] = None,
+                   on_success: Optional[Callable[[tuple], None]] = None,
+                   scheduler: Optional[RetryScheduler] = None,
+                   changelog: Optional[ChangeLog] = None) -> Tuple[List[tuple], List[tuple]]:
+    """
+    下载文件列表，返回 (成功列表, 失败列表)
+
+    workers <= 1 时按顺序逐个下载；否则使用有界线程池并发下载，
+    并通过 per_host 限制同一主机的并发连接数。两种方式的落盘结果一致。
+    提供 cache 时，内容 hash 已在缓存中的文件不再发起网络请求。
+    on_success 在每个文件写盘后立即调用（可能来自工作线程）。
+    提供 scheduler 时忽略 retry：失败的文件交给调度器重新排队，工作线程不会等待。
+    提供 changelog 时按记录比较被替换的文件，结果收集到 changelog 中。
+    """
+    succeeded = []
+    failed = []
+
+    def run(item, limiter=None):
+        ok = download_file(item[0], item[1], base_domain, retry, limiter, cache, changelog=changelog)
+        if ok and on_success is not None:
+            on_success(item)
+        return ok
+
+    try:
+        if scheduler is not None:
+            return _download_scheduled(files_to_download, base_domain, scheduler,
+                                       workers, per_host, cache, on_success, changelog)
+
+        if workers <= 1:
+            for item in files_to_download:
+                if run(item):
+                    succeeded.append(item)
+                else:
+                    failed.append(item)
+            return succeeded, failed
+
+        limiter = HostLimiter(per_host)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(item, executor.submit(run, item, limiter)) for item in files_to_download]
+            for item, future in futures:
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"下载或处理 {item[1]} 出错: {e}")
+                    ok = False
+                (succeeded if ok else failed).append(item)
+
+        return succeeded, failed
+    finally:
+        if cache is not None:
+            cache.flush()
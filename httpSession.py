@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 连接池配置
+POOL_CONNECTIONS = 4  # 缓存的主机连接池数量
+POOL_MAXSIZE = 16  # 每个主机连接池保留的最大连接数，应不小于下载线程数
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _create_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取进程内共享的 HTTP 会话（复用 keep-alive 连接）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session(POOL_CONNECTIONS, POOL_MAXSIZE)
+    return _session
+
+
+def configure_session(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """按给定连接池大小重建共享会话"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _create_session(max(1, pool_connections), max(1, pool_maxsize))
+    return _session
+
+
+def close_session():
+    """关闭共享会话，释放所有连接"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """通过共享会话发送 GET 请求"""
+    return get_session().get(url, **kwargs)
+
+
+def get_connection_stats() -> Dict[str, int]:
+    """
+    统计共享会话自创建以来的连接复用情况（同步脚本每次运行开始时调用 configure_session 重新计数）
+    返回 {"requests": 请求数, "connections": 新建连接数, "reused": 复用连接的请求数}
+    """
+    total_requests = 0
+    total_connections = 0
+    session = _session
+    if session is not None:
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                total_requests += getattr(pool, "num_requests", 0)
+                total_connections += getattr(pool, "num_connections", 0)
+
+    return {
+        "requests": total_requests,
+        "connections": total_connections,
+        "reused": max(0, total_requests - total_connections),
+    }
+
+
+def print_connection_stats():
+    """打印本次运行的连接复用统计"""
+    stats = get_connection_stats()
+    if stats["requests"]:
+        print(f"连接统计: 共 {stats['requests']} 次请求，新建连接 {stats['connections']} 个，"
+              f"复用连接 {stats['reused']} 次")
@@ -0,0 +1,113 @@
+"""
+JSON 编解码层：安装了 orjson / ujson 时使用更快的实现，否则使用标准库 json。
+
+输出与 json.dumps(obj, ensure_ascii=False, indent=2) 逐字节一致（键顺序保持不变）：
+- orjson 只用于 indent=2 的序列化，且对象中不含标准库会以指数形式输出的浮点数
+  （绝对值 >= 1e16 或 < 1e-4）、NaN/Infinity 时才使用，其余情况退回标准库
+- ujson 的浮点与转义格式与标准库不同，只用于解析
+- 快速实现解析失败（NaN 等）时退回标准库，错误信息与标准库一致；
+  orjson 会把超出 64 位的整数静默解析为浮点数，文本中出现 19 位以上的连续数字时直接使用标准库
+"""
+
+import json
+from typing import IO, Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+AVAILABLE_BACKENDS = tuple(
+    name for name, module in (("orjson", orjson), ("ujson", ujson), ("json", json)) if module is not None
+)
+
+_backend = AVAILABLE_BACKENDS[0]
+
+# 数字映射为 "0"、其余字节映射为空格，用于快速查找长数字串
+_DIGIT_TABLE = bytes(0x30 if 0x30 <= i <= 0x39 else 0x20 for i in range(256))
+_LONG_NUMBER = b"0" * 19  # 超出 64 位的整数至少有 19 位数字
+
+
+def get_backend() -> str:
+    """返回当前使用的后端名称"""
+    return _backend
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """切换后端（None 表示自动选择最快的可用后端），返回切换后的后端名称"""
+    global _backend
+    if name is None:
+        name = AVAILABLE_BACKENDS[0]
+    if name not in AVAILABLE_BACKENDS:
+        raise ValueError(f"JSON 后端不可用: {name}")
+    _backend = name
+    return _backend
+
+
+def _may_exceed_int64(data: Union[bytes, str]) -> bool:
+    """文本中是否有可能超出 64 位范围的整数（19 位以上的连续数字，包括字符串中的）"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return _LONG_NUMBER in bytes(data).translate(_DIGIT_TABLE)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """解析 JSON 文本或 UTF-8 字节，结果与 json.loads 一致；内容无效时抛出 json.JSONDecodeError"""
+    if _backend != "json" and not _may_exceed_int64(data):
+        if _backend == "orjson":
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        else:
+            try:
+                return ujson.loads(data)
+            except (ValueError, OverflowError):
+                pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def load(f: IO) -> Any:
+    """从文件对象（文本或二进制模式）解析 JSON"""
+    return loads(f.read())
+
+
+def _orjson_compatible(container: Any) -> bool:
+    """检查容器（dict/list/tuple）内的浮点数是否都能由 orjson 输出与标准库相同的文本"""
+    stack = [container]
+    while stack:
+        value = stack.pop()
+        items = value.values() if isinstance(value, dict) else value
+        for item in items:
+            kind = type(item)
+            if kind is str or kind is int or item is None or kind is bool:
+                continue
+            if isinstance(item, (dict, list, tuple)):
+                stack.append(item)
+            elif isinstance(item, float):
+                # 标准库在此范围外使用 1e+16 / 1e-05 形式，orjson 则为 1e16 / 0.00001
+                if item != 0.0 and not 1e-4 <= abs(item) < 1e16:
+                    return False
+    return True
+
+
+def dumps_bytes(obj: Any, indent: int = 2) -> bytes:
+    """序列化为 UTF-8 字节，与 json.dumps(obj, ensure_ascii=False, indent=indent).encode() 一致"""
+    if _backend == "orjson" and indent == 2 and _orjson_compatible([obj]):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # 超出 64 位的整数、非字符串键等交给标准库处理
+    return json.dumps(obj, ensure_ascii=False, indent=indent, sort_keys=False).encode("utf-8")
+
+
+def dump(obj: Any, f: IO[bytes], indent: int = 2):
+    """序列化并写入二进制文件对象"""
+    f.write(dumps_bytes(obj, indent))
@@ -1,6 +1,80 @@
+import hashlib
 import json
 import os
 
+import jsonCodec
+from jsonStream import DuplicateKeyError, iter_events, iter_file_chunks, write_pretty
+
+STREAM_FORMAT_THRESHOLD = 2 * 1024 * 1024  # 不小于此大小的文件流式重排，内存占用与文件大小无关
+
+
+def format_json_bytes(content: bytes, indent=2) -> bytes:
+    """在内存中格式化JSON内容，返回UTF-8编码的结果；内容无效时抛出 ValueError"""
+    return jsonCodec.dumps_bytes(jsonCodec.loads(content), indent)
+
+
+class _CompareWriter:
+    """
+    边输出边与原文件逐块比较：内容一致时不创建任何文件，
+    第一次出现差异时才创建 output_file，并先写入已比较过的相同前缀
+    """
+
+    def __init__(self, input_file, output_file):
+        self.input_file = input_file
+        self.output_file = output_file
+        self._source = open(input_file, "rb")
+        self._matched = 0
+        self._out = None
+
+    @property
+    def changed(self) -> bool:
+        return self._out is not None
+
+    def _open_output(self):
+        self._out = open(self.output_file, "wb")
+        with open(self.input_file, "rb") as src:
+            remaining = self._matched
+            while remaining:
+                chunk = src.read(min(remaining, 1024 * 1024))
+                self._out.write(chunk)
+                remaining -= len(chunk)
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        if self._out is None:
+            if self._source.read(len(data)) == data:
+                self._matched += len(data)
+                return
+            self._open_output()
+        self._out.write(data)
+
+    def finish(self) -> bool:
+        """结束输出，返回内容是否变化（原文件在相同前缀之后还有内容也视为变化）"""
+        if self._out is None and self._source.read(1):
+            self._open_output()
+        self.close()
+        return self.changed
+
+    def close(self):
+        self._source.close()
+        if self._out is not None:
+            self._out.close()
+
+
+def format_json_stream(input_file, output_file, indent=2) -> bool:
+    """
+    流式重排 JSON 文件，输出与 json.dump(indent=indent, ensure_ascii=False) 一致
+    返回内容是否变化；已是标准格式时不创建 output_file，整个过程只读
+    内容无效时抛出 json.JSONDecodeError；对象中有重复键时抛出 DuplicateKeyError
+    """
+    writer = _CompareWriter(input_file, output_file)
+    try:
+        with open(input_file, "rb") as src:
+            write_pretty(iter_events(iter_file_chunks(src)), writer, indent)
+        return writer.finish()
+    finally:
+        writer.close()
+
 
 def format_single_json(input_file, indent=2):
     """格式化单个JSON文件，带更强的错误处理"""
@@ -17,28 +91,50 @@ def format_single_json(input_file, indent=2):
         print(f"❌ 文件无写入权限: {input_file}")
         return False
     
+    backed_up = False
+    temp_file = f"{input_file}.tmp"
     try:
+        formatted = None
+        streamed = False
+        if os.path.getsize(input_file) >= STREAM_FORMAT_THRESHOLD:
+            # 大文件逐个记号流式重排到临时文件，不构建对象树
+            try:
+                unchanged = not format_json_stream(input_file, temp_file, indent)
+                streamed = True
+            except DuplicateKeyError:
+                pass  # 重复键按 json.load 的规则处理，退回内存方式
+        if not streamed:
+            # 读取并在内存中重新序列化
+            with open(input_file, "rb") as f:
+                original = f.read()
+            formatted = format_json_bytes(original, indent)
+            unchanged = formatted == original
+
+        # 已是标准格式时不做任何写入，保持文件与 mtime 不变
+        if unchanged:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            print(f"无需格式化: {input_file}")
+            return True
+
         # 备份原文件
         backup_path = f"{input_file}.bak"
         try:
             import shutil
             shutil.copy2(input_file, backup_path)
+            backed_up = True
         except Exception:
             pass  # 备份失败不影响主流程
-        
-        # 读取JSON文件
-        with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
 
-        # 写入临时文件
-        temp_file = f"{input_file}.tmp"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=indent, sort_keys=False)
-        
-        # 验证临时文件
-        with open(temp_file, "r", encoding="utf-8") as f:
-            json.load(f)  # 验证JSON格式
-        
+        if formatted is not None:
+            # 写入临时文件
+            with open(temp_file, "wb") as f:
+                f.write(formatted)
+
+            # 验证临时文件
+            with open(temp_file, "rb") as f:
+                jsonCodec.load(f)  # 验证JSON格式
+
         # 原子性替换
         os.replace(temp_file, input_file)
         
@@ -54,9 +150,14 @@ def format_single_json(input_file, indent=2):
 
     except json.JSONDecodeError as e:
         print(f"❌ 无效JSON格式: {input_file} - {e}")
-        # 尝试从备份恢复
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except:
+                pass
+        # 尝试从本次创建的备份恢复
         backup_path = f"{input_file}.bak"
-        if os.path.exists(backup_path):
+        if backed_up and os.path.exists(backup_path):
             try:
                 import shutil
                 shutil.copy2(backup_path, input_file)
@@ -67,7 +168,6 @@ def format_single_json(input_file, indent=2):
     except Exception as e:
         print(f"❌ 处理失败 {input_file}: {str(e)}")
         # 清理临时文件
-        temp_file = f"{input_file}.tmp"
         if os.path.exists(temp_file):
             try:
                 os.remove(temp_file)
@@ -76,7 +176,175 @@ def format_single_json(input_file, indent=2):
         return False
 
 
-def batch_format_json(directory, indent=2, exclude_dirs=None):
+DEFAULT_CHUNKS_PER_WORKER = 4  # 每个进程平均分到的任务块数，块越多负载越均衡
+
+
+def _scan_json_files(directory, exclude_dirs):
+    """递归遍历目录，返回 (路径, stat 结果) 列表；无法 stat 的文件结果为 None"""
+    entries = []
+    for root, dirs, files in os.walk(directory):
+        # 排除指定目录
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        for file in files:
+            if file.lower().endswith(".json"):
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    stat = None
+                entries.append((file_path, stat))
+    return entries
+
+
+def _sort_by_size(entries):
+    json_files = [(file_path, stat.st_size if stat else 0) for file_path, stat in entries]
+    json_files.sort(key=lambda item: item[1], reverse=True)
+    return json_files
+
+
+def collect_json_files(directory, exclude_dirs=None):
+    """递归收集目录下的JSON文件，返回 (路径, 大小) 列表，按大小从大到小排序"""
+    return _sort_by_size(_scan_json_files(directory, exclude_dirs or []))
+
+
+def _index_key(directory, file_path):
+    return os.path.relpath(file_path, directory).replace(os.sep, "/")
+
+
+def _file_record(file_path, content=None):
+    """记录文件的大小、mtime_ns 与内容摘要"""
+    if content is None:
+        with open(file_path, "rb") as f:
+            content = f.read()
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def load_format_index(index_file, indent=2):
+    """读取格式化索引；文件不存在、损坏或缩进设置不同时返回空字典"""
+    if not index_file or not os.path.exists(index_file):
+        return {}
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"格式化索引无效，将重新处理全部文件: {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("indent") != indent:
+        return {}
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_format_index(index_file, entries, indent=2):
+    """保存格式化索引（临时文件 + 原子替换）"""
+    temp_file = f"{index_file}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({"indent": indent, "files": entries}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(temp_file, index_file)
+    except OSError as e:
+        print(f"保存格式化索引失败: {e}")
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except:
+                pass
+
+
+def split_into_chunks(json_files, chunk_count):
+    """
+    按字节数将已排序的文件列表切分为任务块
+    大文件单独成块并最先调度，小文件合并成块以减少进程间通信
+    """
+    if not json_files:
+        return []
+    total_bytes = sum(size for _, size in json_files)
+    target = max(1, total_bytes // max(1, chunk_count))
+    chunks = []
+    current = []
+    current_bytes = 0
+    for file_path, size in json_files:
+        current.append(file_path)
+        current_bytes += size
+        if current_bytes >= target:
+            chunks.append(current)
+            current = []
+            current_bytes = 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _format_chunk(file_paths, indent, digests=None):
+    """
+    在工作进程中格式化一组文件，返回 (成功数, 失败数, 索引记录)
+
+    digests 给出上次处理后的内容摘要：内容摘要未变（仅 mtime 变化）的文件不再解析
+    """
+    processed = 0
+    errors = 0
+    records = {}
+    for file_path in file_paths:
+        try:
+            if digests is not None and file_path in digests:
+                with open(file_path, "rb") as f:
+                    content = f.read()
+                if hashlib.sha256(content).hexdigest() == digests[file_path]:
+                    records[file_path] = _file_record(file_path, content)
+                    processed += 1
+                    continue
+            if format_single_json(file_path, indent):
+                processed += 1
+                if digests is not None:
+                    records[file_path] = _file_record(file_path)
+            else:
+                errors += 1
+        except Exception as e:
+            print(f"处理文件时发生错误 {file_path}: {e}")
+            errors += 1
+    return processed, errors, records
+
+
+def _format_parallel(json_files, indent, workers, digests=None):
+    """使用进程池并行格式化，返回 (成功数, 失败数, 索引记录)；无法创建进程池时返回 None"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = split_into_chunks(json_files, workers * DEFAULT_CHUNKS_PER_WORKER)
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"无法创建进程池，改为单进程处理: {e}")
+        return None
+
+    processed = 0
+    errors = 0
+    records = {}
+    with executor:
+        # 按提交顺序调度，最大的文件最先开始处理
+        futures = []
+        for chunk in chunks:
+            chunk_digests = None
+            if digests is not None:
+                chunk_digests = {path: digests[path] for path in chunk if path in digests}
+            futures.append((chunk, executor.submit(_format_chunk, chunk, indent, chunk_digests)))
+        for chunk, future in futures:
+            try:
+                chunk_processed, chunk_errors, chunk_records = future.result()
+            except Exception as e:
+                print(f"处理文件时发生错误 {chunk[0]} 等 {len(chunk)} 个文件: {e}")
+                chunk_processed, chunk_errors, chunk_records = 0, len(chunk), {}
+            processed += chunk_processed
+            errors += chunk_errors
+            records.update(chunk_records)
+    return processed, errors, records
+
+
+def batch_format_json(directory, indent=2, exclude_dirs=None, workers=1, index_file=None):
     """
     批量格式化目录下的所有JSON文件，带改进的错误处理
 
@@ -84,6 +352,12 @@ def batch_format_json(directory, indent=2, exclude_dirs=None):
         directory: 要处理的根目录
         indent: 缩进空格数
         exclude_dirs: 要排除的目录列表
+        workers: 并行进程数，大于 1 时按文件大小从大到小分块交给进程池处理
+        index_file: 格式化索引文件，记录每个文件处理后的大小、mtime_ns 与内容摘要；
+            提供时只处理自上次以来发生变化的文件
+
+    返回:
+        (发现的文件数, 成功数, 失败数)
     """
     if exclude_dirs is None:
         exclude_dirs = []
@@ -91,42 +365,59 @@ def batch_format_json(directory, indent=2, exclude_dirs=None):
     # 检查目录是否存在
     if not directory or not os.path.isdir(directory):
         print(f"错误: 目录 '{directory}' 不存在或不是目录")
-        return
+        return 0, 0, 0
 
     # 检查目录权限
     if not os.access(directory, os.R_OK):
         print(f"错误: 目录 '{directory}' 无读取权限")
-        return
-
-    total_files = 0
-    processed_files = 0
-    error_files = 0
+        return 0, 0, 0
 
+    entries = []
     try:
-        # 递归遍历目录
-        for root, dirs, files in os.walk(directory):
-            # 排除指定目录
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-
-            # 处理当前目录下的JSON文件
-            for file in files:
-                if file.lower().endswith(".json"):
-                    total_files += 1
-                    file_path = os.path.join(root, file)
-                    
-                    try:
-                        if format_single_json(file_path, indent):
-                            processed_files += 1
-                        else:
-                            error_files += 1
-                    except Exception as e:
-                        print(f"处理文件时发生错误 {file_path}: {e}")
-                        error_files += 1
-
+        entries = _scan_json_files(directory, exclude_dirs)
     except Exception as e:
         print(f"遍历目录时发生错误: {e}")
+    total_files = len(entries)
+
+    # 根据索引跳过大小与 mtime 都未变化的文件
+    index = load_format_index(index_file, indent) if index_file else {}
+    new_index = {}
+    digests = None
+    skipped_files = 0
+    if index_file:
+        digests = {}
+        pending = []
+        for file_path, stat in entries:
+            record = index.get(_index_key(directory, file_path))
+            if record and stat and record.get("size") == stat.st_size \
+                    and record.get("mtime_ns") == stat.st_mtime_ns:
+                new_index[_index_key(directory, file_path)] = record
+                skipped_files += 1
+                continue
+            if record and record.get("digest"):
+                digests[file_path] = record["digest"]
+            pending.append((file_path, stat))
+        entries = pending
+
+    json_files = _sort_by_size(entries)
+    result = None
+    if workers > 1 and len(json_files) > 1:
+        result = _format_parallel(json_files, indent, min(workers, len(json_files)), digests)
+    if result is None:
+        result = _format_chunk([file_path for file_path, _ in json_files], indent, digests)
+    processed_files, error_files, records = result
+    processed_files += skipped_files
+
+    if index_file:
+        for file_path, record in records.items():
+            new_index[_index_key(directory, file_path)] = record
+        if new_index != index:
+            save_format_index(index_file, new_index, indent)
 
     print(f"\n处理完成 - 共发现 {total_files} 个JSON文件，成功处理 {processed_files} 个，失败 {error_files} 个")
+    if skipped_files:
+        print(f"其中 {skipped_files} 个文件自上次处理后未变化，已跳过")
+    return total_files, processed_files, error_files
 
 
 if __name__ == "__main__":
@@ -134,6 +425,8 @@ if __name__ == "__main__":
     target_directory = "./files"
     indent_spaces = 2
     exclude_directories = [".git", "venv", "node_modules"]  # 排除不需要处理的目录
+    worker_count = os.cpu_count() or 1  # 并行进程数，设为 1 则单进程处理
+    index_path = ".format_index.json"  # 格式化索引，只重新处理自上次以来变化的文件；设为 None 则每次全部处理
 
     print(f"开始处理目录: {os.path.abspath(target_directory)}")
-    batch_format_json(target_directory, indent_spaces, exclude_directories)
+    batch_format_json(target_directory, indent_spaces, exclude_directories, worker_count, index_path)
@@ -0,0 +1,336 @@
+"""
+增量 JSON 解析：按块读取字节流并逐个产出解析事件，不构建完整的对象树。
+
+事件为 (类型, 值) 二元组，类型包括:
+    start_map / map_key / end_map / start_array / end_array /
+    string / number / boolean / null
+数值的解析方式与 json.loads 一致（整数为 int，含小数或指数为 float，支持 NaN/Infinity）。
+
+iter_pretty() / write_pretty() 将事件流重新排版，输出与 json.dumps(indent=..., ensure_ascii=False) 一致。
+"""
+
+import codecs
+import re
+from json.decoder import JSONDecodeError, scanstring
+from json.encoder import encode_basestring
+from typing import IO, Iterable, Iterator, Optional, Sequence, Tuple
+
+Event = Tuple[str, object]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?')
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+_LITERALS = (
+    ("true", "boolean", True),
+    ("false", "boolean", False),
+    ("null", "null", None),
+    ("NaN", "number", float("nan")),
+    ("Infinity", "number", float("inf")),
+    ("-Infinity", "number", float("-inf")),
+)
+
+_PRETTY_BATCH = 4096  # write_pretty 每次写入的文本片段数
+MAX_OBJECT_KEYS = 4096  # iter_pretty 检查重复键时单个对象最多记录的键数
+
+
+class DuplicateKeyError(ValueError):
+    """
+    对象中出现重复的键：json.loads 会保留最后一个值，流式重排无法得到相同结果
+    对象的键超过 MAX_OBJECT_KEYS 个、无法在有限内存内确认没有重复键时同样抛出
+    """
+
+
+# 解析状态
+_VALUE = 0          # 期望一个值
+_VALUE_OR_END = 1   # 刚进入数组，期望值或 ']'
+_KEY = 2            # 期望对象的键
+_KEY_OR_END = 3     # 刚进入对象，期望键或 '}'
+_COLON = 4          # 期望 ':'
+_COMMA = 5          # 值之后，期望 ',' 或容器结束
+_DONE = 6           # 顶层值已结束
+
+
+def iter_file_chunks(f: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """按块读取二进制文件"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_events(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Event]:
+    """
+    从字节块序列中增量解析 JSON，逐个产出事件
+    内容不完整或格式无效时抛出 json.JSONDecodeError
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    source = iter(chunks)
+    buf = ""
+    pos = 0
+    final = False
+    consumed = 0  # 已从缓冲区丢弃的字符数，用于报告错误位置
+    stack = []
+    state = _VALUE
+
+    def error(message):
+        return JSONDecodeError(message, buf, pos)
+
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+
+        need_more = pos >= len(buf)
+        if not need_more:
+            ch = buf[pos]
+            if state == _DONE:
+                raise error("Extra data")
+
+            if state == _COLON:
+                if ch != ":":
+                    raise error("Expecting ':' delimiter")
+                pos += 1
+                state = _VALUE
+                continue
+
+            if state == _COMMA:
+                if ch == ",":
+                    pos += 1
+                    state = _KEY if stack[-1] == "{" else _VALUE
+                    continue
+                if ch == ("}" if stack[-1] == "{" else "]"):
+                    pos += 1
+                    stack.pop()
+                    yield ("end_map" if ch == "}" else "end_array"), None
+                    state = _COMMA if stack else _DONE
+                    continue
+                raise error("Expecting ',' delimiter")
+
+            if state in (_KEY, _KEY_OR_END):
+                if ch == "}" and state == _KEY_OR_END:
+                    pos += 1
+                    stack.pop()
+                    yield "end_map", None
+                    state = _COMMA if stack else _DONE
+                    continue
+                if ch != '"':
+                    raise error("Expecting property name enclosed in double quotes")
+                try:
+                    key, end = scanstring(buf, pos + 1, True)
+                except JSONDecodeError:
+                    if final:
+                        raise
+                    need_more = True
+                else:
+                    pos = end
+                    yield "map_key", key
+                    state = _COLON
+                    continue
+
+            else:
+                # _VALUE / _VALUE_OR_END
+                if ch == "]" and state == _VALUE_OR_END:
+                    pos += 1
+                    stack.pop()
+                    yield "end_array", None
+                    state = _COMMA if stack else _DONE
+                    continue
+                if ch == "{":
+                    pos += 1
+                    stack.append("{")
+                    yield "start_map", None
+                    state = _KEY_OR_END
+                    continue
+                if ch == "[":
+                    pos += 1
+                    stack.append("[")
+                    yield "start_array", None
+                    state = _VALUE_OR_END
+                    continue
+                if ch == '"':
+                    try:
+                        value, end = scanstring(buf, pos + 1, True)
+                    except JSONDecodeError:
+                        if final:
+                            raise
+                        need_more = True
+                    else:
+                        pos = end
+                        yield "string", value
+                        state = _COMMA if stack else _DONE
+                        continue
+                else:
+                    match = _NUMBER.match(buf, pos)
+                    # 数字之后至少还有 3 个字符（或下一个字符不可能延续数字）才能确定数字已完整
+                    if match is not None and (final or match.end() + 2 < len(buf)
+                                              or (match.end() < len(buf)
+                                                  and buf[match.end()] not in _NUMBER_CHARS)):
+                        integer, frac, exp = match.groups()
+                        if frac or exp:
+                            value = float(integer + (frac or "") + (exp or ""))
+                        else:
+                            value = int(integer)
+                        pos = match.end()
+                        yield "number", value
+                        state = _COMMA if stack else _DONE
+                        continue
+                    for literal, kind, value in _LITERALS:
+                        if buf.startswith(literal, pos):
+                            pos += len(literal)
+                            yield kind, value
+                            state = _COMMA if stack else _DONE
+                            break
+                        if not final and literal.startswith(buf[pos:pos + len(literal)]) \
+                                and pos + len(literal) > len(buf):
+                            need_more = True
+                            break
+                    else:
+                        if match is not None and not final:
+                            need_more = True
+                        else:
+                            raise error("Expecting value")
+                    if not need_more:
+                        continue
+
+        if need_more:
+            if final:
+                if state == _DONE:
+                    return
+                raise error("Expecting value" if not stack else "Unterminated container")
+            # 丢弃已解析部分并读取下一块
+            consumed += pos
+            buf = buf[pos:]
+            pos = 0
+            chunk = next(source, None)
+            if chunk is None:
+                final = True
+                buf += decoder.decode(b"", final=True)
+            else:
+                buf += decoder.decode(chunk)
+
+
+def iter_leaves(events: Iterable[Event],
+                prefixes: Optional[Sequence[Tuple[str, ...]]] = None) -> Iterator[Tuple[Tuple[str, ...], object]]:
+    """
+    将事件流转换为 (键路径, 标量值) 序列，只处理对象嵌套（数组内的值被忽略）
+
+    prefixes 不为空时，只产出位于这些路径下的叶子，以及顶层的标量（如 version）
+    """
+    path = []
+    in_array = 0
+    key = None
+
+    def wanted(leaf_path):
+        if not prefixes or len(leaf_path) == 1:
+            return True
+        for prefix in prefixes:
+            n = len(prefix)
+            if len(leaf_path) > n and tuple(leaf_path[:n]) == prefix:
+                return True
+        return False
+
+    for kind, value in events:
+        if kind == "map_key":
+            key = value
+        elif kind == "start_map":
+            if in_array:
+                in_array += 1
+            elif key is not None:
+                path.append(key)
+                key = None
+        elif kind == "end_map":
+            if in_array:
+                in_array -= 1
+            elif path:
+                path.pop()
+        elif kind == "start_array":
+            in_array += 1
+            key = None
+        elif kind == "end_array":
+            in_array -= 1
+        elif not in_array and key is not None:
+            leaf_path = path + [key]
+            key = None
+            if wanted(leaf_path):
+                yield tuple(leaf_path), value
+
+
+def _scalar_text(kind: str, value) -> str:
+    """按 json.dumps 的规则输出标量"""
+    if kind == "string":
+        return encode_basestring(value)
+    if kind == "number":
+        if isinstance(value, int):
+            return int.__repr__(value)
+        if value != value:
+            return "NaN"
+        if value == float("inf"):
+            return "Infinity"
+        if value == float("-inf"):
+            return "-Infinity"
+        return float.__repr__(value)
+    if kind == "boolean":
+        return "true" if value else "false"
+    return "null"
+
+
+def iter_pretty(events: Iterable[Event], indent: int = 2, max_keys: int = MAX_OBJECT_KEYS) -> Iterator[str]:
+    """
+    将事件流重新排版为文本片段，拼接后与 json.dumps(obj, indent=indent, ensure_ascii=False) 一致
+    只保存当前嵌套路径上的状态（每层对象最多 max_keys 个键），内存占用与文件大小无关；
+    对象中出现重复键或键数超过 max_keys 时抛出 DuplicateKeyError
+    """
+    frames = []  # 每层容器: [是否为对象, 是否已输出成员, 已出现的键]
+    pads = ["\n"]
+
+    def newline_pad(depth):
+        while len(pads) <= depth:
+            pads.append("\n" + " " * (indent * len(pads)))
+        return pads[depth]
+
+    for kind, value in events:
+        if kind == "end_map" or kind == "end_array":
+            is_map, opened, _ = frames.pop()
+            if opened:
+                yield newline_pad(len(frames)) + ("}" if is_map else "]")
+            else:
+                yield "{}" if is_map else "[]"
+            continue
+
+        # 对象以键、数组以值开始一个新成员
+        if frames:
+            frame = frames[-1]
+            if kind == "map_key" or not frame[0]:
+                if frame[1]:
+                    yield "," + newline_pad(len(frames))
+                else:
+                    frame[1] = True
+                    yield ("{" if frame[0] else "[") + newline_pad(len(frames))
+
+        if kind == "map_key":
+            keys = frames[-1][2]
+            if value in keys:
+                raise DuplicateKeyError(f"重复的键: {value}")
+            if len(keys) >= max_keys:
+                raise DuplicateKeyError(f"对象的键超过 {max_keys} 个，无法检查重复键")
+            keys.add(value)
+            yield encode_basestring(value) + ": "
+        elif kind == "start_map":
+            frames.append([True, False, set()])
+        elif kind == "start_array":
+            frames.append([False, False, None])
+        else:
+            yield _scalar_text(kind, value)
+
+
+def write_pretty(events: Iterable[Event], out: IO[str], indent: int = 2):
+    """将重新排版的文本分批写入文本文件对象"""
+    batch = []
+    for piece in iter_pretty(events, indent):
+        batch.append(piece)
+        if len(batch) >= _PRETTY_BATCH:
+            out.write("".join(batch))
+            batch.clear()
+    if batch:
+        out.write("".join(batch))
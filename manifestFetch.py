@@ -0,0 +1,104 @@
+"""
+远程 version.json 的条件请求：保存上次的 ETag / Last-Modified 与顶层 version，
+下次请求时带上 If-None-Match / If-Modified-Since，服务器返回 304 或版本号未变时直接结束本次同步。
+"""
+
+import json
+import os
+import re
+from typing import Dict, Optional
+
+import requests
+
+from httpSession import http_get
+
+VALIDATORS_FILE = "version.meta.json"
+
+# 匹配清单开头的 "version" 字段，无需解析整个文件
+_VERSION_PREFIX = re.compile(rb'\A\s*\{\s*"version"\s*:\s*(-?\d+)\s*[,}]')
+
+
+class ManifestUnchanged(Exception):
+    """远程清单的版本号与本地一致"""
+
+
+def load_validators(path: str = VALIDATORS_FILE) -> Dict:
+    """读取上次保存的校验信息，文件不存在或无效时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"读取 {path} 失败: {e}")
+        return {}
+
+
+def save_validators(validators: Dict, path: str = VALIDATORS_FILE) -> bool:
+    """保存校验信息（内容未变化时不重写文件）"""
+    if load_validators(path) == validators:
+        return True
+    temp_file = f"{path}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(validators, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, path)
+        return True
+    except OSError as e:
+        print(f"保存 {path} 失败: {e}")
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except:
+                pass
+        return False
+
+
+def conditional_headers(validators: Dict) -> Dict[str, str]:
+    """根据保存的校验信息构造条件请求头"""
+    headers = {"Cache-Control": "no-cache"}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def fetch_manifest_response(url: str, validators: Optional[Dict] = None, retry=None,
+                            stream: bool = True, timeout: int = 10) -> Optional[requests.Response]:
+    """
+    发送条件请求获取远程 version.json
+    服务器返回 304 时返回 None；其余非 2xx 状态抛出 requests.HTTPError
+    """
+    headers = conditional_headers(validators or {})
+
+    def open_request():
+        response = http_get(url, headers=headers, stream=stream, timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    response = retry(open_request) if retry is not None else open_request()
+    if response.status_code == 304:
+        response.close()
+        return None
+    return response
+
+
+def response_validators(response: requests.Response, version=None) -> Dict:
+    """从响应头提取校验信息"""
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    if version is not None:
+        validators["version"] = version
+    return validators
+
+
+def peek_version(content: bytes) -> Optional[int]:
+    """读取清单开头的 version 字段，不在开头时返回 None"""
+    match = _VERSION_PREFIX.match(content[:256])
+    return int(match.group(1)) if match else None
@@ -0,0 +1,233 @@
+"""
+配置文件的 Merkle 摘要树：每个对象、数组和记录都保存子树摘要，比较两个版本时只进入摘要不同的子树。
+
+树的结构与 recordDiff 的记录模型一致：
+- 元素全部为对象的数组是记录数组，有唯一的 ID / id / Id 字段时按键对齐（"r" 为键字段），
+  否则按摘要做多重集合比较（"r" 为 ""）；记录数组的摘要与元素顺序无关
+- 记录只保存逐字段摘要（字段值为对象或数组时整体摘要），不再向下展开
+- 记录数组之外的对象按键、普通数组按下标展开（"c" 分别为对象与列表），标量直接保存摘要字符串
+
+每个同步文件的树以 JSON 保存在 INDEX_DIR 下（与文件的相对路径相同），
+并记录文件的大小、修改时间与 SHA-256：文件在索引之外被修改时索引失效，改为从文件重新计算。
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import jsonCodec
+
+INDEX_DIR = ".merkle_index"
+INDEX_FORMAT = 2  # 摘要算法变化时递增，旧格式的索引视为失效
+KEY_FIELDS = ("ID", "id", "Id")  # 按顺序选择第一个在所有记录中都存在且取值唯一的字段
+
+_SCALARS = (str, int, float, bool, type(None))
+
+Node = Union[str, Dict[str, Any]]
+
+
+def _hex(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _canonical(value: Any) -> bytes:
+    """
+    值的规范表示：标量用 repr（区分 1、1.0 与 True），容器用键排序的紧凑 JSON
+    固定使用标准库序列化，摘要不随 jsonCodec 的后端变化（orjson 会把 NaN 写成 null）
+    """
+    if type(value) in _SCALARS:
+        return repr(value).encode("utf-8")
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+                      allow_nan=True).encode("utf-8")
+
+
+def node_hash(node: Node) -> str:
+    return node if isinstance(node, str) else node["h"]
+
+
+def record_key_field(records: Iterable[Dict]) -> Optional[str]:
+    """记录数组的键字段：第一个在所有记录中都存在、为标量且取值唯一的字段"""
+    records = list(records)
+    for field in KEY_FIELDS:
+        seen = set()
+        for record in records:
+            value = record.get(field)
+            if value is None or type(value) not in _SCALARS or str(value) in seen:
+                break
+            seen.add(str(value))
+        else:
+            return field
+    return None
+
+
+def _record_node(record: Dict, key_field: Optional[str]) -> Dict[str, Any]:
+    fields = {str(name): _hex(_canonical(value)) for name, value in record.items()}
+    node = {"h": _hex("\0".join(f"{name}:{digest}" for name, digest in sorted(fields.items())).encode("utf-8")),
+            "c": fields}
+    if key_field is not None:
+        node["k"] = record[key_field]
+    return node
+
+
+def build_tree(value: Any) -> Node:
+    """计算文档的摘要树"""
+    if isinstance(value, dict):
+        children = {str(name): build_tree(child) for name, child in value.items()}
+        digest = _hex(("{" + "\0".join(f"{name}:{node_hash(child)}"
+                                       for name, child in sorted(children.items()))).encode("utf-8"))
+        return {"h": digest, "c": children}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            key_field = record_key_field(value)
+            records = [_record_node(record, key_field) for record in value]
+            digest = _hex(("R" + "".join(sorted(node["h"] for node in records))).encode("utf-8"))
+            if key_field is None:
+                return {"h": digest, "r": "", "c": [node["h"] for node in records]}
+            return {"h": digest, "r": key_field, "c": {str(node["k"]): node for node in records}}
+        children = [build_tree(child) for child in value]
+        digest = _hex(("[" + "".join(node_hash(child) for child in children)).encode("utf-8"))
+        return {"h": digest, "c": children}
+    return _hex(_canonical(value))
+
+
+def _record_digests(node: Dict[str, Any]) -> Dict[str, int]:
+    """记录数组中每个摘要出现的次数"""
+    counts: Dict[str, int] = {}
+    digests = node["c"] if node["r"] == "" else (record["h"] for record in node["c"].values())
+    for digest in digests:
+        counts[digest] = counts.get(digest, 0) + 1
+    return counts
+
+
+def _diff_records(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict]:
+    if old["r"] and old["r"] == new["r"]:
+        old_records, new_records = old["c"], new["c"]
+        added = [record["k"] for key, record in new_records.items() if key not in old_records]
+        removed = [record["k"] for key, record in old_records.items() if key not in new_records]
+        changed = {}
+        for key, record in new_records.items():
+            previous = old_records.get(key)
+            if previous is not None and previous["h"] != record["h"]:
+                fields, old_fields = record["c"], previous["c"]
+                changed[key] = sorted(name for name in set(fields) | set(old_fields)
+                                      if fields.get(name) != old_fields.get(name))
+        return {"key": new["r"], "added": added, "removed": removed, "changed": changed}
+
+    # 没有可用的键字段（或新旧版本选择的键字段不同）时按摘要计数比较
+    old_counts, new_counts = _record_digests(old), _record_digests(new)
+    added = sum(max(0, count - old_counts.get(digest, 0)) for digest, count in new_counts.items())
+    removed = sum(max(0, count - new_counts.get(digest, 0)) for digest, count in old_counts.items())
+    if not added and not removed:
+        return None
+    return {"key": None, "added": added, "removed": removed}
+
+
+def diff_trees(old: Node, new: Node) -> Tuple[Dict[str, Dict], bool]:
+    """
+    比较两棵摘要树，只进入摘要不同的子树
+    返回 ({记录数组路径: 变化}, 记录数组之外的内容是否变化)
+    """
+    records: Dict[str, Dict] = {}
+    other_changed = False
+    stack = [("", old, new)]
+    while stack:
+        path, old_node, new_node = stack.pop()
+        if node_hash(old_node) == node_hash(new_node):
+            continue
+        if isinstance(old_node, dict) and isinstance(new_node, dict) \
+                and ("r" in old_node) == ("r" in new_node):
+            if "r" in new_node:
+                change = _diff_records(old_node, new_node)
+                if change is not None:
+                    records[path] = change
+                continue
+            old_children, new_children = old_node["c"], new_node["c"]
+            if isinstance(old_children, list) and isinstance(new_children, list):
+                if len(old_children) != len(new_children):
+                    other_changed = True
+                for i, (old_child, new_child) in enumerate(zip(old_children, new_children)):
+                    stack.append((f"{path}[{i}]", old_child, new_child))
+                continue
+            if isinstance(old_children, dict) and isinstance(new_children, dict):
+                if old_children.keys() != new_children.keys():
+                    other_changed = True
+                for name, child in new_children.items():
+                    if name in old_children:
+                        stack.append((f"{path}.{name}" if path else name, old_children[name], child))
+                continue
+        # 类型变化或标量变化
+        other_changed = True
+    return dict(sorted(records.items())), other_changed
+
+
+def _file_stat(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MerkleIndex:
+    """按文件保存的摘要树（线程安全：每个文件单独读写一个索引文件）"""
+
+    def __init__(self, directory: str = INDEX_DIR):
+        self.directory = directory
+
+    def _index_path(self, local_path: str) -> str:
+        return os.path.join(self.directory, *local_path.replace("\\", "/").split("/"))
+
+    def load(self, local_path: str) -> Optional[Node]:
+        """读取文件当前内容对应的摘要树；索引不存在或与文件不一致时返回 None"""
+        index_path = self._index_path(local_path)
+        if not os.path.isfile(index_path) or not os.path.isfile(local_path):
+            return None
+        try:
+            with open(index_path, "rb") as f:
+                entry = jsonCodec.load(f)
+            if entry.get("format") != INDEX_FORMAT:
+                return None
+            size, mtime_ns = _file_stat(local_path)
+            if entry["size"] != size:
+                return None
+            if entry["mtime_ns"] != mtime_ns and entry["sha256"] != _file_sha256(local_path):
+                return None
+            return entry["tree"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def tree_for_file(self, local_path: str) -> Node:
+        """读取已保存的摘要树，失效时从文件内容重新计算"""
+        tree = self.load(local_path)
+        if tree is None:
+            with open(local_path, "rb") as f:
+                tree = build_tree(jsonCodec.load(f))
+        return tree
+
+    def save(self, local_path: str, tree: Node):
+        """文件写盘后调用，保存其摘要树"""
+        index_path = self._index_path(local_path)
+        try:
+            size, mtime_ns = _file_stat(local_path)
+            entry = {"format": INDEX_FORMAT, "size": size, "mtime_ns": mtime_ns, "sha256": _file_sha256(local_path), "tree": tree}
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp_path = f"{index_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"保存摘要索引失败 {local_path}: {e}")
+
+    def remove(self, local_path: str):
+        index_path = self._index_path(local_path)
+        if os.path.exists(index_path):
+            try:
+                os.remove(index_path)
+            except OSError as e:
+                print(f"删除摘要索引失败 {local_path}: {e}")
@@ -0,0 +1,390 @@
+"""
+同步数据的只读 HTTP 查询服务：下游按文件与 JSON Pointer / ID 读取单条记录，不必各自解析整个配置文件。
+
+- URL 与本地路径一致：GET /files/resource/config/xml/petbook.json 返回整个文档
+- ?pointer=/root/PetCollect/Branch/0 返回 JSON Pointer（RFC 6901）指向的值
+- ?id=3539 返回记录数组中 ID / id / Id 等于该值的记录（?key= 指定字段，可与 pointer 组合限定范围）
+- GET /stats 返回缓存统计
+
+解析后的文档保存在 LRU 缓存中，按文件大小与已生成的 ID 映射的估算大小计量；每次请求先比较文件的大小与修改时间，
+同步替换文件后下一次请求即重新加载。响应带有按文件内容与查询参数计算的 ETag，支持 If-None-Match。
+服务同时跟随同步脚本的变更事件队列（changeEvents），收到事件即丢弃对应文件的缓存；
+也可把同步脚本的 EVENTS_WEBHOOK_URL 设为 POST /events 直接推送。
+
+用法:
+    python queryServer.py [--host 127.0.0.1] [--port 8766] [--root .] [--cache-mb 256] [--events-file 路径]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import jsonCodec
+from changeEvents import EVENTS_FILE, EventReader
+from merkleIndex import KEY_FIELDS
+
+QUERY_HOST = "127.0.0.1"
+QUERY_PORT = 8766
+SERVE_ROOTS = ["files/resource/config"]  # 只提供这些目录下的 JSON 文件
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # 缓存文档的文件大小与 ID 映射大小总和上限
+EVENT_POLL_INTERVAL = 1.0  # 检查变更事件队列的间隔（秒）
+
+_SCALARS = (str, int, float, bool)
+
+
+def _escape_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def resolve_pointer(document: Any, pointer: str) -> Any:
+    """按 JSON Pointer 取值，路径不存在时抛出 KeyError"""
+    if pointer == "":
+        return document
+    if not pointer.startswith("/"):
+        raise KeyError(pointer)
+    value = document
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            raise KeyError(pointer)
+    return value
+
+
+def build_id_map(document: Any, field: str) -> Dict[str, List[str]]:
+    """元素全部为对象的数组中，字段 field 取值（字符串形式）到记录 JSON Pointer 的映射"""
+    ids: Dict[str, List[str]] = {}
+    stack = [("", document)]
+    while stack:
+        pointer, value = stack.pop()
+        if isinstance(value, dict):
+            children = [(f"{pointer}/{_escape_token(str(name))}", child) for name, child in value.items()]
+        elif isinstance(value, list):
+            children = [(f"{pointer}/{i}", item) for i, item in enumerate(value)]
+            if value and all(isinstance(item, dict) for item in value):
+                for child_pointer, record in children:
+                    if isinstance(record.get(field), _SCALARS):
+                        ids.setdefault(str(record[field]), []).append(child_pointer)
+        else:
+            continue
+        stack.extend(reversed(children))
+    return ids
+
+
+def _id_map_bytes(ids: Dict[str, List[str]]) -> int:
+    """ID 映射占用内存的估算值"""
+    total = sys.getsizeof(ids)
+    for value, pointers in ids.items():
+        total += sys.getsizeof(value) + sys.getsizeof(pointers) + sum(sys.getsizeof(p) for p in pointers)
+    return total
+
+
+def _selector_etag(etag: str, pointer: str, ident: Optional[str], key: Optional[str]) -> str:
+    """按文档 ETag 与查询参数计算子资源的 ETag，不带查询参数时即为文档 ETag"""
+    if not pointer and ident is None:
+        return etag
+    selector = "\0".join((etag, pointer, ident or "", key or ""))
+    return '"' + hashlib.blake2b(selector.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较）"""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class CachedDocument:
+    """
+    缓存中的一个已解析文档，按字段构建的 ID 映射在首次查询时生成
+    生成 ID 映射后以其估算大小调用 on_grow，由缓存计入容量
+    """
+
+    def __init__(self, path: str, size: int, mtime_ns: int, etag: str, data: Any,
+                 on_grow: Optional[Callable[["CachedDocument", int], None]] = None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.etag = etag
+        self.data = data
+        self.cost = size  # 计入缓存容量的字节数，由 DocumentCache 维护
+        self._on_grow = on_grow
+        self._ids: Dict[str, Dict[str, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def find(self, field: str, value: str) -> List[str]:
+        """返回字段 field 等于 value 的记录的 JSON Pointer 列表"""
+        with self._lock:
+            ids = self._ids.get(field)
+        if ids is None:
+            ids = build_id_map(self.data, field)
+            with self._lock:
+                added = field not in self._ids
+                ids = self._ids.setdefault(field, ids)
+            if added and self._on_grow is not None:
+                self._on_grow(self, _id_map_bytes(ids))
+        return ids.get(value, [])
+
+
+class DocumentCache:
+    """线程安全的 LRU 文档缓存，以文件大小加上 ID 映射的估算大小计量容量"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0  # 文件被替换后重新加载的次数
+        self.invalidations = 0  # 收到变更事件后丢弃的文档数
+        self._entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def get(self, path: str) -> CachedDocument:
+        """读取文档，文件大小或修改时间变化时重新加载；文件不存在或无法解析时抛出 OSError / ValueError"""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry
+                self._remove(path)
+                self.reloads += 1
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            # 以打开的文件为准：读取期间文件被替换时，记录的大小与修改时间仍与内容一致
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        etag = '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+        entry = CachedDocument(path, stat.st_size, stat.st_mtime_ns, etag, jsonCodec.loads(content), self._grow)
+
+        with self._lock:
+            if entry.cost <= self.max_bytes:
+                self._remove(path)
+                self._entries[path] = entry
+                self._total += entry.cost
+                self._evict()
+        return entry
+
+    def _grow(self, entry: CachedDocument, size: int):
+        """文档生成 ID 映射后计入容量，超出上限时淘汰最久未使用的文档"""
+        with self._lock:
+            entry.cost += size
+            if self._entries.get(entry.path) is entry:
+                self._total += size
+                self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, path: str):
+        """丢弃文件的缓存"""
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+                self.invalidations += 1
+
+    def _remove(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._total -= entry.cost
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "invalidations": self.invalidations,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "QueryServer"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        relative = unquote(parts.path).strip("/")
+        if relative == "stats":
+            self._send_json(200, self.server.cache.stats())
+            return
+
+        path = self.server.resolve(relative)
+        if path is None:
+            self._send_json(404, {"error": f"文件不存在: {relative}"})
+            return
+        try:
+            document = self.server.cache.get(path)
+        except FileNotFoundError:
+            self._send_json(404, {"error": f"文件不存在: {relative}"})
+            return
+        except (OSError, ValueError) as e:
+            self._send_json(500, {"error": f"读取文件失败: {e}"})
+            return
+
+        pointer = params.get("pointer", "")
+        try:
+            value = resolve_pointer(document.data, pointer)
+        except KeyError:
+            self._send_json(404, {"error": f"路径不存在: {pointer}"})
+            return
+
+        ident = params.get("id")
+        if ident is not None:
+            fields = [params["key"]] if "key" in params else list(KEY_FIELDS)
+            pointers = [p for field in fields for p in document.find(field, ident)
+                        if not pointer or p.startswith(pointer + "/")]
+            if not pointers:
+                self._send_json(404, {"error": f"记录不存在: {ident}"})
+                return
+            value = {
+                "file": relative,
+                "id": ident,
+                "records": [{"pointer": p, "record": resolve_pointer(document.data, p)} for p in pointers],
+            }
+
+        # 先确认子资源存在，再按文档与查询参数比较 ETag
+        etag = _selector_etag(document.etag, pointer, ident, params.get("key"))
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(200, value, etag)
+
+    def do_POST(self):
+        """接收同步脚本推送的变更事件：{"events": [{"path": ...}, ...]}"""
+        if urlsplit(self.path).path.strip("/") != "events":
+            self._send_json(404, {"error": "仅支持 POST /events"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            events = jsonCodec.loads(self.rfile.read(length))["events"]
+            paths = [event["path"] for event in events]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"无效的事件: {e}"})
+            return
+        self.server.apply_events(paths)
+        self._send_json(200, {"received": len(paths)})
+
+    def _send_json(self, code: int, value: Any, etag: Optional[str] = None):
+        body = jsonCodec.dumps_bytes(value)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QueryServer(ThreadingHTTPServer):
+    """只读查询服务，root 为同步脚本的工作目录"""
+
+    daemon_threads = True
+
+    def __init__(self, root: str = ".", host: str = QUERY_HOST, port: int = QUERY_PORT,
+                 max_bytes: int = CACHE_MAX_BYTES, serve_roots: Sequence[str] = SERVE_ROOTS):
+        super().__init__((host, port), _Handler)
+        self.root = os.path.abspath(root)
+        self.serve_roots = [os.path.join(self.root, *path.split("/")) for path in serve_roots]
+        self.cache = DocumentCache(max_bytes)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_events = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve(self, relative: str) -> Optional[str]:
+        """URL 路径对应的本地文件，不在 serve_roots 下或不是 JSON 文件时返回 None"""
+        path = os.path.normpath(os.path.join(self.root, *relative.split("/")))
+        if not path.lower().endswith(".json"):
+            return None
+        if not any(path.startswith(root + os.sep) for root in self.serve_roots):
+            return None
+        return path
+
+    def apply_events(self, paths: Sequence[str]):
+        """丢弃变更事件中的文件（同步脚本工作目录下的逻辑路径）的缓存"""
+        for path in paths:
+            self.cache.invalidate(os.path.normpath(os.path.join(self.root, *path.split("/"))))
+
+    def follow_events(self, events_file: str, interval: float = EVENT_POLL_INTERVAL):
+        """在后台线程中跟随变更事件队列"""
+        reader = EventReader(events_file)
+
+        def run():
+            while not self._stop_events.wait(interval):
+                events = reader.poll()
+                if events:
+                    self.apply_events([event["path"] for event in events if "path" in event])
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def start(self) -> "QueryServer":
+        """在后台线程中运行"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_events.set()
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步数据的只读查询服务")
+    parser.add_argument("--host", default=QUERY_HOST)
+    parser.add_argument("--port", type=int, default=QUERY_PORT)
+    parser.add_argument("--root", default=".", help="同步脚本的工作目录（包含 files/）")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_MAX_BYTES / 1024 / 1024,
+                        help="文档缓存上限（按文件大小计，MB）")
+    parser.add_argument("--events-file", help=f"跟随的变更事件队列（默认 <root>/{EVENTS_FILE}，空字符串表示不跟随）")
+    args = parser.parse_args()
+
+    server = QueryServer(args.root, args.host, args.port, int(args.cache_mb * 1024 * 1024))
+    events_file = os.path.join(args.root, EVENTS_FILE) if args.events_file is None else args.events_file
+    if events_file:
+        server.follow_events(events_file)
+    print(f"查询服务已启动: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+按记录比较新旧配置文件，生成紧凑的变更记录（changelog）。
+
+配置文件中的"记录数组"指元素全部为对象的数组（如 root.Monster、root.PetCollect.Branch.Collect），
+有唯一的 ID / id / Id 字段时按该字段对齐，否则按内容摘要做多重集合比较；
+记录数组之外的其余内容只报告是否变化。
+
+比较基于 merkleIndex 的摘要树：旧版本的树从索引读取（索引失效时从旧文件计算），
+两棵树只在摘要不同的子树中向下比较，分析耗时与改动量成正比。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonCodec
+from merkleIndex import MerkleIndex, Node, build_tree, diff_trees
+
+CHANGELOG_DIR = "changelog"
+
+# compare 的返回值：(变更条目，内容相同时为 None；新内容的摘要树，无法计算时为 None)
+FileChange = Tuple[Optional[Dict], Optional[Node]]
+
+
+def compare_trees(old_tree: Node, new_tree: Node) -> Optional[Dict]:
+    """
+    比较两个版本的摘要树，返回变更摘要；内容在语义上相同时返回 None
+    {"status": "modified", "records": {数组路径: {...}}, "other_changed": bool}
+    """
+    records, other_changed = diff_trees(old_tree, new_tree)
+    if not records and not other_changed:
+        return None
+    return {"status": "modified", "records": records, "other_changed": other_changed}
+
+
+def compare_json(old_path: str, new_content: bytes) -> Optional[Dict]:
+    """比较磁盘上的旧文件与新内容（不使用索引）"""
+    with open(old_path, "rb") as f:
+        old_tree = build_tree(jsonCodec.load(f))
+    return compare_trees(old_tree, build_tree(jsonCodec.loads(new_content)))
+
+
+class ChangeLog:
+    """
+    收集一次同步中各文件的变化（线程安全），同步完成后写入 CHANGELOG_DIR
+    提供 index 时读取旧版本的摘要树，并在写盘后保存新版本的摘要树
+    """
+
+    def __init__(self, index: Optional[MerkleIndex] = None):
+        self.index = index
+        self.files: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def compare(self, save_path: str, new_content: bytes) -> FileChange:
+        """
+        写盘前调用：比较即将被替换的文件与新内容，返回值在写盘成功后原样交给 add
+        新文件记为 "added"；非 JSON 文件或无法解析时只记为 "modified"
+        """
+        exists = os.path.isfile(save_path)
+        if not save_path.lower().endswith(".json"):
+            return {"status": "modified" if exists else "added"}, None
+        try:
+            new_tree = build_tree(jsonCodec.loads(new_content))
+        except ValueError as e:
+            print(f"计算摘要树失败 {save_path}: {e}")
+            return {"status": "modified" if exists else "added"}, None
+        if not exists:
+            return {"status": "added"}, new_tree
+        try:
+            if self.index is not None:
+                old_tree = self.index.tree_for_file(save_path)
+            else:
+                with open(save_path, "rb") as f:
+                    old_tree = build_tree(jsonCodec.load(f))
+        except (OSError, ValueError) as e:
+            print(f"按记录比较失败 {save_path}: {e}")
+            return {"status": "modified"}, new_tree
+        return compare_trees(old_tree, new_tree), new_tree
+
+    def add(self, local_path: str, change: FileChange):
+        """文件写盘成功后调用：记录变化并保存新的摘要树"""
+        entry, tree = change
+        if tree is not None and self.index is not None:
+            self.index.save(local_path, tree)
+        if entry is not None:
+            with self._lock:
+                self.files[local_path] = entry
+
+    def add_removed(self, local_paths: List[str]):
+        with self._lock:
+            for path in local_paths:
+                self.files[path] = {"status": "removed"}
+        if self.index is not None:
+            for path in local_paths:
+                self.index.remove(path)
+
+    def write(self, directory: str = CHANGELOG_DIR, version: Any = None) -> Optional[str]:
+        """写入 directory/<时间>[_v<版本>].json，没有变化时不写入；返回文件路径"""
+        if not self.files:
+            return None
+        name = time.strftime("%Y%m%d-%H%M%S")
+        if version is not None:
+            name += f"_v{version}"
+        path = os.path.join(directory, f"{name}.json")
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(directory, f"{name}-{suffix}.json")
+        report = {
+            "version": version,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "files": dict(sorted(self.files.items())),
+        }
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            return path
+        except OSError as e:
+            print(f"保存变更记录失败: {e}")
+            return None
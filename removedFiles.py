@@ -0,0 +1,71 @@
+"""
+清理远程清单中已删除的文件：直接删除，或移动到归档目录保留原有的目录结构。
+同时可以找出目标目录中存在、但不在清单里的遗留文件。
+"""
+
+import os
+import shutil
+from typing import Iterable, List, Optional, Sequence, Set
+
+ARCHIVE_DIR = "removed_files"
+PRUNE_ACTIONS = ("keep", "delete", "archive")
+
+
+def find_orphans(known_paths: Set[str], roots: Iterable[str],
+                 suffixes: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    返回 roots 目录下不在 known_paths 中的文件（以 "/" 分隔的相对路径）
+    suffixes 不为空时只检查这些扩展名的文件
+    """
+    suffixes = tuple(s.lower() for s in suffixes) if suffixes else None
+    orphans = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, files in os.walk(root):
+            for file in files:
+                if suffixes and not file.lower().endswith(suffixes):
+                    continue
+                path = os.path.join(dirpath, file).replace(os.sep, "/")
+                if path not in known_paths:
+                    orphans.append(path)
+    orphans.sort()
+    return orphans
+
+
+def prune_files(paths: Iterable[str], action: str = "delete", archive_dir: str = ARCHIVE_DIR,
+                dry_run: bool = False) -> List[str]:
+    """
+    按 action 处理文件："delete" 删除，"archive" 移动到 archive_dir，"keep" 不做处理
+    dry_run 为 True 时只列出将要处理的文件；返回已处理（或将要处理）的文件列表
+    """
+    if action not in PRUNE_ACTIONS:
+        raise ValueError(f"未知的清理方式: {action}")
+    if action == "keep":
+        return []
+
+    pruned = []
+    for path in paths:
+        # 只处理工作目录内的相对路径
+        if os.path.isabs(path) or ".." in path.replace("\\", "/").split("/"):
+            print(f"跳过不安全的路径: {path}")
+            continue
+        if not os.path.isfile(path):
+            continue
+        target = os.path.join(archive_dir, path) if action == "archive" else None
+        if dry_run:
+            print(f"[试运行] 将{'归档' if target else '删除'}: {path}")
+            pruned.append(path)
+            continue
+        try:
+            if target:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+                print(f"已归档: {path} -> {target}")
+            else:
+                os.remove(path)
+                print(f"已删除: {path}")
+            pruned.append(path)
+        except OSError as e:
+            print(f"清理文件失败 {path}: {e}")
+    return pruned
@@ -0,0 +1,216 @@
+"""
+非阻塞的下载重试调度。
+
+下载失败的文件不在工作线程里 sleep，而是按带抖动的指数退避时间重新排队，等待期间其他文件继续下载：
+- 全局重试预算：整次同步最多重试 budget 次，用完后再失败的文件直接记为失败
+- 按主机熔断：同一主机连续失败 failure_threshold 次后熔断 cooldown 秒，期间该主机的文件暂缓派发；
+  冷却结束后只放行一个探测请求，成功则恢复，失败则再次熔断（冷却时间加倍）。
+  连续熔断超过 max_trips 次视为主机不可用，该主机剩余的文件直接失败
+
+调度器的状态只在派发循环（单个线程或事件循环）中修改；attempt 在工作线程中执行，不访问状态。
+"""
+
+import heapq
+import itertools
+import random
+import time
+from typing import Dict, Hashable, List, Optional
+
+import requests
+
+# 默认配置
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_DELAY = 1.0  # 秒
+DEFAULT_BACKOFF = 2.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_BUDGET = 60  # 整次同步的重试总数上限
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 5.0  # 秒
+DEFAULT_MAX_COOLDOWN = 60.0
+DEFAULT_MAX_TRIPS = 3
+PROBE_WAIT = 0.5  # 探测请求进行中时，同一主机的其他文件的等待间隔（秒）
+
+
+class RetryLater(Exception):
+    """单次请求失败，交给调度器稍后重试；host_failure 为 False 时不计入熔断（如 404）"""
+
+    def __init__(self, error: Exception, host_failure: bool = True):
+        super().__init__(str(error))
+        self.error = error
+        self.host_failure = host_failure
+
+
+class CircuitBreaker:
+    """单个主机的熔断状态"""
+
+    def __init__(self, failure_threshold: int, cooldown: float, max_cooldown: float, max_trips: int):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_trips = max_trips
+        self.failures = 0  # 连续失败次数
+        self.trips = 0  # 连续熔断次数
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def dead(self) -> bool:
+        return self.trips > self.max_trips
+
+    def wait_time(self, now: float) -> float:
+        """返回需要等待的秒数，0 表示可以立即发起请求（半开状态下会占用唯一的探测名额）"""
+        if not self.open_until:
+            return 0.0
+        if now < self.open_until:
+            return self.open_until - now
+        if self.probing:
+            return PROBE_WAIT
+        self.probing = True
+        return 0.0
+
+    def record_success(self):
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def record_failure(self, now: float) -> bool:
+        """记录一次失败，返回是否因此熔断"""
+        if now < self.open_until:
+            return False  # 熔断前已发出的请求陆续失败，不重复计数
+        self.failures += 1
+        if not self.probing and self.failures < self.failure_threshold:
+            return False
+        self.trips += 1
+        self.failures = 0
+        self.probing = False
+        self.open_until = now + min(self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+        return True
+
+
+class RetryScheduler:
+    """按到期时间排序的重试队列，附带全局重试预算与按主机熔断"""
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, delay: float = DEFAULT_DELAY,
+                 backoff: float = DEFAULT_BACKOFF, max_delay: float = DEFAULT_MAX_DELAY,
+                 budget: int = DEFAULT_BUDGET, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 cooldown: float = DEFAULT_COOLDOWN, max_cooldown: float = DEFAULT_MAX_COOLDOWN,
+                 max_trips: int = DEFAULT_MAX_TRIPS, seed: Optional[int] = None):
+        self.max_retries = max_retries
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.budget = budget
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_trips = max_trips
+        self.retries = 0  # 已使用的重试次数
+        self.budget_exhausted = False
+        self.circuit_trips = 0  # 熔断发生的总次数
+        self._attempts: Dict[Hashable, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        """等待重试或暂缓派发的文件数"""
+        return len(self._queue)
+
+    @staticmethod
+    def attempt(func, *args, **kwargs):
+        """单次执行，不在当前线程等待；网络错误转换为 RetryLater（可作为 download_file 的 retry 参数）"""
+        try:
+            return func(*args, **kwargs)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            # 4xx 说明主机可用，只重试文件本身，不计入熔断
+            raise RetryLater(e, host_failure=not 400 <= status < 500) from e
+        except requests.RequestException as e:
+            raise RetryLater(e) from e
+
+    def backoff_delay(self, attempt: int) -> float:
+        """第 attempt 次重试（从 0 开始）的等待时间：指数退避的一半固定、另一半随机"""
+        base = min(self.max_delay, self.delay * (self.backoff ** attempt))
+        return base / 2 + self._rng.uniform(0, base / 2)
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.cooldown, self.max_cooldown, self.max_trips)
+            self._breakers[host] = breaker
+        return breaker
+
+    def host_down(self, host: str) -> bool:
+        """主机是否已被判定为不可用"""
+        return self.breaker(host).dead
+
+    def wait_time(self, host: str) -> float:
+        """派发前调用：返回该主机需要等待的秒数，0 表示立即派发"""
+        return self.breaker(host).wait_time(time.monotonic())
+
+    def record_success(self, host: str):
+        """主机返回了响应（包括内容无效等非网络失败）"""
+        self.breaker(host).record_success()
+
+    def record_failure(self, host: str, error: RetryLater):
+        if error.host_failure:
+            breaker = self.breaker(host)
+            if breaker.record_failure(time.monotonic()):
+                self.circuit_trips += 1
+                if breaker.dead:
+                    print(f"主机 {host} 连续熔断 {breaker.trips} 次，视为不可用")
+                else:
+                    print(f"主机 {host} 连续失败，暂停请求 {breaker.open_until - time.monotonic():.1f} 秒")
+        else:
+            # 主机有响应，探测可以视为成功
+            self.record_success(host)
+
+    def retry(self, item: Hashable, host: str, error: RetryLater) -> Optional[float]:
+        """
+        记录失败并尝试重新排队，返回等待秒数；
+        重试次数或全局预算用完、主机不可用时返回 None（调用方应把文件记为失败）
+        """
+        self.record_failure(host, error)
+        attempt = self._attempts.get(item, 0)
+        if attempt >= self.max_retries or self.host_down(host):
+            self._attempts.pop(item, None)
+            return None
+        if self.retries >= self.budget:
+            if not self.budget_exhausted:
+                print(f"重试预算已用完（{self.budget} 次），之后失败的文件不再重试")
+                self.budget_exhausted = True
+            self._attempts.pop(item, None)
+            return None
+        self.retries += 1
+        self._attempts[item] = attempt + 1
+        # 主机熔断中时至少等到冷却结束
+        wait = max(self.backoff_delay(attempt), self.breaker(host).open_until - time.monotonic())
+        self._push(item, wait)
+        return wait
+
+    def park(self, item: Hashable, wait: float):
+        """主机熔断期间暂缓派发，不消耗重试次数"""
+        self._push(item, wait)
+
+    def forget(self, item: Hashable):
+        """文件已完成（成功或失败），清除其重试计数"""
+        self._attempts.pop(item, None)
+
+    def _push(self, item: Hashable, wait: float):
+        heapq.heappush(self._queue, (time.monotonic() + wait, next(self._seq), item))
+
+    def pop_ready(self) -> List[Hashable]:
+        """取出所有已到期的文件"""
+        now = time.monotonic()
+        ready = []
+        while self._queue and self._queue[0][0] <= now:
+            ready.append(heapq.heappop(self._queue)[2])
+        return ready
+
+    def next_delay(self) -> Optional[float]:
+        """距离下一个文件到期的秒数，队列为空时返回 None"""
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - time.monotonic())
@@ -0,0 +1,186 @@
+"""
+紧凑的本地状态库：以 SQLite 保存 逻辑路径 -> 带 hash 的文件名，替代带缩进的 version.json。
+
+- 按路径的主键索引查询
+- 每次同步只在一个事务中写入变化的条目，进程中途退出不会留下半写状态
+- 保存同步脚本收到的整个清单（或 TARGET_PATHS 下的子树）中所有类型的条目，与 json 后端保存的 version.json 内容一致
+- 可随时导出为可读的 version.json
+
+用法:
+    python stateStore.py export [输出文件]    导出为 version.json 格式
+    python stateStore.py import [version.json] 从 version.json 导入
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from versionManifest import DEFAULT_SUFFIXES, ManifestChange, VersionManifest
+
+STATE_DB_FILE = "version.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+
+class SqliteStateStore:
+    """基于 SQLite 的版本状态库"""
+
+    def __init__(self, db_path: str = STATE_DB_FILE):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "SqliteStateStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, path: str) -> Optional[str]:
+        """按逻辑路径查询带 hash 的文件名"""
+        row = self._conn.execute("SELECT name FROM entries WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def version(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_manifest(self, suffixes: Optional[Sequence[str]] = DEFAULT_SUFFIXES,
+                      prefixes: Optional[Sequence[Sequence[str]]] = None) -> VersionManifest:
+        """读取为 VersionManifest"""
+        rows = self._conn.execute("SELECT path, name FROM entries ORDER BY path")
+        leaves = ((path.split("/"), name) for path, name in rows)
+        manifest = VersionManifest.from_leaves(leaves, suffixes, prefixes)
+        manifest.version = self.version
+        return manifest
+
+    def apply(self, updated: Iterable[ManifestChange], removed: Iterable[ManifestChange] = (),
+              version=None):
+        """在一个事务中写入变化的条目并删除移除的条目"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (path, name) VALUES (?, ?)",
+                ((change.local_path, change.new_name) for change in updated),
+            )
+            self._conn.executemany(
+                "DELETE FROM entries WHERE path = ?",
+                ((change.local_path,) for change in removed),
+            )
+            if version is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (json.dumps(version),),
+                )
+
+    def apply_tree(self, data: Dict, prefixes: Optional[Sequence[Sequence[str]]] = None) -> Tuple[int, int]:
+        """
+        把 version.json 格式的 data 保存到状态库：prefixes 为空时替换全部条目，否则只替换这些子树下的条目，
+        其余条目保留；只写入有变化的条目，与顶层 version 在同一个事务中提交
+        返回 (写入的条目数, 删除的条目数)
+        """
+        manifest = VersionManifest.from_dict(data, suffixes=None, prefixes=prefixes)
+        new_entries = dict(manifest.items())
+        if prefixes:
+            old_entries = {}
+            for prefix in prefixes:
+                prefix = "/".join(prefix) if not isinstance(prefix, str) else prefix.strip("/")
+                # '0' 紧随 '/' 之后：按主键范围取出 prefix/ 下的全部条目
+                old_entries.update(self._conn.execute(
+                    "SELECT path, name FROM entries WHERE path >= ? AND path < ?",
+                    (prefix + "/", prefix + "0"),
+                ))
+        else:
+            old_entries = dict(self._conn.execute("SELECT path, name FROM entries"))
+        written = [(path, name) for path, name in new_entries.items() if old_entries.get(path) != name]
+        deleted = [(path,) for path in old_entries if path not in new_entries]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO entries (path, name) VALUES (?, ?)", written)
+            self._conn.executemany("DELETE FROM entries WHERE path = ?", deleted)
+            self._conn.execute("DELETE FROM meta WHERE key = 'version'")
+            if manifest.version is not None:
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', ?)",
+                    (json.dumps(manifest.version),),
+                )
+        return len(written), len(deleted)
+
+    def replace_all(self, manifest: VersionManifest):
+        """用给定清单整体替换状态库内容"""
+        with self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.executemany(
+                "INSERT INTO entries (path, name) VALUES (?, ?)",
+                manifest.items(),
+            )
+            self._conn.execute("DELETE FROM meta WHERE key = 'version'")
+            if manifest.version is not None:
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', ?)",
+                    (json.dumps(manifest.version),),
+                )
+
+    def export_json(self, output_path: str, indent: int = 2):
+        """导出为可读的 version.json（临时文件 + 原子替换）"""
+        data = self.load_manifest(suffixes=None).to_dict()
+        temp_file = f"{output_path}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+            os.replace(temp_file, output_path)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+def import_version_file(json_path: str, db_path: str = STATE_DB_FILE) -> int:
+    """从 version.json 导入状态库，返回导入的条目数"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    manifest = VersionManifest.from_dict(data, suffixes=None)
+    with SqliteStateStore(db_path) as store:
+        store.replace_all(manifest)
+    return len(manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地版本状态库工具")
+    parser.add_argument("--db", default=STATE_DB_FILE, help="状态库文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="导出为 version.json 格式")
+    export_parser.add_argument("output", nargs="?", default="version.json")
+    import_parser = sub.add_parser("import", help="从 version.json 导入")
+    import_parser.add_argument("input", nargs="?", default="version.json")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if not os.path.exists(args.db):
+            print(f"状态库不存在: {args.db}")
+            return
+        with SqliteStateStore(args.db) as store:
+            store.export_json(args.output)
+            print(f"已导出 {len(store)} 个条目到 {args.output}")
+    else:
+        count = import_version_file(args.input, args.db)
+        print(f"已从 {args.input} 导入 {count} 个条目到 {args.db}")
+
+
+if __name__ == "__main__":
+    main()
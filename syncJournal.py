@@ -0,0 +1,78 @@
+"""
+同步日志：逐行记录本次同步中已下载并写盘的文件。
+
+进程中途退出后，下一次同步读取日志，跳过已完成的文件（下载地址中的 hash 相同且本地文件存在），
+从第一个未完成的文件继续。本地版本信息保存成功后删除日志。
+"""
+
+import json
+import os
+import threading
+from typing import Set, Tuple
+
+JOURNAL_FILE = "sync.journal"
+
+JournalItem = Tuple[str, str]  # (url_path, local_path)
+
+
+class SyncJournal:
+    """线程安全的追加式同步日志"""
+
+    def __init__(self, path: str = JOURNAL_FILE):
+        self.path = path
+        self.completed: Set[JournalItem] = set()
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.completed.add((record["url"], record["path"]))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # 中途退出时最后一行可能不完整
+        except OSError as e:
+            print(f"读取同步日志失败: {e}")
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def is_done(self, item: JournalItem) -> bool:
+        """文件是否已在之前的运行中完成"""
+        url_path, local_path = item
+        return (url_path, local_path) in self.completed and os.path.isfile(local_path)
+
+    def record(self, item: JournalItem):
+        """记录一个已完成的文件，立即刷新到磁盘"""
+        url_path, local_path = item
+        line = json.dumps({"url": url_path, "path": local_path}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.completed.add((url_path, local_path))
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                print(f"写入同步日志失败: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def clear_journal(path: str = JOURNAL_FILE):
+    """本地版本信息保存成功后删除日志"""
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"删除同步日志失败: {e}")
@@ -0,0 +1,228 @@
+"""
+同步运行指标：分阶段计时、逐文件的耗时与字节数、重试次数。
+
+每次运行结束后写出一份报告：文件扩展名为 .prom 时输出 Prometheus textfile 格式
+（供 node_exporter 的 textfile collector 采集），否则输出 JSON。
+报告先写入临时文件再原子替换，采集方不会读到写了一半的内容。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+METRICS_FILE = "sync.metrics.json"
+
+# 逐文件耗时直方图的分桶（秒）
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FILE_PHASES = ("network", "format", "diff", "write")
+
+
+class FileMetrics:
+    """单个文件的下载记录，phases 为各阶段耗时（秒）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source = "network"  # "network" 或 "cache"
+        self.ok = False
+        self.bytes_downloaded = 0
+        self.bytes_written = 0
+        self.retries = 0
+        self.phases: Dict[str, float] = {}
+
+    def add_phase(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": self.path,
+            "source": self.source,
+            "ok": self.ok,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_written": self.bytes_written,
+            "retries": self.retries,
+            "seconds": {phase: round(value, 6) for phase, value in self.phases.items()},
+        }
+
+
+class SyncMetrics:
+    """线程安全的指标收集器，一次同步运行对应一个实例"""
+
+    def __init__(self, script: str = ""):
+        self.script = script
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.status = "running"
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.files: List[FileMetrics] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """统计代码块耗时，同名阶段多次出现时累加"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add(self, name: str, value: int = 1):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_retry(self):
+        """由重试函数调用：累加总重试次数，同时记入当前线程正在处理的文件"""
+        self.add("retries")
+        self._local.retries = getattr(self._local, "retries", 0) + 1
+
+    def take_thread_retries(self) -> int:
+        """返回并清零当前线程自上次调用以来的重试次数"""
+        retries = getattr(self._local, "retries", 0)
+        self._local.retries = 0
+        return retries
+
+    def record_file(self, record: FileMetrics):
+        with self._lock:
+            self.files.append(record)
+
+    def to_dict(self) -> Dict:
+        """JSON 报告内容"""
+        with self._lock:
+            files = list(self.files)
+            stages = dict(self.stages)
+            counters = dict(self.counters)
+        totals = {
+            "files": len(files),
+            "succeeded": sum(1 for f in files if f.ok),
+            "failed": sum(1 for f in files if not f.ok),
+            "from_cache": sum(1 for f in files if f.source == "cache"),
+            "bytes_downloaded": sum(f.bytes_downloaded for f in files),
+            "bytes_written": sum(f.bytes_written for f in files),
+            "seconds": {
+                phase: round(sum(f.phases.get(phase, 0.0) for f in files), 6) for phase in FILE_PHASES
+            },
+        }
+        return {
+            "script": self.script,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started_at)),
+            "duration_seconds": round(time.perf_counter() - self._start, 6),
+            "status": self.status,
+            "stages": {name: round(value, 6) for name, value in stages.items()},
+            "counters": counters,
+            "totals": totals,
+            "files": [f.to_dict() for f in files],
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus textfile 格式；逐文件数据汇总为直方图与计数，不按文件名生成标签"""
+        report = self.to_dict()
+        label = f'script="{_escape_label(self.script)}"'
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                extra = "".join(f',{key}="{_escape_label(str(val))}"' for key, val in labels)
+                lines.append(f"{name}{suffix}{{{label}{extra}}} {_format_value(value)}")
+
+        metric("seer_sync_last_run_timestamp_seconds", "gauge", "Start time of the last sync run.",
+               [("", (), round(self.started_at, 3))])
+        metric("seer_sync_duration_seconds", "gauge", "Wall time of the last sync run.",
+               [("", (), report["duration_seconds"])])
+        metric("seer_sync_success", "gauge", "1 if the last sync run finished without errors.",
+               [("", (), 1 if report["status"] in ("ok", "unchanged") else 0)])
+        metric("seer_sync_stage_seconds", "gauge", "Time spent in each stage of the last sync run.",
+               [("", (("stage", name),), value) for name, value in report["stages"].items()])
+        metric("seer_sync_events", "gauge", "Event counters (retries, cache hits, ...) of the last sync run.",
+               [("", (("event", name),), value) for name, value in sorted(report["counters"].items())])
+
+        totals = report["totals"]
+        metric("seer_sync_files", "gauge", "Files processed in the last sync run.",
+               [("", (("result", "ok"),), totals["succeeded"]),
+                ("", (("result", "failed"),), totals["failed"]),
+                ("", (("result", "cache"),), totals["from_cache"])])
+        metric("seer_sync_bytes", "gauge", "Bytes downloaded and written in the last sync run.",
+               [("", (("direction", "downloaded"),), totals["bytes_downloaded"]),
+                ("", (("direction", "written"),), totals["bytes_written"])])
+
+        with self._lock:
+            files = list(self.files)
+        samples = []
+        for phase in FILE_PHASES:
+            values = [f.phases[phase] for f in files if phase in f.phases]
+            for bound in LATENCY_BUCKETS:
+                samples.append(("_bucket", (("phase", phase), ("le", bound)),
+                                sum(1 for value in values if value <= bound)))
+            samples.append(("_bucket", (("phase", phase), ("le", "+Inf")), len(values)))
+            samples.append(("_sum", (("phase", phase),), round(sum(values), 6)))
+            samples.append(("_count", (("phase", phase),), len(values)))
+        metric("seer_sync_file_seconds", "histogram", "Per-file time spent in each download phase.", samples)
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str = METRICS_FILE) -> bool:
+        """写出报告（.prom 为 Prometheus 格式，其余为 JSON），返回是否成功"""
+        if path.endswith(".prom"):
+            content = self.to_prometheus().encode("utf-8")
+        else:
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2).encode("utf-8")
+
+        temp_path = f"{path}.tmp"
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            print(f"写入指标报告失败 {path}: {e}")
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+
+    def summary(self) -> str:
+        """一行中文摘要，用于运行结束时打印"""
+        report = self.to_dict()
+        stages = "，".join(f"{name} {value:.2f}s" for name, value in report["stages"].items())
+        retries = report["counters"].get("retries", 0)
+        return f"耗时 {report['duration_seconds']:.2f}s（{stages or '无'}），重试 {retries} 次"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+_metrics = SyncMetrics()
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> SyncMetrics:
+    """返回当前运行的指标收集器"""
+    return _metrics
+
+
+def reset_metrics(script: str = "") -> SyncMetrics:
+    """开始新的一次运行，返回新的收集器"""
+    global _metrics
+    with _metrics_lock:
+        _metrics = SyncMetrics(script)
+    return _metrics
+
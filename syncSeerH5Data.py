@@ -2,22 +2,100 @@ import requests
 import json
 import time
 import os
+import itertools
+import sqlite3
 import shutil
-from typing import List, Dict, Optional
-from jsonFormatter import format_single_json
+import argparse
+from typing import List, Dict, Optional, Tuple
+from downloadEngine import download_files
+from asyncPipeline import download_files_async
+from changeEvents import EventPublisher, change_events
+from configIndex import update_config_index
+from contentCache import ContentCache
+from httpSession import POOL_MAXSIZE, close_session, configure_session, get_connection_stats, print_connection_stats
+import jsonCodec
+from manifestFetch import (
+    ManifestUnchanged,
+    fetch_manifest_response,
+    load_validators,
+    peek_version,
+    response_validators,
+    save_validators,
+)
+from merkleIndex import MerkleIndex
+from recordDiff import ChangeLog
+from removedFiles import find_orphans, prune_files
+from retryScheduler import RetryScheduler
+from stateStore import SqliteStateStore, import_version_file
+from syncJournal import SyncJournal, clear_journal
+from syncMetrics import get_metrics, reset_metrics
+from versionManifest import (
+    ManifestChange,
+    ManifestDiff,
+    StreamingManifestDiff,
+    VersionManifest,
+    extract_subtrees,
+    merge_subtrees,
+    splice_subtrees,
+    iter_response_leaves,
+    load_manifest_file,
+    revert_changes,
+)
 
 VERSION_FILE = "version.json"
 VERSION_BACKUP_FILE = "version.json.backup"
+STATE_BACKEND = "json"  # "json": 带缩进的 version.json；"sqlite": 紧凑的 SQLite 状态库
+STATE_DB_FILE = "version.sqlite"
+VERSION_META_FILE = "version.meta.json"  # 保存远程 version.json 的 ETag / Last-Modified / version
+SYNC_JOURNAL_FILE = "sync.journal"  # 记录本次同步已完成的文件，中途退出后下次从未完成的文件继续
+METRICS_FILE = "sync.metrics.json"  # 每次运行的阶段耗时、逐文件统计与重试次数报告（扩展名为 .prom 时输出 Prometheus 格式），None 表示不输出
 BASE_DOMAIN = "http://seerh5.61.com"
+MANIFEST_SUFFIXES = (".json", ".xml")  # 需要同步的文件类型
 TARGET_PATHS = [
     ["files", "resource", "config", "json"],
     ["files", "resource", "config", "xml"],
 ]
+PERSIST_TARGET_ONLY = True  # 只处理远程清单中 TARGET_PATHS 下的子树；保存时本地 version.json 中的其他子树（如 full.py 的记录）原样保留
+STREAM_MANIFEST = True  # 流式解析远程 version.json，边解析边开始下载
+SKIP_IF_VERSION_UNCHANGED = True  # 远程顶层 version 与本地一致时跳过本次同步
+VERSION_CACHE_BUST = False  # 为 True 时在版本地址后附加时间戳（条件请求将无法命中缓存）
 
 # 重试配置
 MAX_RETRIES = 3
 RETRY_DELAY = 1  # 秒
 RETRY_BACKOFF = 2  # 指数退避倍数
+# 文件下载失败时不在线程内等待，而是按带抖动的退避时间重新排队，期间其他文件继续下载
+RETRY_BUDGET = 60  # 整次同步最多重试的次数，用完后失败的文件不再重试
+CIRCUIT_FAILURE_THRESHOLD = 5  # 同一主机连续失败该次数后暂停向其发送请求
+CIRCUIT_COOLDOWN = 5  # 暂停时长（秒），连续熔断时加倍
+
+# 并发下载配置
+DOWNLOAD_WORKERS = 8  # 下载线程数，设为 1 则按顺序下载
+MAX_CONNECTIONS_PER_HOST = 4  # 同一主机的最大并发连接数
+PIPELINE_MODE = "threads"  # "threads": 线程池下载；"async": 下载/格式化/写盘分阶段的异步流水线
+
+# 内容缓存配置：按文件名中的内容 hash 缓存下载结果，hash 已缓存的文件不再请求网络
+ENABLE_CONTENT_CACHE = True
+CONTENT_CACHE_DIR = ".seer_cache"
+CONTENT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存总大小上限，超出时淘汰最久未使用的条目
+
+# 远程清单中已删除的文件："delete" 删除；"archive" 移动到 REMOVED_ARCHIVE_DIR；"keep" 保留
+REMOVED_FILE_ACTION = "delete"
+REMOVED_ARCHIVE_DIR = "removed_files"
+PRUNE_ORPHANS = True  # 同时清理 PRUNE_ROOTS 下不在远程清单中的遗留文件
+PRUNE_ROOTS = ["/".join(path) for path in TARGET_PATHS]
+PRUNE_MAX_RATIO = 0.5  # 待清理的文件超过本地条目数的该比例时放弃清理，防止清单异常导致误删
+
+# 变更记录：写盘前按记录（ID / id / Id）比较新旧配置文件，每次同步的变化写入该目录，None 表示不生成
+CHANGELOG_DIR = "changelog"
+MERKLE_INDEX_DIR = ".merkle_index"  # 保存每个文件的子树摘要，比较时只展开摘要变化的部分；None 表示每次从旧文件计算
+
+# 配置倒排索引：同步后把本次写入或删除的配置文件的字段值更新到 SQLite 索引（python configIndex.py query 查询），None 表示不建立
+CONFIG_INDEX_FILE = "config_index.sqlite"
+
+# 变更通知：保存版本信息后把本次写入与删除的文件（逻辑路径、旧 hash、新 hash）发布给长期运行的进程
+EVENTS_FILE = "sync.events.jsonl"  # 追加式事件队列（JSON Lines），None 表示不写入
+EVENTS_WEBHOOK_URL = None  # 同时以 POST 推送事件的地址，如 "http://127.0.0.1:8766/events"（queryServer）
 
 
 def retry_with_backoff(func, *args, max_retries=MAX_RETRIES, delay=RETRY_DELAY, backoff=RETRY_BACKOFF, **kwargs):
@@ -31,10 +109,12 @@ def retry_with_backoff(func, *args, max_retries=MAX_RETRIES, delay=RETRY_DELAY,
             last_exception = e
             if attempt < max_retries:
                 wait_time = delay * (backoff ** attempt)
+                get_metrics().record_retry()
                 print(f"网络请求失败，{wait_time:.1f}秒后重试 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
                 time.sleep(wait_time)
             else:
                 print(f"网络请求重试次数已达上限: {e}")
+                get_metrics().add("retries_exhausted")
         except Exception as e:
             # 对于非网络异常，不重试
             raise e
@@ -96,8 +176,8 @@ def load_local_version() -> Dict:
         return {}
     
     try:
-        with open(VERSION_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(VERSION_FILE, "rb") as f:
+            data = jsonCodec.load(f)
             
         if not validate_json_data(data):
             print("本地 version.json 数据格式无效")
@@ -110,8 +190,8 @@ def load_local_version() -> Dict:
         # 尝试从备份恢复
         if restore_backup(VERSION_FILE):
             try:
-                with open(VERSION_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                with open(VERSION_FILE, "rb") as f:
+                    return jsonCodec.load(f)
             except:
                 pass
         return {}
@@ -133,12 +213,12 @@ def save_local_version(data: Dict) -> bool:
     try:
         # 写入临时文件
         temp_file = f"{VERSION_FILE}.tmp"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(temp_file, "wb") as f:
+            jsonCodec.dump(data, f, indent=2)
         
         # 验证写入的文件
-        with open(temp_file, "r", encoding="utf-8") as f:
-            json.load(f)  # 验证JSON格式
+        with open(temp_file, "rb") as f:
+            jsonCodec.load(f)  # 验证JSON格式
         
         # 原子性替换
         if os.path.exists(VERSION_FILE):
@@ -160,6 +240,46 @@ def save_local_version(data: Dict) -> bool:
         return False
 
 
+def save_target_subtrees(data: Dict) -> bool:
+    """
+    只把 TARGET_PATHS 下的子树与顶层 version 写入本地 version.json：直接替换原文件文本中的对应部分，
+    其余内容不解析、不重新编码；文件不存在或结构不符合预期时返回 False，由调用方完整合并后保存
+    """
+    if not validate_json_data(data) or not os.path.exists(VERSION_FILE):
+        return False
+    temp_file = f"{VERSION_FILE}.tmp"
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        spliced = splice_subtrees(text, data, TARGET_PATHS)
+        if spliced is None:
+            return False
+        with open(temp_file, "w", encoding="utf-8", newline="") as f:
+            f.write(spliced)
+
+        # 备份：以硬链接保留替换前的文件，不复制内容；文件系统不支持时退回复制
+        backup_temp = f"{VERSION_BACKUP_FILE}.tmp"
+        try:
+            if os.path.exists(backup_temp):
+                os.remove(backup_temp)
+            os.link(VERSION_FILE, backup_temp)
+            os.replace(backup_temp, VERSION_BACKUP_FILE)
+        except OSError:
+            if not backup_file(VERSION_FILE):
+                print("警告: 无法备份现有版本文件")
+
+        os.replace(temp_file, VERSION_FILE)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"替换版本文件中的子树失败: {e}")
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+        return False
+
+
 def get_nested(data: Dict, keys: List[str]) -> Dict:
     """安全获取嵌套字典数据"""
     if not isinstance(data, dict) or not keys:
@@ -184,198 +304,404 @@ def diff_json_files(old_data: Dict, new_data: Dict, base_path: str = "") -> List
     url_path: 下载路径（带hash）
     local_path: 本地保存路径（原文件名）
     """
-    changed_files = []
-    for key, new_val in new_data.items():
-        old_val = old_data.get(key)
+    old_manifest = VersionManifest.from_dict(old_data, MANIFEST_SUFFIXES, base_path=base_path)
+    new_manifest = VersionManifest.from_dict(new_data, MANIFEST_SUFFIXES, base_path=base_path)
+    return old_manifest.diff(new_manifest).download_list()
 
-        if isinstance(new_val, dict):
-            sub_path = f"{base_path}/{key}" if base_path else key
-            changed_files.extend(diff_json_files(old_val or {}, new_val, sub_path))
+
+def download_and_format(files_to_download: List[tuple], workers: int = DOWNLOAD_WORKERS,
+                        changelog: Optional[ChangeLog] = None) -> List[tuple]:
+    """
+    下载并格式化文件，带重试和验证机制；workers > 1 时并发下载，返回成功的文件列表（含上次已完成的文件）
+    提供 changelog 时记录被替换文件的逐记录变化
+    """
+    if not files_to_download:
+        return []
+
+    # 跳过上次中断的同步中已经完成的文件
+    journal = SyncJournal(SYNC_JOURNAL_FILE)
+    resumed = []
+
+    def pending_files():
+        for item in files_to_download:
+            if journal.is_done(item):
+                resumed.append(item)
+            else:
+                yield item
+
+    files = pending_files()
+    cache = ContentCache(CONTENT_CACHE_DIR, CONTENT_CACHE_MAX_BYTES) if ENABLE_CONTENT_CACHE else None
+    scheduler = RetryScheduler(MAX_RETRIES, RETRY_DELAY, RETRY_BACKOFF, budget=RETRY_BUDGET,
+                               failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN)
+    try:
+        if PIPELINE_MODE == "async":
+            succeeded, failed = download_files_async(
+                files,
+                BASE_DOMAIN,
+                fetch_workers=workers,
+                per_host=MAX_CONNECTIONS_PER_HOST,
+                cache=cache,
+                on_success=journal.record,
+                scheduler=scheduler,
+                changelog=changelog,
+            )
         else:
-            if key.lower().endswith((".json", ".xml")) and old_val != new_val:
-                url_path = f"{base_path}/{new_val}"
-                local_path = f"{base_path}/{key}"
-                changed_files.append((url_path, local_path))
-    return changed_files
+            succeeded, failed = download_files(
+                files,
+                BASE_DOMAIN,
+                workers=workers,
+                per_host=MAX_CONNECTIONS_PER_HOST,
+                cache=cache,
+                on_success=journal.record,
+                scheduler=scheduler,
+                changelog=changelog,
+            )
+    finally:
+        journal.close()
+
+    metrics = get_metrics()
+    metrics.add("files_resumed", len(resumed))
+    if resumed:
+        print(f"已跳过上次同步中完成的 {len(resumed)} 个文件")
+    print(f"下载完成: 成功 {len(succeeded)} 个，失败 {len(failed)} 个")
+    if cache is not None and (cache.hits or cache.misses):
+        print(f"内容缓存: 命中 {cache.hits} 个，未命中 {cache.misses} 个")
+        metrics.add("cache_hits", cache.hits)
+        metrics.add("cache_misses", cache.misses)
+    return resumed + succeeded
+
+
+def save_local_state(data: Dict) -> bool:
+    """保存同步后的版本信息；sqlite 后端只在一个事务中写入变化的条目（包括不参与同步的文件类型）"""
+    if STATE_BACKEND != "sqlite":
+        if PERSIST_TARGET_ONLY:
+            # version.json 与 full.py 共用，只替换 TARGET_PATHS 下的子树；
+            # 优先在原文本中替换，开销只与子树大小有关，结构变化时才解析并重写整个文件
+            if save_target_subtrees(data):
+                return True
+            data = merge_subtrees(load_local_version(), data, TARGET_PATHS)
+        return save_local_version(data)
+
+    try:
+        with SqliteStateStore(STATE_DB_FILE) as store:
+            store.apply_tree(data, TARGET_PATHS if PERSIST_TARGET_ONLY else None)
+        return True
+    except sqlite3.Error as e:
+        print(f"保存状态库失败: {e}")
+        return False
 
 
-def download_and_format(files_to_download: List[tuple]):
-    """下载并格式化文件，带重试和验证机制"""
-    if not files_to_download:
-        return
-    
-    successful_downloads = 0
-    failed_downloads = 0
-    
-    for url_path, local_path in files_to_download:
+def load_local_manifest() -> VersionManifest:
+    """流式加载本地版本清单，解析失败时退回 load_local_version（含备份恢复）"""
+    if STATE_BACKEND == "sqlite":
+        if not os.path.exists(STATE_DB_FILE) and os.path.exists(VERSION_FILE):
+            # 首次切换到状态库时从 version.json 迁移
+            import_version_file(VERSION_FILE, STATE_DB_FILE)
+        with SqliteStateStore(STATE_DB_FILE) as store:
+            return store.load_manifest(MANIFEST_SUFFIXES, TARGET_PATHS)
+
+    if os.path.exists(VERSION_FILE):
         try:
-            # 输入验证
-            if not url_path or not local_path:
-                print(f"无效的文件路径: url_path={url_path}, local_path={local_path}")
-                failed_downloads += 1
-                continue
-            
-            # URL 去掉 'files/'
-            if url_path.startswith("files/"):
-                url_path_clean = url_path[len("files/"):]
-            else:
-                url_path_clean = url_path
+            return load_manifest_file(VERSION_FILE, MANIFEST_SUFFIXES, TARGET_PATHS)
+        except (OSError, ValueError) as e:
+            print(f"流式读取本地 version.json 失败: {e}")
+    return VersionManifest.from_dict(load_local_version(), MANIFEST_SUFFIXES, prefixes=TARGET_PATHS)
+
+
+def print_removed(diff: ManifestDiff):
+    """列出远程清单中已删除的文件"""
+    if diff.removed:
+        print(f"远程已删除 {len(diff.removed)} 个文件：")
+        for change in diff.removed:
+            print("  -", change.local_path)
+
+
+def prune_local_files(local_manifest: VersionManifest, diff: Optional[ManifestDiff],
+                      dry_run: bool = False) -> List[str]:
+    """按 REMOVED_FILE_ACTION 清理远程已删除的文件以及遗留文件，返回处理的文件列表"""
+    if REMOVED_FILE_ACTION == "keep":
+        return []
+
+    targets = [change.local_path for change in diff.removed] if diff else []
+    if PRUNE_ORPHANS:
+        # 同步后的清单 = 本地清单 - 已删除 + 新增
+        known = set(path for path, _ in local_manifest.items())
+        if diff:
+            known.difference_update(targets)
+            known.update(change.local_path for change in diff.added)
+        queued = set(targets)
+        targets.extend(path for path in find_orphans(known, PRUNE_ROOTS, MANIFEST_SUFFIXES) if path not in queued)
+
+    targets = [path for path in targets if os.path.isfile(path)]
+    if not targets:
+        return []
+    if len(targets) > PRUNE_MAX_RATIO * max(1, len(local_manifest)):
+        print(f"警告: 待清理的文件过多 ({len(targets)} 个)，可能是远程清单异常，已跳过清理")
+        return []
+    return prune_files(targets, REMOVED_FILE_ACTION, REMOVED_ARCHIVE_DIR, dry_run=dry_run)
+
+
+def preview_sync(local_manifest: VersionManifest, response):
+    """试运行：只列出需要下载和清理的文件，不下载也不修改本地状态"""
+    leaves = iter_response_leaves(response, prefixes=TARGET_PATHS if PERSIST_TARGET_ONLY else None)
+    changes = StreamingManifestDiff(local_manifest, MANIFEST_SUFFIXES, prefixes=TARGET_PATHS)
+    for _ in changes.feed(leaves):
+        pass
+    diff = changes.result()
+
+    print(f"[试运行] 需要下载 {len(diff.updated)} 个文件：")
+    for change in diff.updated:
+        print("  -", change.local_path)
+    print_removed(diff)
+    pruned = prune_local_files(local_manifest, diff, dry_run=True)
+    print(f"[试运行] 共需下载 {len(diff.updated)} 个文件，清理 {len(pruned)} 个文件")
+
+
+def sync_buffered(local_manifest: VersionManifest, response, known_version=None,
+                  changelog: Optional[ChangeLog] = None) -> Tuple[object, Optional[Dict], Optional[ManifestDiff], List[ManifestChange]]:
+    """
+    读取完整的远程 version.json 后再比对和下载
+    返回 (远程版本号, 需要保存的版本数据, 差异, 下载失败的条目)，无需更新时第二、三项为 None；
+    远程版本号与 known_version 一致时抛出 ManifestUnchanged
+    """
+    # 验证响应内容
+    if not response.content:
+        raise ValueError("远程版本文件内容为空")
+
+    # 版本号未变时无需解析整个清单
+    if SKIP_IF_VERSION_UNCHANGED and known_version is not None \
+            and peek_version(response.content) == known_version:
+        raise ManifestUnchanged()
+
+    metrics = get_metrics()
+    with metrics.stage("manifest_parse"):
+        remote_version_data = jsonCodec.loads(response.content)
+    if not validate_json_data(remote_version_data):
+        raise ValueError("远程版本数据格式无效")
+    print(f"成功获取远程版本信息，包含 {len(remote_version_data)} 个条目")
+
+    # 比对差异（只比较 TARGET_PATHS 下的文件）
+    with metrics.stage("diff"):
+        remote_manifest = VersionManifest.from_dict(remote_version_data, MANIFEST_SUFFIXES, prefixes=TARGET_PATHS)
+        diff = local_manifest.diff(remote_manifest)
+        changed_files = diff.download_list()
+        if PERSIST_TARGET_ONLY:
+            # 丢弃与目标路径无关的子树，后续保存与校验只涉及目标部分
+            remote_version_data = extract_subtrees(remote_version_data, TARGET_PATHS)
+
+    if not diff:
+        print("没有需要更新的文件")
+        return remote_manifest.version, None, None, []
+
+    if changed_files:
+        print(f"需要更新 {len(changed_files)} 个文件：")
+        for _, local_path in changed_files:
+            print("  -", local_path)
+    print_removed(diff)
 
-            url = f"{BASE_DOMAIN}/{url_path_clean}"
-            
-            # 验证URL格式
-            if not url.startswith(('http://', 'https://')):
-                print(f"无效的URL格式: {url}")
-                failed_downloads += 1
-                continue
-            
-            save_path = os.path.join(*local_path.split("/"))
-            
-            # 安全创建目录
-            dir_path = os.path.dirname(save_path)
-            if not safe_make_dirs(dir_path):
-                print(f"无法创建目录: {dir_path}")
-                failed_downloads += 1
-                continue
-
-            print(f"正在下载: {url}")
-            
-            # 使用重试机制下载
-            def download_file():
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                return response
-            
-            resp = retry_with_backoff(download_file)
-            
-            # 验证内容
-            if not resp.content:
-                print(f"下载内容为空: {url}")
-                failed_downloads += 1
-                continue
-            
-            # 如果是JSON文件，验证JSON格式
-            if save_path.lower().endswith(".json"):
-                try:
-                    json.loads(resp.content.decode('utf-8'))
-                except json.JSONDecodeError as e:
-                    print(f"下载的JSON文件格式无效: {save_path}, 错误: {e}")
-                    failed_downloads += 1
-                    continue
-
-            # 写入临时文件
-            temp_path = f"{save_path}.tmp"
-            try:
-                with open(temp_path, "wb") as f:
-                    f.write(resp.content)
-                
-                # 原子性替换
-                if os.path.exists(save_path):
-                    os.replace(temp_path, save_path)
-                else:
-                    os.rename(temp_path, save_path)
-                    
-                print(f"已保存: {save_path}")
-
-                # 格式化JSON文件
-                if save_path.lower().endswith(".json"):
-                    if not format_single_json(save_path):
-                        print(f"警告: JSON格式化失败: {save_path}")
-                
-                successful_downloads += 1
-                
-            except Exception as e:
-                print(f"保存文件失败 {save_path}: {e}")
-                # 清理临时文件
-                if os.path.exists(temp_path):
-                    try:
-                        os.remove(temp_path)
-                    except:
-                        pass
-                failed_downloads += 1
+    # 下载并格式化
+    with metrics.stage("download"):
+        succeeded = set(download_and_format(changed_files, changelog=changelog))
+    failed = [change for change in diff.updated if (change.url_path, change.local_path) not in succeeded]
+    return remote_manifest.version, remote_version_data, diff, failed
 
-        except Exception as e:
-            print(f"下载或处理 {local_path} 出错: {e}")
-            failed_downloads += 1
-    
-    print(f"下载完成: 成功 {successful_downloads} 个，失败 {failed_downloads} 个")
 
+def sync_streaming(local_manifest: VersionManifest, response, known_version=None,
+                   changelog: Optional[ChangeLog] = None) -> Tuple[object, Optional[Dict], Optional[ManifestDiff], List[ManifestChange]]:
+    """
+    边接收远程 version.json 边比对，发现变化的文件立即开始下载
+    返回值与 sync_buffered 相同
+    """
+    leaves = iter_response_leaves(response, prefixes=TARGET_PATHS if PERSIST_TARGET_ONLY else None)
+    changes = StreamingManifestDiff(local_manifest, MANIFEST_SUFFIXES, prefixes=TARGET_PATHS)
 
-def main():
-    """主函数，带完整的错误处理和恢复机制"""
+    def checked_leaves():
+        # 清单的第一个字段是 version，与本地一致时立即停止解析
+        first = next(leaves, None)
+        if first is None:
+            return
+        path, value = first
+        if SKIP_IF_VERSION_UNCHANGED and path == ("version",) \
+                and known_version is not None and value == known_version:
+            leaves.close()
+            raise ManifestUnchanged()
+        yield first
+        yield from leaves
+
+    def queued_files():
+        for change in changes.feed(checked_leaves()):
+            if len(changes.updated) == 1:
+                print("需要更新的文件：")
+            print("  -", change.local_path)
+            yield change.url_path, change.local_path
+
+    metrics = get_metrics()
+    pending = queued_files()
+    with metrics.stage("manifest_parse"):
+        first = next(pending, None)
+    succeeded = set()
+    if first is not None:
+        # 下载并格式化（线程池模式下与清单解析同时进行，解析剩余部分的时间计入 download）
+        with metrics.stage("download"):
+            succeeded.update(download_and_format(itertools.chain([first], pending), changelog=changelog))
+        print(f"远程版本信息解析完成，共 {len(changes.updated)} 个文件需要更新")
+
+    with metrics.stage("diff"):
+        diff = changes.result()
+    if not diff:
+        print("没有需要更新的文件")
+        return changes.new.version, None, None, []
+    print_removed(diff)
+    failed = [change for change in diff.updated if (change.url_path, change.local_path) not in succeeded]
+    return changes.new.version, changes.new.to_dict(), diff, failed
+
+
+def main(dry_run: bool = False, metrics_file: Optional[str] = None):
+    """
+    主函数，带完整的错误处理和恢复机制；dry_run 为 True 时只列出变化，不做任何修改
+    运行结束后把指标报告写入 metrics_file（默认 METRICS_FILE）
+    """
+    metrics = reset_metrics(os.path.splitext(os.path.basename(__file__))[0])
+    configure_session(pool_maxsize=max(POOL_MAXSIZE, DOWNLOAD_WORKERS))  # 每次运行使用新的会话，连接统计从零开始
     try:
         print("开始同步 Seer H5 数据...")
         
         # 加载本地版本信息
-        local_version_data = load_local_version()
-        print(f"已加载本地版本信息，包含 {len(local_version_data)} 个条目")
-
-        # 获取远程版本信息，使用重试机制
-        version_url = f"{BASE_DOMAIN}/version/version.json?t={int(time.time())}"
+        with metrics.stage("load_local"):
+            local_manifest = load_local_manifest()
+        print(f"已加载本地版本信息，包含 {len(local_manifest)} 个文件条目")
+
+        # 获取远程版本信息，带条件请求头并使用重试机制
+        version_url = f"{BASE_DOMAIN}/version/version.json"
+        if VERSION_CACHE_BUST:
+            version_url += f"?t={int(time.time())}"
         print(f"获取版本信息: {version_url}")
-        
-        def fetch_version():
-            response = requests.get(version_url, timeout=10)
-            response.raise_for_status()
-            
-            # 验证响应内容
-            if not response.content:
-                raise ValueError("远程版本文件内容为空")
-            
-            data = response.json()
-            if not validate_json_data(data):
-                raise ValueError("远程版本数据格式无效")
-            
-            return data
-        
+
+        # 试运行时忽略条件请求，总是获取完整清单
+        validators = {} if dry_run else load_validators(VERSION_META_FILE)
+        known_version = validators.get("version", local_manifest.version)
         try:
-            remote_version_data = retry_with_backoff(fetch_version)
-            print(f"成功获取远程版本信息，包含 {len(remote_version_data)} 个条目")
+            with metrics.stage("manifest_fetch"):
+                response = fetch_manifest_response(
+                    version_url, validators, retry=retry_with_backoff, stream=STREAM_MANIFEST
+                )
         except Exception as e:
             print(f"获取远程版本失败: {e}")
+            metrics.status = "error"
             return
 
-        # 比对差异
-        changed_files = []
-        for path_keys in TARGET_PATHS:
-            if not path_keys:
-                continue
-                
-            local_target = get_nested(local_version_data, path_keys)
-            remote_target = get_nested(remote_version_data, path_keys)
-            
-            if remote_target:  # 只有当远程目标存在时才比较
-                changed_files.extend(
-                    diff_json_files(local_target, remote_target, "/".join(path_keys))
-                )
-
-        if not changed_files:
-            print("没有需要更新的文件")
+        if response is None:
+            print("远程 version.json 未变化 (304)，无需同步")
+            metrics.status = "unchanged"
             return
 
-        print(f"需要更新 {len(changed_files)} 个文件：")
-        for _, local_path in changed_files:
-            print("  -", local_path)
+        if dry_run:
+            try:
+                preview_sync(local_manifest, response)
+            finally:
+                response.close()
+            metrics.status = "dry_run"
+            return
 
-        # 下载并格式化
-        download_and_format(changed_files)
+        changelog = None
+        if CHANGELOG_DIR:
+            changelog = ChangeLog(MerkleIndex(MERKLE_INDEX_DIR) if MERKLE_INDEX_DIR else None)
+        try:
+            if STREAM_MANIFEST:
+                remote_version, remote_version_data, diff, failed = sync_streaming(
+                    local_manifest, response, known_version, changelog
+                )
+            else:
+                remote_version, remote_version_data, diff, failed = sync_buffered(
+                    local_manifest, response, known_version, changelog
+                )
+        except ManifestUnchanged:
+            print(f"远程版本号未变化 ({known_version})，无需同步")
+            remote_version, remote_version_data, diff, failed = known_version, None, None, []
+        finally:
+            response.close()
+
+        if remote_version_data is None:
+            # 本地文件与远程一致，记录校验信息供下次条件请求使用
+            save_validators(response_validators(response, remote_version), VERSION_META_FILE)
+            metrics.status = "unchanged"
+            return
 
-        # 保存最新 version.json (只有下载成功才保存)
-        if save_local_version(remote_version_data):
-            print("已更新本地 version.json")
+        # 清理远程已删除的文件
+        with metrics.stage("prune"):
+            pruned = prune_local_files(local_manifest, diff)
+            metrics.add("files_pruned", len(pruned))
+        pruned_paths = set(pruned)
+        removed = [change for change in diff.removed if change.local_path in pruned_paths]
+        orphans = sorted(pruned_paths.difference(change.local_path for change in removed))
+        if changelog is not None:
+            changelog.add_removed([change.local_path for change in removed])
+
+        # 下载失败的条目保留旧记录，版本号也不前进，下次同步时重试
+        if failed:
+            print(f"警告: {len(failed)} 个文件下载失败，本地版本信息中保留其旧记录，下次同步时重试")
+            revert_changes(remote_version_data, failed)
+            if local_manifest.version is None:
+                remote_version_data.pop("version", None)
+            else:
+                remote_version_data["version"] = local_manifest.version
+            diff = diff.without(failed)
+
+        # 保存最新版本信息 (只记录下载成功的文件)
+        with metrics.stage("save_version"):
+            saved = save_local_state(remote_version_data)
+        if saved:
+            print("已更新本地版本信息")
+            clear_journal(SYNC_JOURNAL_FILE)
+            if not failed:
+                save_validators(response_validators(response, remote_version), VERSION_META_FILE)
+            metrics.status = "partial" if failed else "ok"
+            if changelog is not None:
+                changelog_path = changelog.write(CHANGELOG_DIR, remote_version)
+                if changelog_path:
+                    print(f"变更记录已保存: {changelog_path}（{len(changelog)} 个文件）")
+            if CONFIG_INDEX_FILE:
+                with metrics.stage("index"):
+                    refreshed = update_config_index(
+                        CONFIG_INDEX_FILE, [change.local_path for change in diff.updated] + pruned
+                    )
+                if refreshed is not None:
+                    print(f"配置索引已更新: 重新索引 {refreshed[0]} 个文件，移除 {refreshed[1]} 个")
+            if EVENTS_FILE or EVENTS_WEBHOOK_URL:
+                events = EventPublisher(EVENTS_FILE, EVENTS_WEBHOOK_URL).publish(
+                    change_events(diff.updated, removed, remote_version, orphans)
+                )
+                metrics.add("events_published", len(events))
         else:
             print("警告: 更新本地版本文件失败")
+            metrics.status = "error"
 
     except requests.RequestException as e:
         print(f"网络请求错误: {e}")
         print("请检查网络连接和服务器状态")
+        metrics.status = "error"
     except json.JSONDecodeError as e:
         print(f"JSON解析错误: {e}")
         print("远程数据格式可能有问题")
+        metrics.status = "error"
     except Exception as e:
         print(f"执行出错: {e}")
         print("如果问题持续，请检查日志并重试")
+        metrics.status = "error"
+    finally:
+        for name, value in get_connection_stats().items():
+            metrics.add(f"http_{name}", value)
+        print_connection_stats()
+        close_session()
+        print(f"运行统计: {metrics.summary()}")
+        metrics_file = metrics_file or METRICS_FILE
+        if metrics_file and not dry_run:
+            metrics.write_report(metrics_file)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="同步配置数据")
+    parser.add_argument("--dry-run", action="store_true", help="只列出需要下载和清理的文件，不做任何修改")
+    parser.add_argument("--metrics-file", help=f"指标报告路径（默认 {METRICS_FILE}，以 .prom 结尾时输出 Prometheus 格式）")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run, metrics_file=args.metrics_file)
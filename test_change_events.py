@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证同步变更事件的发布与跟随
+Test script for sync change events (file queue, webhook, query server invalidation)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from changeEvents import EventPublisher, EventReader, change_events
+from httpSession import close_session, configure_session, get_connection_stats
+from queryServer import QueryServer
+from versionManifest import ManifestChange
+
+
+def change(path, old, new):
+    return ManifestChange(tuple(path.split("/")), old, new)
+
+
+def test_change_events():
+    """测试事件类型与 hash"""
+    events = change_events(
+        [change("files/json/a.json", None, "a_0123abcd.json"), change("files/json/b.json", "b_aaaaaa.json", "b_bbbbbb.json")],
+        [change("files/json/c.json", "c_cccccc.json", None)],
+        version=7,
+    )
+    assert [(e["type"], e["path"], e["old_hash"], e["new_hash"]) for e in events] == [
+        ("added", "files/json/a.json", None, "0123abcd"),
+        ("changed", "files/json/b.json", "aaaaaa", "bbbbbb"),
+        ("removed", "files/json/c.json", "cccccc", None),
+    ]
+    assert all(e["version"] == 7 for e in events)
+
+    events = change_events([], orphans=["files/json/stale.json"])
+    assert [(e["type"], e["path"], e["old_hash"]) for e in events] == [("removed", "files/json/stale.json", None)]
+
+
+def test_publish_and_follow_with_compaction():
+    """测试序号递增、只读取新事件，以及队列改写后按序号续读"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "events.jsonl")
+        publisher = EventPublisher(path, max_events=3)
+        publisher.publish(change_events([change("a.json", None, "a_111111.json")]))
+
+        reader = EventReader(path)  # 从当前末尾开始
+        assert reader.poll() == []
+        publisher.publish(change_events([change("b.json", None, "b_222222.json"),
+                                         change("c.json", None, "c_333333.json")]))
+        assert [(e["seq"], e["path"]) for e in reader.poll()] == [(2, "b.json"), (3, "c.json")]
+
+        # 写入中途退出留下的半行不会被读取
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"seq": 99')
+        assert reader.poll() == []
+
+        publisher.publish(change_events([change("d.json", None, "d_444444.json")]))
+        with open(path, "r", encoding="utf-8") as f:
+            assert [json.loads(line)["seq"] for line in f] == [2, 3, 4]
+        assert [e["path"] for e in reader.poll()] == ["d.json"]
+        assert EventReader(path, after_seq=0).poll()[0]["seq"] == 2
+
+
+def test_query_server_invalidation():
+    """测试查询服务通过 webhook 与事件队列丢弃缓存"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        local_path = "files/resource/config/json/a.json"
+        full_path = os.path.join(temp_dir, *local_path.split("/"))
+        os.makedirs(os.path.dirname(full_path))
+        with open(full_path, "w", encoding="utf-8") as f:
+            json.dump({"ID": 1}, f)
+        events_file = os.path.join(temp_dir, "sync.events.jsonl")
+
+        server = QueryServer(temp_dir, port=0).start()
+        server.follow_events(events_file, interval=0.05)
+        try:
+            server.cache.get(full_path)
+            events = change_events([change(local_path, "a_111111.json", "a_222222.json")])
+            configure_session()
+            EventPublisher(None, f"{server.base_url}/events").publish(events)
+            assert len(server.cache) == 0 and server.cache.invalidations == 1
+            assert get_connection_stats()["requests"] == 1  # 通过共享会话推送
+            close_session()
+
+            server.cache.get(full_path)
+            EventPublisher(events_file).publish(events)
+            deadline = time.time() + 5
+            while len(server.cache) and time.time() < deadline:
+                time.sleep(0.05)
+            assert len(server.cache) == 0 and server.cache.invalidations == 2
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证配置文件倒排索引
+Test script for the local config inverted index
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from configIndex import ConfigIndex, extract_records, query_values, update_config_index
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def test_extract_records():
+    """测试记录路径、数组中的标量与不建索引的值"""
+    data = {"root": {
+        "Monster": [{"ID": 7, "monID": 3539, "itemIDs": [1, 2], "boss": True},
+                    {"ID": 8, "monID": 12, "desc": "x" * 500}],
+        "Reward": [{"item": 5}, {"item": 5}],
+        "name": "测试",
+        "empty": None,
+    }}
+    records = dict(extract_records(data))
+    assert records["root"] == [("name", "测试")]
+    assert records["root.Monster[ID=7]"] == [("ID", 7), ("monID", 3539), ("itemIDs", 1), ("itemIDs", 2), ("boss", 1)]
+    assert records["root.Monster[ID=8]"] == [("ID", 8), ("monID", 12)]
+    assert records["root.Reward[1]"] == [("item", 5)]
+
+
+def test_query_values():
+    assert query_values("3539") == [3539, "3539"]
+    assert query_values("1.5") == [1.5, "1.5"]
+    assert query_values("abc") == ["abc"]
+
+
+def test_incremental_update_and_lookup():
+    """测试查询、未变化文件的跳过、变化文件的重新索引与删除"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        a_path = os.path.join(temp_dir, "json", "a.json").replace("\\", "/")
+        b_path = os.path.join(temp_dir, "xml", "b.json").replace("\\", "/")
+        write_json(a_path, {"root": {"Monster": [{"ID": 1, "monID": 3539}, {"ID": 2, "monID": 10}]}})
+        write_json(b_path, {"root": {"Pet": [{"id": 4, "monID": "3539"}]}})
+
+        with ConfigIndex(os.path.join(temp_dir, "index.sqlite")) as index:
+            assert index.scan([os.path.join(temp_dir, "json"), os.path.join(temp_dir, "xml")]) == (2, 0)
+            assert index.lookup("monID", 3539) == [(a_path, "root.Monster[ID=1]")]
+            assert index.files_for("monID", *query_values("3539")) == {a_path: 1, b_path: 1}
+
+            # 内容不变（即使修改时间变化）时不重新索引
+            assert index.update([a_path, b_path]) == (0, 0)
+            os.utime(a_path, ns=(0, 0))
+            assert index.update([a_path]) == (0, 0)
+
+            write_json(a_path, {"root": {"Monster": [{"ID": 2, "monID": 10}]}})
+            os.remove(b_path)
+            assert index.update([a_path, b_path]) == (1, 1)
+            assert index.files_for("monID", *query_values("3539")) == {}
+            assert index.lookup("monID", 10) == [(a_path, "root.Monster[ID=2]")]
+            assert index.indexed_files() == [a_path]
+
+            # 无法解析的文件移出索引
+            with open(a_path, "w", encoding="utf-8") as f:
+                f.write("{broken")
+            assert index.update([a_path]) == (0, 1)
+            assert len(index) == 0
+
+
+def test_update_config_index():
+    """测试索引为空时完整扫描，之后只处理指定目录下的文件"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            roots = ["config/json"]
+            write_json("config/json/a.json", {"ID": 1})
+            write_json("config/json/b.json", {"ID": 2})
+            assert update_config_index("index.sqlite", [], roots) == (2, 0)
+
+            write_json("config/json/a.json", {"ID": 3})
+            write_json("other/c.json", {"ID": 3})
+            assert update_config_index("index.sqlite", ["config/json/a.json", "other/c.json"], roots) == (1, 0)
+            with ConfigIndex("index.sqlite") as index:
+                assert index.lookup("ID", 3) == [("config/json/a.json", "")]
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_rebuild_keeps_index_on_failure():
+    """测试重建在一个事务中完成，中途失败时保留原有索引"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "json")
+        write_json(os.path.join(root, "a.json"), {"ID": 1})
+        write_json(os.path.join(root, "b.json"), {"ID": 2})
+        with ConfigIndex(os.path.join(temp_dir, "index.sqlite")) as index:
+            assert index.scan([root]) == (2, 0)
+
+            original = index._index_file
+            calls = []
+
+            def failing_index_file(*args):
+                calls.append(args)
+                if len(calls) == 2:
+                    raise sqlite3.OperationalError("disk I/O error")
+                original(*args)
+
+            index._index_file = failing_index_file
+            try:
+                index.rebuild([root])
+                assert False, "应抛出 sqlite3.Error"
+            except sqlite3.Error:
+                pass
+            index._index_file = original
+            assert len(index) == 2 and index.lookup("ID", 2)
+            assert index.rebuild([root]) == (2, 0)
+            assert len(index) == 2
+
+
+def test_cli_rebuild_and_query():
+    """测试命令行 rebuild 后仍能查询到结果"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        write_json(os.path.join(temp_dir, "files", "resource", "config", "json", "a.json"),
+                   {"root": {"Monster": [{"ID": 1, "monID": 3539}]}})
+        script = os.path.join(ROOT, "configIndex.py")
+
+        def run(*args):
+            result = subprocess.run([sys.executable, script, "--db", "index.sqlite", *args], cwd=temp_dir,
+                                    capture_output=True, text=True, encoding="utf-8")
+            assert result.returncode == 0, result.stderr
+            return result.stdout
+
+        run("update")
+        assert "已索引 1 个文件" in run("rebuild")
+        output = run("query", "monID", "3539")
+        assert "files/resource/config/json/a.json" in output and "共 1 条结果" in output
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证按内容 hash 寻址的下载缓存
+Test script for the content-addressed download cache
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contentCache import ContentCache, content_key
+
+
+def test_content_key():
+    """测试从带 hash 的文件名提取缓存键"""
+    assert content_key("files/resource/config/json/pveEnter_378343fe.json") == "378343fe.json"
+    assert content_key("petbook_temp_ABCDEF12.xml") == "abcdef12.xml"
+    assert content_key("files/resource/config/json/plain.json") is None
+
+
+def test_put_get_and_reload():
+    """测试写入、命中与重新加载索引"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ContentCache(temp_dir)
+        assert cache.get("aaaaaa.json") is None
+        cache.put("aaaaaa.json", b'{"a": 1}')
+        assert cache.get("aaaaaa.json") == b'{"a": 1}'
+        assert (cache.hits, cache.misses) == (1, 1)
+        cache.flush()
+
+        reloaded = ContentCache(temp_dir)
+        assert len(reloaded) == 1
+        assert reloaded.get("aaaaaa.json") == b'{"a": 1}'
+
+
+def test_lru_eviction():
+    """测试超出大小上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ContentCache(temp_dir, max_bytes=20)
+        cache.put("aaaaaa.json", b"0123456789")
+        cache.put("bbbbbb.json", b"0123456789")
+        cache.get("aaaaaa.json")  # a 变为最近使用
+        cache.put("cccccc.json", b"0123456789")
+
+        assert cache.get("bbbbbb.json") is None
+        assert cache.get("aaaaaa.json") is not None
+        assert cache.get("cccccc.json") is not None
+        assert cache.total_bytes == 20
+
+
+def test_corrupted_entry_is_discarded():
+    """测试缓存内容被篡改时视为未命中"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ContentCache(temp_dir)
+        cache.put("dddddd.json", b'{"d": 1}')
+        with open(os.path.join(temp_dir, "dd", "dddddd.json"), "wb") as f:
+            f.write(b'{"d": 2}')
+
+        assert cache.get("dddddd.json") is None
+        assert len(cache) == 0
+
+
+def test_malformed_index_is_ignored():
+    """测试索引是合法 JSON 但结构不正确时视为损坏并忽略"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ContentCache(temp_dir)
+        cache.put("eeeeee.json", b'{"e": 1}')
+        cache.flush()
+        index_path = os.path.join(temp_dir, "index.json")
+        for text in ('[1, 2]', '"index"', '{"eeeeee.json": 5}', '{"eeeeee.json": {"size": "8", "atime": 1}}'):
+            with open(index_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            reloaded = ContentCache(temp_dir)
+            assert len(reloaded) == 0 and reloaded.get("eeeeee.json") is None
+            reloaded.put("ffffff.json", b"{}")
+            assert reloaded.get("ffffff.json") == b"{}"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证并发下载引擎
+Test script for the concurrent download engine
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import downloadEngine
+import asyncPipeline
+import httpSession
+from contentCache import ContentCache
+
+
+def _serve_directory(directory):
+    """在后台线程启动一个本地 HTTP 服务，返回 (server, base_url)"""
+    import functools
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _make_remote_tree(root):
+    """生成远程文件树，返回待下载的 (url_path, local_path) 列表"""
+    remote_dir = os.path.join(root, "resource", "config", "json")
+    os.makedirs(remote_dir)
+    files = []
+    for i in range(6):
+        with open(os.path.join(remote_dir, f"item{i}_{i:08x}.json"), "w", encoding="utf-8") as f:
+            f.write('{"ID": %d, "name": "精灵\\u0041", "list": [1.5, {}, []]}' % i)
+        files.append((f"files/resource/config/json/item{i}_{i:08x}.json",
+                      f"files/resource/config/json/item{i}.json"))
+    files.append(("files/resource/config/json/missing_0.json", "files/resource/config/json/missing.json"))
+    return files
+
+
+class _FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class _FakeSession:
+    """代替共享会话，按地址返回预设的响应内容"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        body = self.bodies.get(url)
+        return _FakeResponse(body) if body is not None else _FakeResponse(b"", 404)
+
+    def close(self):
+        pass
+
+
+def test_download_writes_stdlib_format_in_one_pass():
+    """测试下载的紧凑 JSON 一次写盘，内容与 json.dumps(data, ensure_ascii=False, indent=2) 逐字节一致"""
+    data = {"root": {"Monster": [{"ID": 1, "名称": "精灵\u0041", "rate": 0.1, "big": 2 ** 70,
+                                  "tags": [], "extra": {}, "ok": True, "none": None}]}}
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")  # 紧凑且转义非 ASCII 字符
+    expected = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    files = [(f"files/resource/config/json/m{i}_0000000{i}.json", f"files/resource/config/json/m{i}.json")
+             for i in range(4)]
+    session = _FakeSession({downloadEngine.build_download_url("http://example.com", url_path): body
+                            for url_path, _ in files})
+    original_cwd = os.getcwd()
+    original_write = downloadEngine.write_atomic
+    writes = []
+
+    def counting_write(save_path, content):
+        writes.append(save_path)
+        original_write(save_path, content)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            os.chdir(temp_dir)
+            httpSession._session = session
+            downloadEngine.write_atomic = counting_write
+            os.makedirs(os.path.join("files", "resource", "config", "json"))
+            with open(os.path.join("files", "resource", "config", "json", "m0.json"), "wb") as f:
+                f.write(b'{"old": 1}')
+            for workers in (1, 4):
+                writes.clear()
+                succeeded, failed = downloadEngine.download_files(files, "http://example.com", workers=workers)
+                assert sorted(succeeded) == sorted(files) and not failed
+                assert sorted(writes) == sorted(os.path.join(*local.split("/")) for _, local in files)
+                for _, local_path in files:
+                    with open(local_path, "rb") as f:
+                        assert f.read() == expected
+                leftovers = [name for _, _, names in os.walk(".") for name in names
+                             if name.endswith((".tmp", ".bak"))]
+                assert leftovers == []
+        finally:
+            os.chdir(original_cwd)
+            downloadEngine.write_atomic = original_write
+            httpSession._session = None
+
+
+def test_build_download_url():
+    """测试下载地址拼接"""
+    url = downloadEngine.build_download_url(
+        "http://seerh5.61.com", "files/resource/config/json/pveEnter_378343fe.json"
+    )
+    assert url == "http://seerh5.61.com/resource/config/json/pveEnter_378343fe.json"
+
+
+def test_host_limiter_caps_concurrency():
+    """测试同一主机的并发上限"""
+    limiter = downloadEngine.HostLimiter(2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal active, peak
+        with limiter.for_url("http://seerh5.61.com/a.json"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+    assert limiter.for_url("http://a/x") is not limiter.for_url("http://b/x")
+
+
+def test_download_files_counts_failures():
+    """测试并发模式下失败文件的统计"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            files = [("", "files/a.json"), ("files/b_1.json", "")]
+            succeeded, failed = downloadEngine.download_files(
+                files, "http://127.0.0.1:9", workers=4
+            )
+            assert succeeded == []
+            assert failed == files
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_thread_pool_matches_sequential_download():
+    """测试 workers > 1 时的落盘结果、成功与失败列表与顺序下载一致"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        remote_root = os.path.join(temp_dir, "remote")
+        files = _make_remote_tree(remote_root)
+        # 再加入无效 JSON、无法解析的路径与另一个不存在的文件
+        with open(os.path.join(remote_root, "resource", "config", "json", "broken_1.json"), "w") as f:
+            f.write("{broken")
+        files += [
+            ("files/resource/config/json/broken_1.json", "files/resource/config/json/broken.json"),
+            ("", "files/resource/config/json/empty.json"),
+            ("files/resource/config/json/gone_2.json", "files/resource/config/json/gone.json"),
+        ]
+        server, base_url = _serve_directory(remote_root)
+        outputs = {}
+        results = {}
+        try:
+            for workers in (1, 4):
+                work_dir = os.path.join(temp_dir, f"workers{workers}")
+                os.makedirs(work_dir)
+                os.chdir(work_dir)
+                succeeded, failed = downloadEngine.download_files(files, base_url, workers=workers)
+                results[workers] = (sorted(succeeded), sorted(failed))
+                outputs[workers] = {}
+                for directory, _, names in os.walk("files"):
+                    for name in names:
+                        with open(os.path.join(directory, name), "rb") as f:
+                            outputs[workers][os.path.join(directory, name)] = f.read()
+                os.chdir(original_cwd)
+            assert results[4] == results[1]
+            assert results[1][0] == sorted(files[:6]) and len(results[1][1]) == 4
+            assert outputs[4] == outputs[1] and len(outputs[1]) == 6
+        finally:
+            os.chdir(original_cwd)
+            server.shutdown()
+            server.server_close()
+
+
+def test_pipeline_matches_sequential_download():
+    """测试异步流水线与顺序下载的落盘结果一致"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        remote_root = os.path.join(temp_dir, "remote")
+        files = _make_remote_tree(remote_root)
+        server, base_url = _serve_directory(remote_root)
+        try:
+            outputs = {}
+            for mode in ("sequential", "async"):
+                work_dir = os.path.join(temp_dir, mode)
+                os.makedirs(work_dir)
+                os.chdir(work_dir)
+                if mode == "async":
+                    succeeded, failed = asyncPipeline.download_files_async(
+                        files, base_url, fetch_workers=3, format_workers=2, queue_size=2
+                    )
+                else:
+                    succeeded, failed = downloadEngine.download_files(files, base_url, workers=1)
+                assert sorted(succeeded) == sorted(files[:-1])
+                assert failed == files[-1:]
+                outputs[mode] = {}
+                for _, local_path in succeeded:
+                    with open(local_path, "rb") as f:
+                        outputs[mode][local_path] = f.read()
+                os.chdir(original_cwd)
+            assert outputs["async"] == outputs["sequential"]
+        finally:
+            os.chdir(original_cwd)
+            server.shutdown()
+            server.server_close()
+
+
+def test_pipeline_consumes_files_lazily():
+    """测试异步流水线按需从生成器取文件，不会在开始下载前读完整个清单"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        remote_root = os.path.join(temp_dir, "remote")
+        remote = _make_remote_tree(remote_root)[:-1]
+        total = 60
+        taken = []
+        taken_at_first_write = []
+
+        def generate():
+            for i in range(total):
+                url_path, local_path = remote[i % len(remote)]
+                taken.append(i)
+                yield url_path, local_path.replace(".json", f"_{i}.json")
+
+        def on_success(item):
+            if not taken_at_first_write:
+                taken_at_first_write.append(len(taken))
+
+        server, base_url = _serve_directory(remote_root)
+        try:
+            os.chdir(temp_dir)
+            succeeded, failed = asyncPipeline.download_files_async(
+                generate(), base_url, fetch_workers=2, format_workers=1, queue_size=1, on_success=on_success
+            )
+            assert len(succeeded) == total and not failed
+            assert taken_at_first_write[0] < total // 2
+        finally:
+            os.chdir(original_cwd)
+            server.shutdown()
+            server.server_close()
+
+
+def test_slow_manifest_does_not_stall_pipeline():
+    """测试从清单取下一个文件时阻塞不会影响已取出文件的下载与写盘"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        remote_root = os.path.join(temp_dir, "remote")
+        remote = _make_remote_tree(remote_root)[:2]
+        first_written = threading.Event()
+        waited = []
+
+        def generate():
+            yield remote[0]
+            # 模拟流式清单等待网络数据：直到第一个文件写盘后才产出下一个
+            waited.append(first_written.wait(timeout=5))
+            yield remote[1]
+
+        server, base_url = _serve_directory(remote_root)
+        try:
+            os.chdir(temp_dir)
+            succeeded, failed = asyncPipeline.download_files_async(
+                generate(), base_url, fetch_workers=2, format_workers=1,
+                on_success=lambda item: first_written.set()
+            )
+            assert waited == [True]
+            assert sorted(succeeded) == sorted(remote) and not failed
+        finally:
+            os.chdir(original_cwd)
+            server.shutdown()
+            server.server_close()
+
+
+def test_content_cache_skips_network():
+    """测试内容 hash 已缓存的文件在服务器不可用时仍能恢复"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        remote_root = os.path.join(temp_dir, "remote")
+        files = _make_remote_tree(remote_root)[:-1]
+        cache = ContentCache(os.path.join(temp_dir, "cache"))
+        server, base_url = _serve_directory(remote_root)
+        try:
+            os.chdir(temp_dir)
+            succeeded, _ = downloadEngine.download_files(files, base_url, workers=2, cache=cache)
+            assert len(succeeded) == len(files)
+        finally:
+            os.chdir(original_cwd)
+            server.shutdown()
+            server.server_close()
+
+        work_dir = os.path.join(temp_dir, "restored")
+        os.makedirs(work_dir)
+        try:
+            os.chdir(work_dir)
+            succeeded, failed = downloadEngine.download_files(files, base_url, workers=2, cache=cache)
+            assert not failed and len(succeeded) == len(files)
+            assert cache.hits == len(files)
+        finally:
+            os.chdir(original_cwd)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 在本地模拟服务器上端到端运行同步
+End-to-end sync test against the local mock Seer H5 server
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import syncSeerH5Data
+from configIndex import ConfigIndex
+from mockSeerServer import MockSeerServer, generate_tree, write_manifest
+
+
+def test_sync_against_mock_server():
+    """测试首次同步、版本未变化与文件删除"""
+    original_cwd = os.getcwd()
+    original_domain = syncSeerH5Data.BASE_DOMAIN
+    original_cache = syncSeerH5Data.ENABLE_CONTENT_CACHE
+    original_merge = syncSeerH5Data.merge_subtrees
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_root = os.path.join(temp_dir, "remote")
+        work_dir = os.path.join(temp_dir, "work")
+        os.makedirs(work_dir)
+        manifest = generate_tree(source_root, file_count=8, total_bytes=64 * 1024, extra_entries=20)
+        server = MockSeerServer(source_root).start()
+        try:
+            os.chdir(work_dir)
+            syncSeerH5Data.BASE_DOMAIN = server.base_url
+            syncSeerH5Data.ENABLE_CONTENT_CACHE = False
+
+            # 完整同步（full.py）记录的其他资源不应被增量同步覆盖
+            with open("version.json", "w", encoding="utf-8") as f:
+                json.dump({"files": {"resource": {"assets": {"keep.png": "keep_1.png"}}}}, f)
+
+            syncSeerH5Data.main()
+            config = manifest["files"]["resource"]["config"]
+            for directory, entries in config.items():
+                for name in entries:
+                    path = os.path.join("files", "resource", "config", directory, name)
+                    with open(path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                    assert text == json.dumps(json.loads(text), ensure_ascii=False, indent=2)
+            with open("version.json", "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            assert saved["files"]["resource"]["config"] == config
+            assert saved["files"]["resource"]["assets"] == {"keep.png": "keep_1.png"}
+            with open(syncSeerH5Data.METRICS_FILE, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            assert report["status"] == "ok"
+            assert report["totals"]["succeeded"] == sum(len(entries) for entries in config.values())
+
+            # 第二次运行命中条件请求，不再下载任何文件
+            requests_before, _ = server.stats()
+            syncSeerH5Data.main()
+            assert server.stats()[0] == requests_before + 1
+            with open(syncSeerH5Data.METRICS_FILE, "r", encoding="utf-8") as f:
+                counters = json.load(f)["counters"]
+            assert counters["http_requests"] == 1 and counters["http_connections"] == 1
+
+            # 远程删除一个文件后本地同步删除
+            removed = next(iter(config["json"]))
+            del config["json"][removed]
+            manifest["version"] += 1
+            write_manifest(source_root, manifest)
+            orphan = "files/resource/config/json/stale.json"
+            with open(orphan, "w", encoding="utf-8") as f:
+                f.write("{}")
+            merges = []
+            syncSeerH5Data.merge_subtrees = lambda *args: merges.append(args) or original_merge(*args)
+            syncSeerH5Data.main()
+            assert merges == []  # 已有 version.json 时直接替换文本中的子树，不解析整个文件
+            with open("version.json", "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            assert saved["files"]["resource"]["config"] == config and saved["version"] == manifest["version"]
+            assert saved["files"]["resource"]["assets"] == {"keep.png": "keep_1.png"}
+            assert not os.path.exists(os.path.join("files", "resource", "config", "json", removed))
+            latest = sorted(os.listdir(syncSeerH5Data.CHANGELOG_DIR))[-1]
+            with open(os.path.join(syncSeerH5Data.CHANGELOG_DIR, latest), "r", encoding="utf-8") as f:
+                changes = json.load(f)
+            assert changes["version"] == manifest["version"]
+            assert changes["files"] == {f"files/resource/config/json/{removed}": {"status": "removed"}}
+            with ConfigIndex(syncSeerH5Data.CONFIG_INDEX_FILE) as index:
+                indexed = index.indexed_files()
+            assert f"files/resource/config/json/{removed}" not in indexed
+            assert len(indexed) == sum(len(entries) for entries in config.values())
+            with open(syncSeerH5Data.EVENTS_FILE, "r", encoding="utf-8") as f:
+                events = [json.loads(line) for line in f]
+            assert len(events) == len(indexed) + 3
+            assert [(event["type"], event["path"]) for event in events[-2:]] == [
+                ("removed", f"files/resource/config/json/{removed}"), ("removed", orphan)]
+            assert not os.path.exists(orphan)
+        finally:
+            os.chdir(original_cwd)
+            syncSeerH5Data.BASE_DOMAIN = original_domain
+            syncSeerH5Data.ENABLE_CONTENT_CACHE = original_cache
+            syncSeerH5Data.merge_subtrees = original_merge
+            server.stop()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -10,7 +10,7 @@ import tempfile
 import json
 
 # Add the project directory to the path
-sys.path.insert(0, '/home/runner/work/syncSeerJsonData/syncSeerJsonData')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import syncSeerH5Data
 
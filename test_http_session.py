@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证共享 HTTP 会话的连接复用与统计
+Test script for the shared HTTP session (keep-alive reuse and per-run stats)
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from httpSession import close_session, configure_session, get_connection_stats, http_get
+from mockSeerServer import MockSeerServer, generate_tree
+
+
+def test_connection_reuse_and_reset():
+    """测试多次请求复用同一连接，重建会话后统计从零开始"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        generate_tree(temp_dir, file_count=2, total_bytes=4 * 1024, extra_entries=0)
+        server = MockSeerServer(temp_dir).start()
+        try:
+            url = f"{server.base_url}/version/version.json"
+            configure_session()
+            previous_reused = -1
+            for count in range(1, 6):
+                response = http_get(url, timeout=10)
+                assert response.status_code == 200
+                stats = get_connection_stats()
+                assert stats["requests"] == count and stats["connections"] == 1
+                assert stats["reused"] > previous_reused
+                previous_reused = stats["reused"]
+            assert server.stats()[0] == 5
+
+            # 下一次运行重建会话，只统计本次运行的请求
+            configure_session(pool_maxsize=2)
+            for _ in range(3):
+                http_get(url, timeout=10)
+            assert get_connection_stats() == {"requests": 3, "connections": 1, "reused": 2}
+
+            close_session()
+            assert get_connection_stats() == {"requests": 0, "connections": 0, "reused": 0}
+        finally:
+            close_session()
+            server.stop()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
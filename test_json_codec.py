@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证 JSON 编解码层与标准库输出一致
+Test script for the pluggable JSON codec
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import jsonCodec
+
+SAMPLES = [
+    {"名称": "精灵A", "控制字符": "\x00\x1f\x7f \"\\/", "emoji": "😀"},
+    {"b": 1, "a": [], "c": {}, "d": [{}], "e": None, "f": True, "g": -0.0},
+    [0.1, 1.5, 100.0, 1e15, 0.0001, 123456789012345.6],
+    [1e16, 1e-5, 5e-324, 1.7976931348623157e308],
+    [float("nan"), float("inf"), float("-inf")],
+    [2 ** 63, -2 ** 63, 2 ** 64, -2 ** 70],
+    [2 ** 64],
+    [-2 ** 63 - 1],
+    {"id": 2 ** 64 - 1, "min": -2 ** 63},
+]
+
+
+def _reference(obj):
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def test_dumps_matches_stdlib_for_every_backend():
+    """测试所有可用后端的序列化结果与标准库逐字节一致"""
+    try:
+        for backend in jsonCodec.AVAILABLE_BACKENDS:
+            jsonCodec.set_backend(backend)
+            for sample in SAMPLES:
+                assert jsonCodec.dumps_bytes(sample) == _reference(sample), (backend, sample)
+            assert jsonCodec.dumps_bytes(SAMPLES[0], indent=4) == \
+                json.dumps(SAMPLES[0], ensure_ascii=False, indent=4).encode("utf-8")
+    finally:
+        jsonCodec.set_backend()
+
+
+def test_loads_matches_stdlib_for_every_backend():
+    """测试所有可用后端的解析结果与标准库一致，包括快速实现不支持的输入"""
+    texts = [
+        '{"b": 1, "a": [1.0, -0, 1E2], "中文": "\\u7cbe\\u7075"}',
+        '[NaN, Infinity, 18446744073709551616, 1E400]',
+        # 单独出现的超长整数（orjson 会静默解析为浮点数）
+        '[18446744073709551616]',
+        '-9223372036854775809',
+        '{"id": 123456789012345678901234567890, "name": "x"}',
+    ]
+    try:
+        for backend in jsonCodec.AVAILABLE_BACKENDS:
+            jsonCodec.set_backend(backend)
+            for text in texts:
+                expected = json.loads(text)
+                for data in (text, text.encode("utf-8")):
+                    result = jsonCodec.loads(data)
+                    assert repr(result) == repr(expected), (backend, text)
+                    if isinstance(result, dict):
+                        assert list(result) == list(expected)
+            try:
+                jsonCodec.loads(b'{"a": ')
+                assert False, "无效JSON应抛出异常"
+            except json.JSONDecodeError:
+                pass
+    finally:
+        jsonCodec.set_backend()
+
+
+def test_unknown_backend_is_rejected():
+    """测试切换到不可用的后端时抛出 ValueError"""
+    try:
+        jsonCodec.set_backend("simdjson")
+        assert False, "应抛出 ValueError"
+    except ValueError:
+        pass
+    assert jsonCodec.get_backend() == jsonCodec.AVAILABLE_BACKENDS[0]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
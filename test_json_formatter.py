@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证 JSON 批量格式化
+Test script for batch JSON formatting
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import jsonFormatter
+from jsonFormatter import batch_format_json, collect_json_files, format_json_stream, format_single_json, split_into_chunks
+
+
+def _write_samples(directory):
+    """生成大小不一的压缩JSON文件和一个无效文件"""
+    os.makedirs(os.path.join(directory, "sub"))
+    samples = {}
+    for i in range(8):
+        data = {"ID": i, "name": "精灵", "items": list(range(i * 50))}
+        path = os.path.join(directory, "sub" if i % 2 else "", f"f{i}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        samples[path] = data
+    with open(os.path.join(directory, "broken.json"), "w", encoding="utf-8") as f:
+        f.write("{broken")
+    return samples
+
+
+def test_chunks_schedule_largest_first():
+    """测试任务块按大小排序，大文件单独成块"""
+    files = [("big.json", 1000), ("mid.json", 300), ("a.json", 10), ("b.json", 10), ("c.json", 10)]
+    chunks = split_into_chunks(files, 4)
+    assert chunks[0] == ["big.json"]
+    assert sum(len(chunk) for chunk in chunks) == len(files)
+    assert chunks[-1][-1] == "c.json"
+    assert split_into_chunks([], 4) == []
+
+
+def test_parallel_matches_serial():
+    """测试多进程与单进程的格式化结果和统计一致"""
+    outputs = {}
+    for workers in (1, 3):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            samples = _write_samples(temp_dir)
+            sizes = [size for _, size in collect_json_files(temp_dir)]
+            assert sizes == sorted(sizes, reverse=True)
+
+            assert batch_format_json(temp_dir, 2, [], workers) == (9, 8, 1)
+            assert batch_format_json(os.path.join(temp_dir, "missing"), 2, [], workers) == (0, 0, 0)
+            contents = {}
+            for path, data in samples.items():
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                assert text == json.dumps(data, ensure_ascii=False, indent=2)
+                contents[os.path.relpath(path, temp_dir)] = text
+            outputs[workers] = contents
+    assert outputs[1] == outputs[3]
+
+
+def test_canonical_file_is_not_rewritten():
+    """测试已是标准格式的文件不被重写，也不留下备份"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "a.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"名称": [1, 2.5, None]}, f, ensure_ascii=False, indent=2)
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+        assert format_single_json(path)
+        assert os.stat(path).st_mtime_ns == 1_000_000_000
+        assert not os.path.exists(f"{path}.bak")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"名称":[1,2.5,null]}')
+        assert format_single_json(path)
+        with open(path, "r", encoding="utf-8") as f:
+            assert f.read() == json.dumps({"名称": [1, 2.5, None]}, ensure_ascii=False, indent=2)
+
+
+def test_index_skips_unchanged_files():
+    """测试格式化索引：未变化的文件只做 stat，修改过的文件重新处理"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files_dir = os.path.join(temp_dir, "files")
+        os.makedirs(files_dir)
+        samples = _write_samples(files_dir)
+        index_file = os.path.join(temp_dir, "index.json")
+
+        assert batch_format_json(files_dir, 2, [], 1, index_file) == (9, 8, 1)
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        assert len(index["files"]) == 8 and "broken.json" not in index["files"]
+
+        # 修改一个文件后只有它被重新格式化
+        path = next(iter(samples))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"changed":true}')
+        assert batch_format_json(files_dir, 2, [], 2, index_file) == (9, 8, 1)
+        with open(path, "r", encoding="utf-8") as f:
+            assert f.read() == '{\n  "changed": true\n}'
+
+        # 仅修改 mtime 时按内容摘要判断，无需重写
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        assert batch_format_json(files_dir, 2, [], 1, index_file) == (9, 8, 1)
+        assert os.stat(path).st_mtime_ns == 1_000_000_000
+        with open(index_file, "r", encoding="utf-8") as f:
+            key = os.path.relpath(path, files_dir).replace(os.sep, "/")
+            assert json.load(f)["files"][key]["mtime_ns"] == 1_000_000_000
+
+
+def test_streaming_path_matches_in_memory():
+    """测试大文件的流式重排与内存方式结果一致，重复键时退回内存方式"""
+    threshold = jsonFormatter.STREAM_FORMAT_THRESHOLD
+    jsonFormatter.STREAM_FORMAT_THRESHOLD = 0
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            samples = _write_samples(temp_dir)
+            for path, data in samples.items():
+                assert format_single_json(path)
+                with open(path, "r", encoding="utf-8") as f:
+                    assert f.read() == json.dumps(data, ensure_ascii=False, indent=2)
+                # 再次处理时已是标准格式，不产生临时文件
+                assert format_single_json(path)
+                assert not os.path.exists(f"{path}.tmp")
+
+            duplicate = os.path.join(temp_dir, "dup.json")
+            with open(duplicate, "w", encoding="utf-8") as f:
+                f.write('{"a":1,"b":2,"a":3}')
+            assert format_single_json(duplicate)
+            with open(duplicate, "r", encoding="utf-8") as f:
+                assert f.read() == json.dumps({"a": 3, "b": 2}, indent=2)
+
+            assert not format_single_json(os.path.join(temp_dir, "broken.json"))
+            assert not os.path.exists(os.path.join(temp_dir, "broken.json.tmp"))
+    finally:
+        jsonFormatter.STREAM_FORMAT_THRESHOLD = threshold
+
+
+def test_stream_compare_only_writes_on_change():
+    """测试流式重排只在内容变化时创建输出文件，并正确写入相同前缀"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.json")
+        output = os.path.join(temp_dir, "a.json.tmp")
+        data = {"root": {"Monster": [{"ID": i, "名称": f"精灵{i}"} for i in range(200)]}}
+        canonical = json.dumps(data, ensure_ascii=False, indent=2)
+
+        cases = [
+            (canonical, False),
+            (canonical.replace('"ID": 150', '"ID":150'), True),  # 差异出现在中途
+            (canonical + "\n", True),  # 原文件在相同内容之后还有多余字节
+            (canonical[:-1], None),  # 截断的文件无效
+        ]
+        for text, changed in cases:
+            with open(source, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            if changed is None:
+                try:
+                    format_json_stream(source, output)
+                    assert False, "无效JSON应抛出异常"
+                except json.JSONDecodeError:
+                    pass
+                continue
+            assert format_json_stream(source, output) is changed
+            if changed:
+                with open(output, "r", encoding="utf-8", newline="") as f:
+                    assert f.read() == canonical
+                os.remove(output)
+            else:
+                assert not os.path.exists(output)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证增量 JSON 解析
+Test script for the incremental JSON parser
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jsonStream import DuplicateKeyError, iter_events, iter_leaves, iter_pretty
+
+
+def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _build(events):
+    """由事件重建对象，用于与 json.loads 对比"""
+    stack = []
+    root = None
+    for kind, value in events:
+        if kind in ("start_map", "start_array"):
+            stack.append([{} if kind == "start_map" else [], None])
+            continue
+        if kind == "map_key":
+            stack[-1][1] = value
+            continue
+        if kind in ("end_map", "end_array"):
+            value = stack.pop()[0]
+        if not stack:
+            root = value
+        elif isinstance(stack[-1][0], list):
+            stack[-1][0].append(value)
+        else:
+            stack[-1][0][stack[-1][1]] = value
+    return root
+
+
+def test_events_match_json_loads():
+    """测试任意分块下的解析结果与 json.loads 一致"""
+    documents = [
+        '{}', '[]', '0', '-1.5e3', '"a\\u4e2d\\"x"',
+        '{"a": [1, 2, {"b": null}], "c": true, "d": false}',
+        '[NaN, Infinity, -Infinity, -0, 1E+2, 1.25e-7]',
+        ' {"中文": "值\\n", "嵌套": [[], [[]], {}]} ',
+    ]
+    for document in documents:
+        expected = json.dumps(json.loads(document))
+        for size in (1, 2, 3, 64):
+            assert json.dumps(_build(iter_events(_chunks(document.encode("utf-8"), size)))) == expected
+
+
+def test_invalid_documents_raise():
+    """测试无效或不完整的 JSON 抛出 JSONDecodeError"""
+    documents = ['{', '[1,]', '{"a" 1}', '[1 2]', '{"a":1,}', 'tru', '1 2', '', '[1]x', '"abc', '[01]', '[1.]']
+    for document in documents:
+        for size in (1, 4, 64):
+            try:
+                list(iter_events(_chunks(document.encode("utf-8"), size)))
+            except json.JSONDecodeError:
+                continue
+            raise AssertionError(f"未检测到无效 JSON: {document!r} (块大小 {size})")
+
+
+def test_iter_leaves_with_prefixes():
+    """测试按路径前缀产出叶子"""
+    document = json.dumps({
+        "version": 3,
+        "files": {
+            "config": {"json": {"a.json": "a_1.json"}, "list": [{"x.json": "ignored"}]},
+            "other": {"b.json": "b_1.json"},
+        },
+    }).encode("utf-8")
+    leaves = list(iter_leaves(iter_events(_chunks(document, 5)), [("files", "config")]))
+    assert leaves == [(("version",), 3), (("files", "config", "json", "a.json"), "a_1.json")]
+
+
+def test_pretty_matches_json_dumps():
+    """测试流式重排的输出与 json.dumps 逐字节一致"""
+    documents = [
+        {"名称": "精灵\u0041\n\"\\", "空": {}, "列表": [], "嵌套": [[], [{}], {"a": [1, -0.0, 1e16]}]},
+        [1, 2.5, 1e-05, 12345678901234567890, True, False, None, "😀"],
+        '{"nan": NaN, "inf": [Infinity, -Infinity], "exp": 1E2, "neg": -0}',
+        "标量",
+        {},
+    ]
+    for document in documents:
+        text = document if isinstance(document, str) and document.startswith("{") else json.dumps(document)
+        expected_obj = json.loads(text)
+        for indent in (2, 4):
+            expected = json.dumps(expected_obj, ensure_ascii=False, indent=indent)
+            for size in (1, 7, 1 << 16):
+                events = iter_events(_chunks(text.encode("utf-8"), size))
+                assert "".join(iter_pretty(events, indent)) == expected, (text, indent, size)
+
+
+def test_pretty_rejects_duplicate_keys():
+    """测试重复键时抛出 DuplicateKeyError"""
+    try:
+        "".join(iter_pretty(iter_events([b'{"a": 1, "b": {"a": 2}, "a": 3}'])))
+        assert False, "应抛出 DuplicateKeyError"
+    except DuplicateKeyError:
+        pass
+    # 不同层级的同名键不算重复
+    assert "".join(iter_pretty(iter_events([b'{"a": {"a": 1}}']))) == json.dumps({"a": {"a": 1}}, indent=2)
+    # 键数超过上限时不再记录，同样退回内存方式
+    text = json.dumps({str(i): i for i in range(5)}).encode("utf-8")
+    assert "".join(iter_pretty(iter_events([text]), max_keys=5)) == json.dumps(json.loads(text), indent=2)
+    try:
+        "".join(iter_pretty(iter_events([text]), max_keys=4))
+        assert False, "应抛出 DuplicateKeyError"
+    except DuplicateKeyError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
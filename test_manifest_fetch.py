@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证版本清单的条件请求辅助函数
+Test script for conditional manifest requests
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import manifestFetch
+
+
+def test_peek_version():
+    """测试只读取清单开头的 version 字段"""
+    assert manifestFetch.peek_version(b'{\n  "version": 1756395493830,\n  "files": {}}') == 1756395493830
+    assert manifestFetch.peek_version(b'{"files": {}, "version": 1}') is None
+    assert manifestFetch.peek_version(b'') is None
+
+
+def test_conditional_headers():
+    """测试条件请求头"""
+    headers = manifestFetch.conditional_headers({"etag": '"abc"', "last_modified": "Thu, 28 Aug 2025 15:38:13 GMT"})
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == "Thu, 28 Aug 2025 15:38:13 GMT"
+    assert "If-None-Match" not in manifestFetch.conditional_headers({})
+
+
+def test_validators_roundtrip():
+    """测试校验信息的保存与读取"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "version.meta.json")
+        assert manifestFetch.load_validators(path) == {}
+        validators = {"etag": '"abc"', "version": 2}
+        assert manifestFetch.save_validators(validators, path)
+        assert manifestFetch.load_validators(path) == validators
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证 Merkle 摘要树与按文件保存的索引
+Test script for the Merkle digest index
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import jsonCodec
+from merkleIndex import MerkleIndex, build_tree, diff_trees
+
+
+def _doc():
+    return {
+        "root": {
+            "Monster": [{"ID": i, "DefName": f"精灵{i}", "Skills": [i, i + 1]} for i in range(50)],
+            "Shop": {"items": [[1, 2], [3, 4]], "open": True},
+        }
+    }
+
+
+def test_tree_ignores_key_and_record_order():
+    """测试对象键顺序与记录顺序不影响摘要"""
+    doc = _doc()
+    shuffled = {"root": {"Shop": {"open": True, "items": [[1, 2], [3, 4]]},
+                         "Monster": list(reversed(doc["root"]["Monster"]))}}
+    assert build_tree(doc)["h"] == build_tree(shuffled)["h"]
+    changed = _doc()
+    changed["root"]["Shop"]["items"][1][0] = 5
+    assert build_tree(doc)["h"] != build_tree(changed)["h"]
+
+
+def test_digest_independent_of_json_backend():
+    """测试摘要固定使用标准库计算：NaN 与 null 不同，且不随 jsonCodec 后端变化"""
+    # 记录字段的值为数组或对象时整体计算摘要
+    doc = {"root": {"Monster": [{"ID": 1, "Stats": [1.5, float("nan")], "Name": {"cn": "精灵"}}]}}
+    nulls = {"root": {"Monster": [{"ID": 1, "Stats": [1.5, None], "Name": {"cn": "精灵"}}]}}
+    original = jsonCodec.get_backend()
+    try:
+        digests = set()
+        for backend in jsonCodec.AVAILABLE_BACKENDS:
+            jsonCodec.set_backend(backend)
+            tree = build_tree(doc)
+            assert tree["h"] != build_tree(nulls)["h"]
+            digests.add(tree["h"])
+        assert len(digests) == 1
+    finally:
+        jsonCodec.set_backend(original)
+
+
+def test_diff_only_descends_into_changed_subtrees():
+    """测试摘要相同的子树不会被展开（其中的内容即使被破坏也不影响结果）"""
+    old_tree = build_tree(_doc())
+    # 破坏一个摘要未变的子树：比较时不应进入
+    old_tree["c"]["root"]["c"]["Shop"]["c"] = None
+    new = _doc()
+    new["root"]["Monster"][7]["DefName"] = "改名"
+    records, other_changed = diff_trees(old_tree, build_tree(new))
+    assert records == {"root.Monster": {"key": "ID", "added": [], "removed": [], "changed": {"7": ["DefName"]}}}
+    assert not other_changed
+
+
+def test_diff_reports_structure_outside_records():
+    """测试记录数组之外的内容变化"""
+    new = _doc()
+    new["root"]["Shop"]["items"].append([9])
+    records, other_changed = diff_trees(build_tree(_doc()), build_tree(new))
+    assert records == {} and other_changed
+
+
+def test_index_round_trip_and_invalidation():
+    """测试索引与文件内容一致时直接读取，文件被修改后失效"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            os.makedirs("files/config")
+            path = "files/config/a.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_doc(), f)
+            index = MerkleIndex(".merkle_index")
+            assert index.load(path) is None
+            tree = build_tree(_doc())
+            index.save(path, tree)
+            assert os.path.isfile(".merkle_index/files/config/a.json")
+            assert index.load(path) == tree
+
+            # 修改时间变化但内容相同（如重新检出）时仍然有效
+            os.utime(path, (1, 1))
+            assert index.load(path) == tree
+
+            # 旧格式（摘要算法不同）的索引视为失效
+            with open(".merkle_index/files/config/a.json", "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            del entry["format"]
+            with open(".merkle_index/files/config/a.json", "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            assert index.load(path) is None
+            index.save(path, tree)
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"other": 1}, f)
+            assert index.load(path) is None
+            assert index.tree_for_file(path)["h"] == build_tree({"other": 1})["h"]
+
+            index.remove(path)
+            assert not os.path.exists(".merkle_index/files/config/a.json")
+        finally:
+            os.chdir(original_cwd)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
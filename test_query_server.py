@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证只读查询服务
+Test script for the read-only HTTP query service
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from queryServer import DocumentCache, QueryServer, _id_map_bytes, build_id_map, resolve_pointer
+
+PETBOOK = {"root": {"PetCollect": {"Branch": [
+    {"ID": 1, "Collect": [{"ID": 10, "monID": 3539}, {"ID": 11, "monID": 12}]},
+    {"ID": 2, "Collect": [{"ID": 10, "monID": 7}]},
+]}, "a/b": {"~": 5}}}
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def test_resolve_pointer_and_id_map():
+    assert resolve_pointer(PETBOOK, "/root/PetCollect/Branch/1/ID") == 2
+    assert resolve_pointer(PETBOOK, "/root/a~1b/~0") == 5
+    for pointer in ("/root/missing", "/root/PetCollect/Branch/5", "root"):
+        try:
+            resolve_pointer(PETBOOK, pointer)
+            assert False, pointer
+        except KeyError:
+            pass
+
+    ids = build_id_map(PETBOOK, "ID")
+    assert ids["10"] == ["/root/PetCollect/Branch/0/Collect/0", "/root/PetCollect/Branch/1/Collect/0"]
+    assert build_id_map(PETBOOK, "monID")["3539"] == ["/root/PetCollect/Branch/0/Collect/0"]
+
+
+def test_document_cache_reload_and_eviction():
+    """测试文件替换后重新加载与按大小淘汰"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        a_path = os.path.join(temp_dir, "a.json")
+        b_path = os.path.join(temp_dir, "b.json")
+        write_json(a_path, {"v": 1})
+        write_json(b_path, {"v": 2})
+        cache = DocumentCache(max_bytes=os.path.getsize(a_path) + os.path.getsize(b_path) - 1)
+
+        first = cache.get(a_path)
+        assert cache.get(a_path) is first
+        write_json(a_path, {"v": 10})
+        reloaded = cache.get(a_path)
+        assert reloaded.data == {"v": 10} and reloaded.etag != first.etag
+        assert cache.reloads == 1
+
+        cache.get(b_path)
+        assert len(cache) == 1 and cache.total_bytes <= cache.max_bytes
+        cache.invalidate(b_path)
+        assert len(cache) == 0
+
+
+def test_document_cache_counts_id_maps():
+    """测试生成的 ID 映射计入缓存容量，超出上限时淘汰其他文档"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        a_path = os.path.join(temp_dir, "a.json")
+        b_path = os.path.join(temp_dir, "b.json")
+        write_json(a_path, PETBOOK)
+        write_json(b_path, {"v": 2})
+        size = os.path.getsize(a_path) + os.path.getsize(b_path)
+        # 容量只够 a.json 与它的 ID 映射
+        cache = DocumentCache(max_bytes=os.path.getsize(a_path) + _id_map_bytes(build_id_map(PETBOOK, "ID")))
+
+        cache.get(b_path)
+        document = cache.get(a_path)
+        assert cache.total_bytes == size
+        assert document.find("ID", "10") == ["/root/PetCollect/Branch/0/Collect/0", "/root/PetCollect/Branch/1/Collect/0"]
+        assert document.cost > document.size
+        assert len(cache) == 1 and cache.total_bytes == document.cost
+        document.find("ID", "1")  # 已生成的映射不重复计入
+        assert cache.total_bytes == document.cost
+
+
+def test_query_server():
+    """测试整文件、JSON Pointer、ID 查询、ETag 与文件替换"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "files", "resource", "config", "xml", "petbook.json")
+        write_json(path, PETBOOK)
+        write_json(os.path.join(temp_dir, "secret.json"), {})
+        server = QueryServer(temp_dir, port=0).start()
+        try:
+            url = f"{server.base_url}/files/resource/config/xml/petbook.json"
+            response = requests.get(url)
+            assert response.status_code == 200 and response.json() == PETBOOK
+            etag = response.headers["ETag"]
+
+            response = requests.get(url, params={"pointer": "/root/PetCollect/Branch/1"})
+            assert response.json() == PETBOOK["root"]["PetCollect"]["Branch"][1]
+            assert requests.get(url, params={"pointer": "/root/nothing"}).status_code == 404
+
+            records = requests.get(url, params={"id": "10", "pointer": "/root/PetCollect/Branch/1"}).json()["records"]
+            assert records == [{"pointer": "/root/PetCollect/Branch/1/Collect/0", "record": {"ID": 10, "monID": 7}}]
+            records = requests.get(url, params={"id": "3539", "key": "monID"}).json()["records"]
+            assert [record["pointer"] for record in records] == ["/root/PetCollect/Branch/0/Collect/0"]
+            assert requests.get(url, params={"id": "999"}).status_code == 404
+
+            response = requests.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+
+            # 子资源不存在时不因文档 ETag 命中而返回 304
+            assert requests.get(url, params={"pointer": "/root/nothing"}, headers={"If-None-Match": etag}).status_code == 404
+            assert requests.get(url, params={"id": "999"}, headers={"If-None-Match": "*"}).status_code == 404
+            branch = {"pointer": "/root/PetCollect/Branch/0"}
+            branch_etag = requests.get(url, params=branch).headers["ETag"]
+            assert branch_etag != etag
+            assert requests.get(url, params=branch, headers={"If-None-Match": branch_etag}).status_code == 304
+            assert requests.get(url, params={"pointer": "/root/PetCollect/Branch/1"},
+                                headers={"If-None-Match": branch_etag}).status_code == 200
+
+            for bad in ("/secret.json", "/files/resource/config/../../../secret.json", "/files/resource/config/xml/x.json"):
+                assert requests.get(server.base_url + bad).status_code == 404
+
+            # 同步替换文件后返回新内容与新的 ETag
+            write_json(path, {"root": {"PetCollect": {"Branch": []}}})
+            response = requests.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 200 and response.headers["ETag"] != etag
+            assert response.json()["root"]["PetCollect"]["Branch"] == []
+
+            stats = requests.get(f"{server.base_url}/stats").json()
+            assert stats["documents"] == 1 and stats["reloads"] == 1
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证按记录比较配置文件与变更记录
+Test script for the per-record config diff and changelog
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from merkleIndex import MerkleIndex, build_tree, record_key_field
+from recordDiff import ChangeLog, compare_json, compare_trees
+
+
+def _doc():
+    return {
+        "root": {
+            "Monster": [
+                {"ID": 1, "DefName": "布布种子", "Type": 1},
+                {"ID": 2, "DefName": "布布草", "Type": 1},
+                {"ID": 3, "DefName": "布布花", "Type": 1},
+            ],
+            "Tips": [{"text": "a"}, {"text": "b"}],
+            "title": "图鉴",
+        }
+    }
+
+
+def _compare(old, new):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "petbook.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(old, f, ensure_ascii=False, indent=2)
+        return compare_json(path, json.dumps(new, ensure_ascii=False).encode("utf-8"))
+
+
+def test_keyed_records():
+    """测试按 ID 对齐记录，列出新增、删除与变化的字段"""
+    new = _doc()
+    monsters = new["root"]["Monster"]
+    monsters[0]["DefName"] = "布布"
+    monsters[0]["Height"] = 10
+    del monsters[1]
+    monsters.append({"ID": 4, "DefName": "新精灵", "Type": 2})
+    result = _compare(_doc(), new)
+    assert result["status"] == "modified"
+    assert not result["other_changed"]
+    assert result["records"] == {
+        "root.Monster": {"key": "ID", "added": [4], "removed": [2], "changed": {"1": ["DefName", "Height"]}}
+    }
+
+
+def test_semantically_equal_content():
+    """测试只有格式或记录顺序变化时不产生变更"""
+    new = _doc()
+    new["root"]["Monster"].reverse()
+    assert _compare(_doc(), new) is None
+
+
+def test_unkeyed_records_and_other_content():
+    """测试没有键字段的数组按内容计数，其余内容只报告是否变化"""
+    new = _doc()
+    new["root"]["Tips"][1]["text"] = "c"
+    new["root"]["title"] = "新图鉴"
+    result = _compare(_doc(), new)
+    assert result["records"] == {"root.Tips": {"key": None, "added": 1, "removed": 1}}
+    assert result["other_changed"]
+
+
+def test_type_changes_are_detected():
+    """测试 1、1.0 与 True 视为不同的值"""
+    old = build_tree({"list": [{"ID": 1, "v": 1}]})
+    for value in (1.0, True, "1"):
+        change = compare_trees(old, build_tree({"list": [{"ID": 1, "v": value}]}))
+        assert change["records"]["list"]["changed"] == {"1": ["v"]}
+
+
+def test_duplicate_ids_fall_back_to_content():
+    """测试 ID 不唯一时按内容比较"""
+    assert record_key_field([{"ID": 1, "a": 1}, {"ID": 1, "a": 2}]) is None
+    assert record_key_field([{"ID": 1}, {"ID": "1"}]) is None
+    assert record_key_field([{"ID": 1, "id": 5}, {"ID": 1, "id": 6}]) == "id"
+
+
+def test_changelog_write():
+    """测试变更记录只在有变化时写入，新文件、删除与修改分别标记，摘要树随写盘保存"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            changelog = ChangeLog(MerkleIndex("index"))
+            assert changelog.write("changelog", 1) is None
+
+            with open("a.json", "w", encoding="utf-8") as f:
+                json.dump(_doc(), f)
+            changelog.add("a.json", changelog.compare("a.json", json.dumps(_doc()).encode()))
+            assert len(changelog) == 0  # 内容相同
+            assert changelog.index.load("a.json") is not None
+
+            change = changelog.compare("new.json", b'{"list": [{"ID": 1}]}')
+            with open("new.json", "wb") as f:
+                f.write(b'{"list": [{"ID": 1}]}')
+            changelog.add("new.json", change)
+            with open("a.json", "w", encoding="utf-8") as f:
+                f.write("{broken")
+            changelog.add("a.json", changelog.compare("a.json", b"{}"))
+            changelog.add_removed(["old.json", "new.json"])
+            assert changelog.index.load("new.json") is None
+
+            path = changelog.write("changelog", 1230)
+            assert path.endswith("_v1230.json")
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            assert report["version"] == 1230
+            assert report["files"] == {
+                "a.json": {"status": "modified"},
+                "new.json": {"status": "removed"},
+                "old.json": {"status": "removed"},
+            }
+        finally:
+            os.chdir(original_cwd)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证已删除文件与遗留文件的清理
+Test script for pruning files removed from the remote manifest
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from removedFiles import find_orphans, prune_files
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+
+
+def test_find_orphans():
+    """测试找出不在清单中的文件，并按扩展名过滤"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            for name in ("a.json", "b.json", "c.xml", "notes.txt"):
+                _touch(f"files/config/{name}")
+            known = {"files/config/a.json"}
+            assert find_orphans(known, ["files/config"], (".json", ".xml")) == [
+                "files/config/b.json",
+                "files/config/c.xml",
+            ]
+            assert find_orphans(known, ["files/missing"]) == []
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_prune_delete_archive_and_dry_run():
+    """测试删除、归档与试运行"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            paths = ["files/config/a.json", "files/config/b.json"]
+            for path in paths:
+                _touch(path)
+
+            assert prune_files(paths, "delete", dry_run=True) == paths
+            assert all(os.path.exists(path) for path in paths)
+
+            assert prune_files(paths[:1], "archive", archive_dir="archive") == paths[:1]
+            assert not os.path.exists(paths[0])
+            assert os.path.exists(os.path.join("archive", paths[0]))
+
+            assert prune_files(paths[1:] + ["files/config/gone.json"], "delete") == paths[1:]
+            assert not os.path.exists(paths[1])
+
+            assert prune_files(paths, "keep") == []
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_prune_rejects_unsafe_paths_and_actions():
+    """测试拒绝工作目录之外的路径与未知的清理方式"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        outside = os.path.join(temp_dir, "outside.json")
+        _touch(outside)
+        assert prune_files([outside, "../outside.json"], "delete") == []
+        assert os.path.exists(outside)
+    try:
+        prune_files([], "shred")
+        assert False, "应抛出 ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
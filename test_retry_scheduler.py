@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证非阻塞重试调度、重试预算与按主机熔断
+Test script for the retry scheduler and per-host circuit breaker
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+import asyncPipeline
+import downloadEngine
+from retryScheduler import CircuitBreaker, RetryLater, RetryScheduler
+
+
+def _flaky_server(failures_per_path):
+    """每个路径前 failures_per_path 次请求返回 500，之后返回 JSON"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    counts = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                counts[self.path] = counts.get(self.path, 0) + 1
+                fail = counts[self.path] <= failures_per_path
+            body = b"error" if fail else b'{"path": "%s"}' % self.path.encode()
+            self.send_response(500 if fail else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", counts
+
+
+def test_backoff_delay_is_jittered():
+    """测试退避时间在 [base/2, base] 之间且不超过上限"""
+    scheduler = RetryScheduler(delay=1.0, backoff=2.0, max_delay=3.0, seed=1)
+    for attempt, base in ((0, 1.0), (1, 2.0), (2, 3.0), (5, 3.0)):
+        delays = [scheduler.backoff_delay(attempt) for _ in range(50)]
+        assert all(base / 2 <= delay <= base for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_retry_budget_and_max_retries():
+    """测试单个文件的重试上限与全局重试预算"""
+    scheduler = RetryScheduler(max_retries=2, delay=0, budget=3, failure_threshold=100)
+    error = RetryLater(requests.ConnectionError("down"))
+    assert scheduler.retry("a", "host", error) is not None
+    assert scheduler.retry("a", "host", error) is not None
+    assert scheduler.retry("a", "host", error) is None  # 第三次失败超过 max_retries
+    assert scheduler.retry("b", "host", error) is not None
+    assert scheduler.retry("c", "host", error) is None  # 预算用完
+    assert scheduler.budget_exhausted
+    assert sorted(scheduler.pop_ready()) == ["a", "a", "b"]
+    assert scheduler.next_delay() is None
+
+
+def test_circuit_breaker_half_open():
+    """测试连续失败后熔断，冷却结束只放行一个探测请求"""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, max_cooldown=60, max_trips=2)
+    assert not breaker.record_failure(0)
+    assert breaker.record_failure(0)
+    assert breaker.wait_time(5) == 5
+    # 熔断前发出的请求陆续失败，不延长冷却
+    assert not breaker.record_failure(6)
+    assert breaker.wait_time(10) == 0  # 探测请求
+    assert breaker.wait_time(10) > 0
+    assert breaker.record_failure(11)  # 探测失败，冷却加倍
+    assert breaker.open_until == 31
+    assert breaker.wait_time(31) == 0
+    breaker.record_success()
+    assert breaker.wait_time(31) == 0 and breaker.wait_time(31) == 0
+    assert not breaker.dead
+
+
+def test_client_errors_do_not_trip_breaker():
+    """测试 4xx 错误只重试文件，不计入熔断"""
+    response = requests.Response()
+    response.status_code = 404
+
+    def fetch():
+        raise requests.HTTPError(response=response)
+
+    try:
+        RetryScheduler.attempt(fetch)
+        assert False, "应抛出 RetryLater"
+    except RetryLater as e:
+        assert not e.host_failure
+    scheduler = RetryScheduler(failure_threshold=1, delay=0)
+    scheduler.retry("a", "host", RetryLater(requests.HTTPError(response=response), host_failure=False))
+    assert scheduler.wait_time("host") == 0
+
+
+def test_scheduled_download_recovers_from_errors():
+    """测试失败的文件重新排队后下载成功，线程池与异步流水线结果一致"""
+    original_cwd = os.getcwd()
+    server, base_url, counts = _flaky_server(failures_per_path=2)
+    try:
+        files = [(f"files/resource/item{i}_{i:08x}.json", f"files/resource/item{i}.json") for i in range(6)]
+        for mode in ("threads", "async"):
+            counts.clear()
+            with tempfile.TemporaryDirectory() as temp_dir:
+                os.chdir(temp_dir)
+                scheduler = RetryScheduler(max_retries=3, delay=0.01, failure_threshold=100, seed=0)
+                if mode == "async":
+                    succeeded, failed = asyncPipeline.download_files_async(
+                        files, base_url, fetch_workers=2, format_workers=1, scheduler=scheduler
+                    )
+                else:
+                    succeeded, failed = downloadEngine.download_files(
+                        files, base_url, workers=2, scheduler=scheduler
+                    )
+                os.chdir(original_cwd)
+                assert sorted(succeeded) == sorted(files) and failed == []
+                assert scheduler.retries == 12
+                assert all(count == 3 for count in counts.values())
+    finally:
+        os.chdir(original_cwd)
+        server.shutdown()
+        server.server_close()
+
+
+def test_unreachable_host_fails_fast():
+    """测试主机不可用时熔断，剩余文件直接失败而不逐个等待退避"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            files = [(f"files/a/item{i}_{i:08x}.json", f"files/a/item{i}.json") for i in range(30)]
+            scheduler = RetryScheduler(max_retries=3, delay=0.05, failure_threshold=3,
+                                       cooldown=0.05, max_trips=1)
+            start = time.monotonic()
+            succeeded, failed = downloadEngine.download_files(
+                files, "http://127.0.0.1:9", workers=4, scheduler=scheduler
+            )
+            assert succeeded == [] and sorted(failed) == sorted(files)
+            assert scheduler.circuit_trips == 2
+            assert scheduler.retries < len(files)
+            assert time.monotonic() - start < 5
+        finally:
+            os.chdir(original_cwd)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证 SQLite 本地状态库
+Test script for the SQLite local state store
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stateStore import SqliteStateStore, import_version_file
+from versionManifest import VersionManifest, extract_subtrees, merge_subtrees
+
+
+def test_incremental_apply_and_export():
+    """测试增量写入、查询与导出"""
+    old_data = {"version": 1, "files": {"json": {"a.json": "a_1.json", "b.json": "b_1.json"}}}
+    new_data = {"version": 2, "files": {"json": {"a.json": "a_2.json", "c.json": "c_1.json"}}}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "version.sqlite")
+        json_path = os.path.join(temp_dir, "version.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(old_data, f)
+
+        assert import_version_file(json_path, db_path) == 2
+
+        with SqliteStateStore(db_path) as store:
+            old_manifest = store.load_manifest()
+            assert old_manifest.version == 1
+            diff = old_manifest.diff(VersionManifest.from_dict(new_data))
+            store.apply(diff.updated, diff.removed, new_data["version"])
+
+            assert store.get("files/json/a.json") == "a_2.json"
+            assert store.get("files/json/b.json") is None
+            assert len(store) == 2
+
+            export_path = os.path.join(temp_dir, "export.json")
+            store.export_json(export_path)
+
+        with open(export_path, "r", encoding="utf-8") as f:
+            assert json.load(f) == new_data
+
+
+def test_apply_tree_round_trips_full_manifest():
+    """测试保存整个清单（包括不参与同步的文件类型与其他子树）后导出的内容与输入一致"""
+    targets = [["files", "config", "json"]]
+    old_data = {"version": 1, "files": {
+        "config": {"json": {"a.json": "a_1.json", "icon.png": "icon_1.png"}},
+        "assets": {"logo.png": "logo_1.png"},
+    }}
+    new_data = {"version": 2, "files": {
+        "config": {"json": {"a.json": "a_2.json", "icon.png": "icon_2.png", "sub": {"b.xml": "b_1.xml"}}},
+        "assets": {"logo.png": "logo_2.png", "bg.jpg": "bg_1.jpg"},
+    }}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "version.sqlite")
+        json_path = os.path.join(temp_dir, "version.json")
+        export_path = os.path.join(temp_dir, "export.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(old_data, f)
+        import_version_file(json_path, db_path)
+
+        with SqliteStateStore(db_path) as store:
+            # 只保存目标子树时，其余子树保持原样（与 json 后端的 merge_subtrees 一致）
+            assert store.apply_tree(extract_subtrees(new_data, targets), targets) == (3, 0)
+            store.export_json(export_path)
+            with open(export_path, "r", encoding="utf-8") as f:
+                assert json.load(f) == merge_subtrees(old_data, extract_subtrees(new_data, targets), targets)
+
+            assert store.apply_tree(new_data) == (2, 0)
+            assert store.apply_tree(new_data) == (0, 0)
+            store.export_json(export_path)
+            with open(export_path, "r", encoding="utf-8") as f:
+                assert json.load(f) == new_data
+
+            del new_data["files"]["config"]["json"]["sub"]
+            del new_data["version"]
+            assert store.apply_tree(new_data, targets) == (0, 1)
+            assert store.version is None and store.get("files/config/json/sub/b.xml") is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证可恢复同步的日志与版本信息回退
+Test script for the resumable sync journal
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from syncJournal import SyncJournal, clear_journal
+from versionManifest import VersionManifest, revert_changes
+
+
+def test_journal_survives_restart():
+    """测试日志在重新打开后仍能识别已完成的文件，并忽略不完整的最后一行"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal_path = os.path.join(temp_dir, "sync.journal")
+        done_file = os.path.join(temp_dir, "a.json")
+        with open(done_file, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+        journal = SyncJournal(journal_path)
+        journal.record(("files/a_1.json", done_file))
+        journal.record(("files/b_1.json", os.path.join(temp_dir, "b.json")))
+        journal.close()
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write('{"url": "files/c_1.json", "pa')
+
+        reopened = SyncJournal(journal_path)
+        assert len(reopened) == 2
+        assert reopened.is_done(("files/a_1.json", done_file))
+        # hash 不同或本地文件不存在时需要重新下载
+        assert not reopened.is_done(("files/a_2.json", done_file))
+        assert not reopened.is_done(("files/b_1.json", os.path.join(temp_dir, "b.json")))
+
+        clear_journal(journal_path)
+        assert not os.path.exists(journal_path)
+
+
+def test_failed_entries_are_not_advanced():
+    """测试下载失败的条目在保存的版本信息中保留旧记录"""
+    old = VersionManifest.from_dict({"version": 1, "files": {"a.json": "a_1.json", "b.json": "b_1.json"}})
+    new_data = {"version": 2, "files": {"a.json": "a_2.json", "b.json": "b_2.json", "c.json": "c_1.json"}}
+    diff = old.diff(VersionManifest.from_dict(new_data))
+
+    failed = [change for change in diff.updated if change.local_path != "files/a.json"]
+    revert_changes(new_data, failed)
+    assert new_data["files"] == {"a.json": "a_2.json", "b.json": "b_1.json"}
+
+    applied = diff.without(failed)
+    assert [change.local_path for change in applied.updated] == ["files/a.json"]
+    assert not applied.added and len(applied.changed) == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证同步指标的收集与报告输出
+Test script for the sync metrics report
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import syncMetrics
+from syncMetrics import FileMetrics, SyncMetrics
+
+
+def _sample_metrics():
+    metrics = SyncMetrics("syncSeerH5Data")
+    with metrics.stage("download"):
+        pass
+    with metrics.stage("download"):
+        pass
+    metrics.add("cache_hits", 2)
+    record = FileMetrics("files/a.json")
+    record.ok = True
+    record.bytes_downloaded = 10
+    record.bytes_written = 20
+    record.add_phase("network", 0.2)
+    record.add_phase("format", 0.001)
+    metrics.record_file(record)
+    cached = FileMetrics("files/b.json")
+    cached.source = "cache"
+    cached.add_phase("network", 0.003)
+    metrics.record_file(cached)
+    metrics.status = "partial"
+    return metrics
+
+
+def test_retries_are_counted_per_thread():
+    """测试重试次数同时计入总数与当前线程的文件"""
+    metrics = SyncMetrics()
+    seen = []
+
+    def worker(count):
+        metrics.take_thread_retries()
+        for _ in range(count):
+            metrics.record_retry()
+        seen.append(metrics.take_thread_retries())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in (1, 2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seen) == [1, 2, 3]
+    assert metrics.counters["retries"] == 6
+    assert metrics.take_thread_retries() == 0
+
+
+def test_json_report():
+    """测试 JSON 报告的阶段、计数与汇总"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "report", "sync.metrics.json")
+        assert _sample_metrics().write_report(path)
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        assert list(report["stages"]) == ["download"]
+        assert report["status"] == "partial"
+        assert report["counters"] == {"cache_hits": 2}
+        totals = report["totals"]
+        assert (totals["files"], totals["succeeded"], totals["failed"], totals["from_cache"]) == (2, 1, 1, 1)
+        assert totals["bytes_downloaded"] == 10 and totals["bytes_written"] == 20
+        assert report["files"][0]["seconds"]["network"] == 0.2
+        assert not os.path.exists(path + ".tmp")
+
+
+def test_prometheus_report():
+    """测试 .prom 路径输出 Prometheus textfile 格式，直方图分桶累计"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "sync.prom")
+        assert _sample_metrics().write_report(path)
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    samples = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+    prefix = 'seer_sync_file_seconds_bucket{script="syncSeerH5Data",phase="network"'
+    assert samples[prefix + ',le="0.01"}'] == "1"
+    assert samples[prefix + ',le="0.25"}'] == "2"
+    assert samples[prefix + ',le="+Inf"}'] == "2"
+    assert samples['seer_sync_file_seconds_count{script="syncSeerH5Data",phase="write"}'] == "0"
+    assert samples['seer_sync_events{script="syncSeerH5Data",event="cache_hits"}'] == "2"
+    assert samples['seer_sync_success{script="syncSeerH5Data"}'] == "0"
+    assert "# TYPE seer_sync_file_seconds histogram" in lines
+
+
+def test_reset_metrics():
+    """测试每次运行使用新的收集器"""
+    first = syncMetrics.reset_metrics("a")
+    first.add("retries")
+    second = syncMetrics.reset_metrics("b")
+    assert syncMetrics.get_metrics() is second
+    assert second.counters == {} and second.script == "b"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
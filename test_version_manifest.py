@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证版本清单索引与差异比较
+Test script for the flattened version manifest
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jsonStream import iter_events, iter_leaves
+from versionManifest import StreamingManifestDiff, VersionManifest, extract_subtrees, merge_subtrees, splice_subtrees
+
+TARGET_PATHS = [
+    ["files", "resource", "config", "json"],
+    ["files", "resource", "config", "xml"],
+]
+
+
+def _sample_manifest():
+    return {
+        "version": 1,
+        "files": {
+            "resource": {
+                "config": {
+                    "json": {
+                        "pveEnter.json": "pveEnter_378343fe.json",
+                        "module.json": "module_63811002.json",
+                    },
+                    "xml": {
+                        "petbook.json": "petbook_77387e2a.json",
+                        "sub": {"a.xml": "a_1.xml"},
+                    },
+                },
+                "assets": {"logo.png": "logo_1.png", "skin.json": "skin_1.json"},
+            }
+        },
+    }
+
+
+def test_flatten_with_prefixes():
+    """测试按 TARGET_PATHS 扁平化"""
+    manifest = VersionManifest.from_dict(_sample_manifest(), prefixes=TARGET_PATHS)
+    assert len(manifest) == 4
+    assert manifest.get("files/resource/config/xml/sub/a.xml") == "a_1.xml"
+    assert "files/resource/assets/skin.json" not in manifest
+    assert manifest.version == 1
+
+
+def test_diff_added_changed_removed():
+    """测试新增、变化、删除的识别"""
+    old_data = _sample_manifest()
+    new_data = _sample_manifest()
+    config = new_data["files"]["resource"]["config"]
+    config["json"]["pveEnter.json"] = "pveEnter_00000001.json"
+    config["json"]["new.json"] = "new_1.json"
+    del config["xml"]["petbook.json"]
+
+    old_manifest = VersionManifest.from_dict(old_data, prefixes=TARGET_PATHS)
+    new_manifest = VersionManifest.from_dict(new_data, prefixes=TARGET_PATHS)
+    diff = old_manifest.diff(new_manifest)
+
+    assert diff.download_list() == [
+        ("files/resource/config/json/pveEnter_00000001.json", "files/resource/config/json/pveEnter.json"),
+        ("files/resource/config/json/new_1.json", "files/resource/config/json/new.json"),
+    ]
+    assert [c.local_path for c in diff.added] == ["files/resource/config/json/new.json"]
+    assert [c.local_path for c in diff.changed] == ["files/resource/config/json/pveEnter.json"]
+    assert [(c.local_path, c.old_name) for c in diff.removed] == [
+        ("files/resource/config/xml/petbook.json", "petbook_77387e2a.json")
+    ]
+    assert not old_manifest.diff(old_manifest)
+
+
+def test_suffix_filter_and_roundtrip():
+    """测试文件类型过滤与还原为嵌套字典"""
+    data = _sample_manifest()
+    manifest = VersionManifest.from_dict(data, suffixes=(".json",))
+    assert "files/resource/config/xml/sub/a.xml" not in manifest
+    assert "files/resource/assets/skin.json" in manifest
+    assert VersionManifest.from_dict(data, suffixes=None).to_dict() == data
+
+
+def test_extract_subtrees():
+    """测试只保留目标子树"""
+    data = _sample_manifest()
+    scoped = extract_subtrees(data, TARGET_PATHS)
+    assert scoped == {
+        "version": 1,
+        "files": {"resource": {"config": data["files"]["resource"]["config"]}},
+    }
+    assert scoped["files"]["resource"]["config"]["json"] is data["files"]["resource"]["config"]["json"]
+    assert "assets" not in scoped["files"]["resource"]
+
+
+def test_merge_subtrees_keeps_other_entries():
+    """测试写回目标子树时保留其余子树，且不修改原数据"""
+    base = _sample_manifest()
+    scoped = extract_subtrees(_sample_manifest(), TARGET_PATHS)
+    scoped["version"] = 2
+    scoped["files"]["resource"]["config"]["json"] = {"new.json": "new_1.json"}
+    del scoped["files"]["resource"]["config"]["xml"]
+
+    merged = merge_subtrees(base, scoped, TARGET_PATHS)
+    assert merged["version"] == 2
+    assert merged["files"]["resource"]["config"]["json"] == {"new.json": "new_1.json"}
+    assert "xml" not in merged["files"]["resource"]["config"]
+    assert merged["files"]["resource"]["assets"] == base["files"]["resource"]["assets"]
+    assert base == _sample_manifest()
+
+    # 本地没有其他子树时结果与 scoped 相同
+    assert merge_subtrees({}, scoped, TARGET_PATHS) == scoped
+
+
+def test_splice_subtrees_matches_merge():
+    """测试在 version.json 文本中直接替换子树，结果与完整合并后重新编码一致"""
+    import json
+
+    for base in (_sample_manifest(), {"files": _sample_manifest()["files"], "version": 1,
+                                      "patch": {"resource": {"config": {"json": {}}}}}):
+        text = json.dumps(base, ensure_ascii=False, indent=2)
+        scoped = extract_subtrees(json.loads(text), TARGET_PATHS)
+        scoped["version"] = 2
+        scoped["files"]["resource"]["config"]["json"] = {"new.json": "new_1.json", "空": {}}
+        scoped["files"]["resource"]["config"]["xml"] = {}
+        expected = json.dumps(merge_subtrees(base, scoped, TARGET_PATHS), ensure_ascii=False, indent=2)
+        assert splice_subtrees(text, scoped, TARGET_PATHS) == expected
+
+    # 子树或 version 新增、删除以及非标准格式时交给完整合并
+    text = json.dumps(_sample_manifest(), ensure_ascii=False, indent=2)
+    scoped = extract_subtrees(_sample_manifest(), TARGET_PATHS)
+    del scoped["files"]["resource"]["config"]["xml"]
+    assert splice_subtrees(text, scoped, TARGET_PATHS) is None
+    scoped = extract_subtrees(_sample_manifest(), TARGET_PATHS)
+    del scoped["version"]
+    assert splice_subtrees(text, scoped, TARGET_PATHS) is None
+    assert splice_subtrees(json.dumps(_sample_manifest()), extract_subtrees(_sample_manifest(), TARGET_PATHS),
+                           TARGET_PATHS) is None
+    # 键只出现在父对象之后的其他子树中时不能误替换
+    decoy = {"version": 1, "files": {"resource": {"assets": {}}}, "patch": {"resource": {"config": {}}}}
+    scoped = {"version": 2, "files": {"resource": {"config": {"json": {}, "xml": {}}}}}
+    assert splice_subtrees(json.dumps(decoy, indent=2), scoped, TARGET_PATHS) is None
+
+
+def test_streaming_diff_matches_dict_diff():
+    """测试流式比较与整体比较的结果一致"""
+    import json
+
+    old_data = _sample_manifest()
+    new_data = _sample_manifest()
+    config = new_data["files"]["resource"]["config"]
+    config["json"]["module.json"] = "module_00000002.json"
+    config["xml"]["new.json"] = "new_1.json"
+    del config["json"]["pveEnter.json"]
+
+    old_manifest = VersionManifest.from_dict(old_data, prefixes=TARGET_PATHS)
+    expected = old_manifest.diff(VersionManifest.from_dict(new_data, prefixes=TARGET_PATHS))
+
+    chunks = [json.dumps(new_data).encode("utf-8")]
+    changes = StreamingManifestDiff(old_manifest, prefixes=TARGET_PATHS)
+    streamed = list(changes.feed(iter_leaves(iter_events(chunks), [tuple(p) for p in TARGET_PATHS])))
+    diff = changes.result()
+
+    assert streamed == expected.updated
+    assert diff.download_list() == expected.download_list()
+    assert diff.removed == expected.removed
+    assert changes.new.version == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,455 @@
+import json
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import jsonCodec
+from jsonStream import DEFAULT_CHUNK_SIZE, iter_events, iter_file_chunks, iter_leaves
+
+PathKey = Tuple[str, ...]
+
+# 默认只关心配置文件
+DEFAULT_SUFFIXES = (".json", ".xml")
+
+
+class ManifestChange(NamedTuple):
+    """单个文件的变化：old_name / new_name 为带 hash 的文件名，不存在时为 None"""
+    path: PathKey
+    old_name: Optional[str]
+    new_name: Optional[str]
+
+    @property
+    def local_path(self) -> str:
+        """本地保存路径（原文件名）"""
+        return "/".join(self.path)
+
+    @property
+    def url_path(self) -> str:
+        """下载路径（带 hash）"""
+        name = self.new_name if self.new_name is not None else self.old_name
+        return "/".join(self.path[:-1] + (name,))
+
+
+class ManifestDiff:
+    """两个清单之间的差异：新增、变化、删除"""
+
+    def __init__(self, added: List[ManifestChange], changed: List[ManifestChange],
+                 removed: List[ManifestChange], updated: List[ManifestChange]):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        # 新增与变化的条目，按远程清单中的顺序排列
+        self.updated = updated
+
+    def __bool__(self) -> bool:
+        return bool(self.updated or self.removed)
+
+    def download_list(self) -> List[tuple]:
+        """返回需要下载的 (url_path, local_path) 列表"""
+        return [(change.url_path, change.local_path) for change in self.updated]
+
+    def without(self, changes: Iterable[ManifestChange]) -> "ManifestDiff":
+        """去掉指定的条目（如下载失败的文件），返回新的差异"""
+        excluded = set(changes)
+        return ManifestDiff(
+            [change for change in self.added if change not in excluded],
+            [change for change in self.changed if change not in excluded],
+            [change for change in self.removed if change not in excluded],
+            [change for change in self.updated if change not in excluded],
+        )
+
+
+def extract_subtrees(data: Dict, prefixes: Sequence[Sequence[str]]) -> Dict:
+    """
+    只保留 prefixes 指定的子树（以及顶层 version），结构与 version.json 一致
+    子树对象直接引用原数据，不做复制
+    """
+    scoped: Dict = {}
+    if not isinstance(data, dict):
+        return scoped
+    if "version" in data:
+        scoped["version"] = data["version"]
+
+    for prefix in prefixes:
+        prefix = _split_path(prefix)
+        if not prefix:
+            continue
+        node = data
+        for key in prefix:
+            node = node.get(key) if isinstance(node, dict) else None
+        if not isinstance(node, dict):
+            continue
+        parent = scoped
+        for key in prefix[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[prefix[-1]] = node
+
+    return scoped
+
+
+def merge_subtrees(base: Dict, scoped: Dict, prefixes: Sequence[Sequence[str]]) -> Dict:
+    """
+    extract_subtrees 的逆操作：用 scoped 中 prefixes 指定的子树与顶层 version 替换 base 中的对应部分，
+    base 的其余内容（如完整同步记录的其他子树）原样保留；只沿前缀路径复制字典，不修改 base
+    """
+    merged = dict(base) if isinstance(base, dict) else {}
+    if "version" in scoped:
+        merged["version"] = scoped["version"]
+    else:
+        merged.pop("version", None)
+
+    for prefix in prefixes:
+        prefix = _split_path(prefix)
+        if not prefix:
+            continue
+        node = scoped
+        for key in prefix:
+            node = node.get(key) if isinstance(node, dict) else None
+        parent = merged
+        for key in prefix[:-1]:
+            child = parent.get(key)
+            if not isinstance(child, dict):
+                if node is None:
+                    break  # 两边都没有该子树
+                child = {}
+            parent[key] = child = dict(child)
+            parent = child
+        else:
+            if isinstance(node, dict):
+                parent[prefix[-1]] = node
+            else:
+                parent.pop(prefix[-1], None)
+
+    return merged
+
+
+def _value_start(text: str, start: int, key: str, depth: int, indent: int) -> Optional[int]:
+    """
+    在按 indent 缩进的 JSON 文本中，从第 depth - 1 层对象的起始位置 start 查找第 depth 层的键 key，返回其值的起始位置
+    同一层的行缩进相同，只需确认找到的键之前父对象没有结束，不必先找到父对象的结尾
+    """
+    marker = "\n" + " " * (indent * depth) + json.dumps(key, ensure_ascii=False) + ": "
+    position = text.find(marker, start)
+    if position < 0 or text.find("\n" + " " * (indent * (depth - 1)) + "}", start, position) >= 0:
+        return None
+    return position + len(marker)
+
+
+def _value_end(text: str, value_start: int, depth: int, indent: int) -> Optional[int]:
+    """第 depth 层的键对应的值（从 value_start 开始）的结束位置"""
+    opener = text[value_start:value_start + 1]
+    if opener in ("{", "["):
+        closer = "}" if opener == "{" else "]"
+        if text.startswith(opener + closer, value_start):
+            return value_start + 2
+        closer = "\n" + " " * (indent * depth) + closer
+        close = text.find(closer, value_start)
+        return close + len(closer) if close >= 0 else None
+    line_end = text.find("\n", value_start)
+    if line_end < 0:
+        return None
+    return line_end - 1 if text[line_end - 1] == "," else line_end
+
+
+def splice_subtrees(text: str, scoped: Dict, prefixes: Sequence[Sequence[str]],
+                    indent: int = 2) -> Optional[str]:
+    """
+    与 merge_subtrees 结果相同，但直接在按 indent 缩进保存的 version.json 文本中替换
+    prefixes 指定的子树与顶层 version，其余部分不解析也不重新编码
+    文本结构不符合预期（子树或 version 新增、删除，或不是标准缩进格式）时返回 None
+    """
+    if not text.startswith("{\n"):
+        return None
+    replacements = []
+    targets = [(("version",), scoped.get("version"))] if "version" in scoped else []
+    for prefix in prefixes:
+        prefix = _split_path(prefix)
+        node = scoped
+        for key in prefix:
+            node = node.get(key) if isinstance(node, dict) else None
+        if not prefix or not isinstance(node, dict):
+            return None
+        targets.append((prefix, node))
+
+    for path, value in targets:
+        start = 0
+        for depth, key in enumerate(path, 1):
+            start = _value_start(text, start, key, depth, indent)
+            if start is None:
+                return None
+        end = _value_end(text, start, len(path), indent)
+        if end is None:
+            return None
+        encoded = jsonCodec.dumps_bytes(value, indent).decode("utf-8")
+        replacements.append((start, end, encoded.replace("\n", "\n" + " " * (indent * len(path)))))
+    if "version" not in scoped and _value_start(text, 0, "version", 1, indent) is not None:
+        return None
+
+    replacements.sort()
+    if any(previous[1] > current[0] for previous, current in zip(replacements, replacements[1:])):
+        return None
+    parts = []
+    position = 0
+    for start, end, encoded in replacements:
+        parts.append(text[position:start])
+        parts.append(encoded)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _intern_path(segments: Iterable[str]) -> PathKey:
+    return tuple(sys.intern(segment) for segment in segments)
+
+
+def _split_path(path) -> PathKey:
+    if isinstance(path, str):
+        return _intern_path(part for part in path.split("/") if part)
+    return _intern_path(path)
+
+
+def _normalize_prefixes(prefixes: Optional[Sequence[Sequence[str]]]) -> Optional[List[PathKey]]:
+    if not prefixes:
+        return None
+    return [prefix for prefix in (_split_path(p) for p in prefixes) if prefix] or None
+
+
+def _under_prefixes(path: PathKey, prefixes: Optional[List[PathKey]]) -> bool:
+    if prefixes is None:
+        return True
+    for prefix in prefixes:
+        if len(path) > len(prefix) and path[:len(prefix)] == prefix:
+            return True
+    return False
+
+
+def _match_suffix(path: PathKey, suffixes: Optional[Tuple[str, ...]]) -> bool:
+    return suffixes is None or path[-1].lower().endswith(suffixes)
+
+
+def revert_changes(data: Dict, changes: Iterable[ManifestChange]) -> Dict:
+    """
+    在 version.json 结构的字典中撤销指定的变化：恢复旧文件名，新增的条目则删除
+    原地修改并返回 data
+    """
+    for change in changes:
+        parents, name = change.path[:-1], change.path[-1]
+        node = data
+        if change.old_name is None:
+            for key in parents:
+                node = node.get(key) if isinstance(node, dict) else None
+            if isinstance(node, dict):
+                node.pop(name, None)
+        else:
+            for key in parents:
+                node = node.setdefault(key, {})
+            node[name] = change.old_name
+    return data
+
+
+class VersionManifest:
+    """
+    version.json 的扁平化索引：逻辑路径 -> 带 hash 的文件名
+
+    路径以驻留（interned）字符串组成的元组保存，同一目录下的条目共享路径片段，
+    两个清单的比较只需一次字典遍历，无需递归拼接路径。
+    """
+
+    def __init__(self, entries: Optional[Dict[PathKey, str]] = None, version=None):
+        self._entries: Dict[PathKey, str] = entries if entries is not None else {}
+        self.version = version
+
+    @classmethod
+    def from_dict(cls, data: Dict, suffixes: Optional[Sequence[str]] = DEFAULT_SUFFIXES,
+                  prefixes: Optional[Sequence[Sequence[str]]] = None,
+                  base_path: str = "") -> "VersionManifest":
+        """
+        将 version.json 的嵌套字典扁平化
+
+        参数:
+            data: version.json 数据（或其中的子树）
+            suffixes: 只收录以这些后缀结尾的文件，为 None 则收录所有文件
+            prefixes: 只收录这些路径下的子树（如 TARGET_PATHS），为空则收录全部
+            base_path: data 为子树时，其在完整清单中的路径
+        """
+        entries: Dict[PathKey, str] = {}
+        manifest = cls(entries, data.get("version") if isinstance(data, dict) and not base_path else None)
+        if not isinstance(data, dict):
+            return manifest
+
+        if suffixes is not None:
+            suffixes = tuple(suffix.lower() for suffix in suffixes)
+        base = _split_path(base_path)
+
+        roots = []
+        if prefixes:
+            for prefix in prefixes:
+                prefix = _split_path(prefix)
+                if not prefix:
+                    continue
+                node = data
+                for key in prefix:
+                    node = node.get(key) if isinstance(node, dict) else None
+                if isinstance(node, dict):
+                    roots.append((base + prefix, node))
+        else:
+            roots.append((base, data))
+
+        # 深度优先遍历（显式栈），条目顺序与原清单一致
+        for root_path, root in roots:
+            stack = [(root_path, iter(root.items()))]
+            while stack:
+                dir_path, children = stack[-1]
+                for key, value in children:
+                    if isinstance(value, dict):
+                        stack.append((dir_path + (sys.intern(key),), iter(value.items())))
+                        break
+                    if isinstance(value, str) and (suffixes is None or key.lower().endswith(suffixes)):
+                        entries[dir_path + (sys.intern(key),)] = value
+                else:
+                    stack.pop()
+
+        return manifest
+
+    @classmethod
+    def from_leaves(cls, leaves: Iterable[Tuple[Sequence[str], object]],
+                    suffixes: Optional[Sequence[str]] = DEFAULT_SUFFIXES,
+                    prefixes: Optional[Sequence[Sequence[str]]] = None) -> "VersionManifest":
+        """由流式解析得到的 (键路径, 值) 序列构建清单"""
+        manifest = cls()
+        entries = manifest._entries
+        if suffixes is not None:
+            suffixes = tuple(suffix.lower() for suffix in suffixes)
+        prefixes = _normalize_prefixes(prefixes)
+
+        for path, value in leaves:
+            if len(path) == 1 and path[0] == "version":
+                manifest.version = value
+                continue
+            if not isinstance(value, str):
+                continue
+            path = _intern_path(path)
+            if _under_prefixes(path, prefixes) and _match_suffix(path, suffixes):
+                entries[path] = value
+        return manifest
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        return _split_path(path) in self._entries
+
+    def get(self, path, default: Optional[str] = None) -> Optional[str]:
+        """按逻辑路径（"a/b/c.json" 或元组）查找带 hash 的文件名"""
+        return self._entries.get(_split_path(path), default)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """遍历 (逻辑路径, 带 hash 的文件名)"""
+        for path, name in self._entries.items():
+            yield "/".join(path), name
+
+    def diff(self, new: "VersionManifest") -> ManifestDiff:
+        """与新清单比较，返回差异"""
+        old_entries = self._entries
+        new_entries = new._entries
+
+        added = []
+        changed = []
+        updated = []
+        for path, new_name in new_entries.items():
+            old_name = old_entries.get(path)
+            if old_name == new_name:
+                continue
+            change = ManifestChange(path, old_name, new_name)
+            (added if old_name is None else changed).append(change)
+            updated.append(change)
+
+        removed = [
+            ManifestChange(path, old_name, None)
+            for path, old_name in old_entries.items()
+            if path not in new_entries
+        ]
+
+        return ManifestDiff(added, changed, removed, updated)
+
+    def to_dict(self) -> Dict:
+        """还原为 version.json 的嵌套字典结构"""
+        data: Dict = {}
+        if self.version is not None:
+            data["version"] = self.version
+        for path, name in self._entries.items():
+            node = data
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = name
+        return data
+
+
+class StreamingManifestDiff:
+    """
+    边接收远程清单边与本地清单比较
+
+    feed() 每解析出一个需要更新的文件就立即产出，调用方可以在清单下载完成前开始下载；
+    所有叶子都会记录到 new 中，结束后通过 result() 获取完整差异（含删除的条目）。
+    """
+
+    def __init__(self, old: VersionManifest, suffixes: Optional[Sequence[str]] = DEFAULT_SUFFIXES,
+                 prefixes: Optional[Sequence[Sequence[str]]] = None):
+        self.old = old
+        self.new = VersionManifest()
+        self._suffixes = tuple(suffix.lower() for suffix in suffixes) if suffixes is not None else None
+        self._prefixes = _normalize_prefixes(prefixes)
+        self.added: List[ManifestChange] = []
+        self.changed: List[ManifestChange] = []
+        self.updated: List[ManifestChange] = []
+
+    def feed(self, leaves: Iterable[Tuple[Sequence[str], object]]) -> Iterator[ManifestChange]:
+        """处理 (键路径, 值) 序列，逐个产出新增或变化的条目"""
+        old_entries = self.old._entries
+        new_entries = self.new._entries
+
+        for path, value in leaves:
+            if len(path) == 1 and path[0] == "version":
+                self.new.version = value
+                continue
+            if not isinstance(value, str):
+                continue
+            path = _intern_path(path)
+            new_entries[path] = value
+            if not (_under_prefixes(path, self._prefixes) and _match_suffix(path, self._suffixes)):
+                continue
+
+            old_name = old_entries.get(path)
+            if old_name == value:
+                continue
+            change = ManifestChange(path, old_name, value)
+            (self.added if old_name is None else self.changed).append(change)
+            self.updated.append(change)
+            yield change
+
+    def result(self) -> ManifestDiff:
+        """返回完整差异，需在 feed() 遍历结束后调用"""
+        new_entries = self.new._entries
+        removed = [
+            ManifestChange(path, old_name, None)
+            for path, old_name in self.old._entries.items()
+            if path not in new_entries
+        ]
+        return ManifestDiff(self.added, self.changed, removed, self.updated)
+
+
+def load_manifest_file(path: str, suffixes: Optional[Sequence[str]] = DEFAULT_SUFFIXES,
+                       prefixes: Optional[Sequence[Sequence[str]]] = None) -> VersionManifest:
+    """流式读取本地 version.json 并构建清单，不构建完整的嵌套字典"""
+    with open(path, "rb") as f:
+        leaves = iter_leaves(iter_events(iter_file_chunks(f)), _normalize_prefixes(prefixes))
+        return VersionManifest.from_leaves(leaves, suffixes, prefixes)
+
+
+def iter_response_leaves(response, prefixes: Optional[Sequence[Sequence[str]]] = None
+                         ) -> Iterator[Tuple[Tuple[str, ...], object]]:
+    """边接收响应内容边解析，产出 (键路径, 值)，结束后关闭响应"""
+    try:
+        events = iter_events(response.iter_content(DEFAULT_CHUNK_SIZE))
+        yield from iter_leaves(events, _normalize_prefixes(prefixes))
+    finally:
+        response.close()